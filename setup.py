@@ -14,6 +14,8 @@ requirements = ['Click>=7.0', ]
 
 test_requirements = ['pytest>=3', ]
 
+extras_requirements = {'modbus': ['pymodbus>=3.10', ], 'numpy': ['numpy', ], }
+
 setup(
     author="Marek Pilch",
     author_email='marpi82@gmail.com',
@@ -34,6 +36,7 @@ setup(
         ],
     },
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="MIT license",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
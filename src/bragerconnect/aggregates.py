@@ -0,0 +1,197 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Fleet-wide incremental aggregates
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterable, Optional, Union
+
+from .models.device import Device, ValueType
+
+# Device grouping by P11 info pool fields
+GROUP_FIELDS: dict[str, tuple[int, int]] = {
+    "firmware": (11, 1),
+    "model": (11, 4),
+    "module_firmware": (11, 5),
+}
+
+GroupByType = Union[str, Callable[[Device], Hashable], None]
+
+
+@dataclass
+class AggregateBucket:
+    """Aggregated values of devices group"""
+
+    devices: int = 0  # devices in the group
+    count: int = 0  # devices having numeric parameter value
+    sum: float = 0.0
+    matching: int = 0  # devices which parameter value matches the predicate
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Returns mean of numeric parameter values, None when there are no values."""
+        return self.sum / self.count if self.count else None
+
+
+class FleetAggregate:
+    """Aggregate of all gateway devices, optionally grouped, updated with every change
+
+    Every device contributes to one group: device count, numeric value of the parameter
+    (count, sum, mean) and whether the value matches the predicate. Contribution of a device
+    is replaced when its parameter or group changes, so reading the aggregate never iterates
+    devices.
+    """
+
+    def __init__(
+        self,
+        pool_no: Optional[int] = None,
+        field_no: Optional[int] = None,
+        group_by: GroupByType = None,
+        predicate: Optional[Callable[[ValueType], bool]] = None,
+    ) -> None:
+        """Aggregate of all gateway devices, optionally grouped
+
+        Args:
+            pool_no (Optional[int], optional): Aggregated parameter pool number, None to only
+                count devices. Defaults to None.
+            field_no (Optional[int], optional): Aggregated parameter field number.
+                Defaults to None.
+            group_by (GroupByType, optional): One of GROUP_FIELDS names, "distr_group" or
+                function returning device group, None for one group. Defaults to None.
+            predicate (Optional[Callable[[ValueType], bool]], optional): Devices which value
+                matches are counted in `matching`, eg. devices in alarm. Defaults to None.
+
+        Raises:
+            ValueError: When group name is not known
+        """
+        if isinstance(group_by, str) and group_by not in (*GROUP_FIELDS, "distr_group"):
+            raise ValueError(f"Unknown group {group_by}")
+        self.parameter = (pool_no, field_no) if pool_no is not None else None
+        self.group_by = group_by
+        self.predicate = predicate
+        self.groups: dict[Hashable, AggregateBucket] = {}
+        self.total = AggregateBucket()
+        self._contributions: dict[str, tuple[Hashable, Optional[float], bool]] = {}
+
+    @property
+    def fields(self) -> set[tuple[int, int]]:
+        """Returns pool parameters, which changes update the aggregate."""
+        fields = {self.parameter} if self.parameter is not None else set()
+        if isinstance(self.group_by, str) and self.group_by in GROUP_FIELDS:
+            fields.add(GROUP_FIELDS[self.group_by])
+        return fields
+
+    def group(self, device: Device) -> Hashable:
+        """Returns device group
+
+        Args:
+            device (Device): Device
+
+        Returns:
+            Hashable: Group key
+        """
+        if self.group_by is None:
+            return None
+        if callable(self.group_by):
+            return self.group_by(device)
+        if self.group_by == "distr_group":
+            return device.info.distr_group
+        pool_no, field_no = GROUP_FIELDS[self.group_by]
+        return device.pool.value.get(pool_no, {}).get(field_no) if device.pool else None
+
+    def _apply(self, contribution: tuple[Hashable, Optional[float], bool], sign: int) -> None:
+        group, value, matched = contribution
+        for bucket in (self.total, self.groups.setdefault(group, AggregateBucket())):
+            bucket.devices += sign
+            if value is not None:
+                bucket.count += sign
+                bucket.sum += sign * value
+            bucket.matching += sign * matched
+        if not self.groups[group].devices:
+            del self.groups[group]
+
+    def update(self, device: Device) -> None:
+        """Adds device or replaces its contribution
+
+        Args:
+            device (Device): Added or changed device
+        """
+        self.remove(device.info.devid)
+        value: Any = None
+        if self.parameter is not None and device.pool is not None:
+            value = device.pool.value.get(self.parameter[0], {}).get(self.parameter[1])
+        matched = bool(self.predicate is not None and value is not None and self.predicate(value))
+        numeric = float(value) if isinstance(value, (int, float)) else None
+        contribution = (self.group(device), numeric, matched)
+        self._contributions[device.info.devid] = contribution
+        self._apply(contribution, 1)
+
+    def remove(self, devid: str) -> None:
+        """Removes device contribution
+
+        Args:
+            devid (str): Device ID
+        """
+        contribution = self._contributions.pop(devid, None)
+        if contribution is not None:
+            self._apply(contribution, -1)
+
+
+class AggregateIndex:
+    """Aggregates registered in gateway, indexed by parameters they depend on"""
+
+    def __init__(self) -> None:
+        self.aggregates: list[FleetAggregate] = []
+        self._by_field: dict[tuple[int, int], list[FleetAggregate]] = {}
+
+    def add(self, aggregate: FleetAggregate, devices: Iterable[Device]) -> FleetAggregate:
+        """Registers aggregate, computing it from current devices
+
+        Args:
+            aggregate (FleetAggregate): Aggregate
+            devices (Iterable[Device]): Current devices
+
+        Returns:
+            FleetAggregate: Registered aggregate
+        """
+        self.aggregates.append(aggregate)
+        for key in aggregate.fields:
+            self._by_field.setdefault(key, []).append(aggregate)
+        for device in devices:
+            aggregate.update(device)
+        return aggregate
+
+    def remove(self, aggregate: FleetAggregate) -> None:
+        """Unregisters aggregate"""
+        self.aggregates.remove(aggregate)
+        for key in aggregate.fields:
+            self._by_field[key].remove(aggregate)
+
+    def device_updated(self, device: Device) -> None:
+        """Updates all aggregates with added device or device which info changed"""
+        for aggregate in self.aggregates:
+            aggregate.update(device)
+
+    def device_removed(self, devid: str) -> None:
+        """Removes device from all aggregates"""
+        for aggregate in self.aggregates:
+            aggregate.remove(devid)
+
+    def pool_changed(self, device: Device, changed: Iterable[tuple[int, int, str]]) -> None:
+        """Updates aggregates depending on changed parameters
+
+        Args:
+            device (Device): Changed device
+            changed (Iterable[tuple[int, int, str]]): Changed (pool, field, letter) triples
+        """
+        if not self._by_field:
+            return
+        affected: dict[int, FleetAggregate] = {}
+        for pool_no, field_no, field_t in changed:
+            if field_t in ("v", "u"):
+                for aggregate in self._by_field.get((pool_no, field_no), ()):
+                    affected[id(aggregate)] = aggregate
+        for aggregate in affected.values():
+            aggregate.update(device)
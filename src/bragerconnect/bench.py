@@ -0,0 +1,877 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Performance benchmarks
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import platform
+import tempfile
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import cycle
+from typing import Any, Awaitable, Callable, Optional
+
+from . import __version__
+from .cache import Snapshot, SnapshotCache
+from .gateway import Gateway
+from .models.device import (
+    Device,
+    DeviceInfo,
+    Pool,
+    PoolValueType,
+    ValueType,
+    catalog_version,
+    diff_pool_data,
+    load_lang,
+)
+from .mock_server import MockServer, start_modbus_server
+from .subscriptions import SubscriptionIndex
+from .supervisor import Account, ShardedGateway
+from .sync import LoopThread, SyncGateway
+from .modbus import DEFAULT_REGISTER_MAP, ModbusConnection, RegisterBlock
+from .models.websocket import Message, MessageType, Priority
+from .websocket import Connection
+
+BENCH_DEVID = "BENCH{:05d}"
+
+
+def sample_pool_data(devid: str = BENCH_DEVID.format(0), lang: str = "pl") -> dict[str, Any]:
+    """Generates `s_getAllPoolData` like response with all parameters from pool names catalog
+
+    Args:
+        devid (str, optional): Device ID, stored in P11. Defaults to BENCH_DEVID.format(0).
+        lang (str, optional): Catalogs language. Defaults to "pl".
+
+    Returns:
+        dict[str, Any]: Pool data
+    """
+    _, names = load_lang(lang)
+    data: dict[str, dict[str, Any]] = {}
+    for pool_name, fields in names.items():
+        pool = data.setdefault(pool_name, {})
+        for field_no in fields:
+            if pool_name == "P5":
+                pool[f"s{field_no}"] = int(field_no) % 4
+                continue
+            no = int(field_no)
+            pool.update({f"v{no}": no * 7 % 90, f"u{no}": 1 if pool_name == "P4" else no % 60})
+            if pool_name != "P4":
+                pool.update({f"n{no}": 0, f"x{no}": 100})
+            pool[f"s{no}"] = 0
+    data["P11"] = {
+        "v1": "Z.HT900T v2.5.25 Apr 26 2021",
+        "v4": "DasPell GL 37 V1+",
+        "v5": "HT Connect V2.08 Sep 24 2020",
+        "v6": f"ID ETH: {devid}",
+    }
+    data["P12"] = {
+        f"{letter}{no}": value
+        for no in range(4, 12)
+        for letter, value in zip("abcdefghinxus", [0] * 9 + [-10, 10, 1, 3])
+    }
+    return data
+
+
+def sample_device_info(devid: str) -> dict[str, Any]:
+    """Generates `s_getMyDevIdList` like device information
+
+    Args:
+        devid (str): Device ID
+
+    Returns:
+        dict[str, Any]: Device information
+    """
+    return {"username": "bench", "sharedfrom_name": None, "devid": devid, "distr_group": "ht"}
+
+
+def measure(func: Callable[[], Any], repeat: int = 5) -> dict[str, float]:
+    """Measures function execution time
+
+    Args:
+        func (Callable[[], Any]): Measured function
+        repeat (int, optional): Number of runs. Defaults to 5.
+
+    Returns:
+        dict[str, float]: Minimum and mean time in seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "mean": sum(times) / len(times)}
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Returns 50th and 99th percentile and maximum of samples
+
+    Args:
+        samples (list[float]): Samples
+
+    Returns:
+        dict[str, float]: Percentiles
+    """
+    ordered = sorted(samples)
+    return {
+        "p50": ordered[len(ordered) // 2],
+        "p99": ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)],
+        "max": ordered[-1],
+    }
+
+
+async def async_measure_latency(func: Callable[[], Awaitable[Any]], samples: int) -> list[float]:
+    """Measures latency of consecutive coroutine calls
+
+    Args:
+        func (Callable[[], Awaitable[Any]]): Measured coroutine function
+        samples (int): Number of calls
+
+    Returns:
+        list[float]: Latencies in seconds
+    """
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_warm_start(devices: int = 500, repeat: int = 5) -> dict[str, dict[str, float]]:
+    """Compares cold start (decoding `s_getAllPoolData` frames) with warm start (snapshot cache)
+
+    Cold start timings exclude network round-trips (login, devices list and two requests
+    per device), which make the real cold start considerably slower. Warm start creates all
+    devices and the pool of the first one, other pools are created on first access.
+
+    Args:
+        devices (int, optional): Number of devices. Defaults to 500.
+        repeat (int, optional): Number of runs. Defaults to 5.
+
+    Returns:
+        dict[str, dict[str, float]]: Cold and warm start timings
+    """
+    devids = [BENCH_DEVID.format(no) for no in range(devices)]
+    frames = [
+        json.dumps({"wrkfnc": True, "type": 12, "nr": no, "resp": sample_pool_data(devid)})
+        for no, devid in enumerate(devids)
+    ]
+
+    def cold_start() -> None:
+        for devid, frame in zip(devids, frames):
+            device = Device(None, DeviceInfo(**sample_device_info(devid)))
+            device.pool = Pool(init_data=Message.from_text(frame).response)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SnapshotCache.for_account(directory, "bench")
+        snapshot = Snapshot(catalog_version("pl"))
+        for devid, frame in zip(devids, frames):
+            snapshot.devices[devid] = sample_device_info(devid)
+            snapshot.pools[devid] = json.loads(frame)["resp"]
+        cache.save(snapshot)
+
+        def warm_start() -> Pool:
+            loaded = cache.load()
+            created = [
+                Device(None, DeviceInfo(**info)).load(loaded.pools[devid])
+                for devid, info in loaded.devices.items()
+            ]
+            return created[0].pool
+
+        return {"cold": measure(cold_start, repeat), "warm": measure(warm_start, repeat)}
+
+
+def bench_pool_diff(changes: int = 10, repeat: int = 1000) -> dict[str, float]:
+    """Measures diff of pool data with new `s_getAllPoolData` response
+
+    Args:
+        changes (int, optional): Number of changed `v` fields. Defaults to 10.
+        repeat (int, optional): Number of runs. Defaults to 1000.
+
+    Returns:
+        dict[str, float]: Diff timings
+    """
+    pool = Pool(init_data=sample_pool_data())
+    new = json.loads(json.dumps(pool.to_dict()))
+    for field_name in list(new["P6"])[: changes * 5 : 5]:
+        new["P6"][field_name] += 1
+    return measure(lambda: diff_pool_data(pool.data, new), repeat)
+
+
+def bench_transport_latency(
+    samples: int = 200, latency: float = 0.0
+) -> dict[str, dict[str, float]]:
+    """Compares latency of reading pool data over WebSocket and local Modbus TCP
+
+    Both transports are served locally (`MockServer` and pymodbus server), so the WebSocket
+    path does not include the cloud round-trip, which can be simulated with `latency`.
+
+    Args:
+        samples (int, optional): Number of reads. Defaults to 200.
+        latency (float, optional): WebSocket server response delay. Defaults to 0.0.
+
+    Returns:
+        dict[str, dict[str, float]]: Latency percentiles of both transports
+    """
+
+    async def run() -> dict[str, dict[str, float]]:
+        registers = {block.address: [0] * block.count for block in DEFAULT_REGISTER_MAP}
+        modbus_server, port = await start_modbus_server(registers)
+        devices = {BENCH_DEVID.format(0): sample_pool_data()}
+        try:
+            async with MockServer(devices, latency=latency) as server:
+                async with Connection("bench", "bench", host=server.url) as conn:
+                    await conn.connect()
+                    websocket = await async_measure_latency(conn.async_get_all_pool_data, samples)
+            async with ModbusConnection("127.0.0.1", port=port) as conn:
+                await conn.connect()
+                modbus = await async_measure_latency(conn.async_read_pool_data, samples)
+        finally:
+            await modbus_server.shutdown()
+        return {"websocket": percentiles(websocket), "modbus": percentiles(modbus)}
+
+    return asyncio.run(run())
+
+
+def bench_register_decoding(blocks: int = 100, repeat: int = 20) -> dict[str, dict[str, float]]:
+    """Compares decoding register blocks one register at a time and in bulk
+
+    Args:
+        blocks (int, optional): Number of 120 registers blocks. Defaults to 100.
+        repeat (int, optional): Number of runs. Defaults to 20.
+
+    Returns:
+        dict[str, dict[str, float]]: Per register and bulk decoding timings
+    """
+    block = RegisterBlock(0x100, 120, pool=4, scale=0.1, byteswap=True)
+    registers = [list(range(no, no + block.count)) for no in range(blocks)]
+    return {
+        "per_register": measure(
+            lambda: [[block.decode(register) for register in regs] for regs in registers], repeat
+        ),
+        "bulk": measure(lambda: [block.decode_many(regs) for regs in registers], repeat),
+    }
+
+
+def bench_push_burst(pushes: int = 5000, handler_cost: float = 0.0001) -> dict[str, Any]:
+    """Measures processing of a burst of `poolDataChanged` pushes
+
+    Args:
+        pushes (int, optional): Number of pushes in the burst. Defaults to 5000.
+        handler_cost (float, optional): Busy time of the push listener. Defaults to 0.0001.
+
+    Returns:
+        dict[str, Any]: Burst send and processing times and processing queue statistics
+    """
+    devid = BENCH_DEVID.format(0)
+
+    def handler(_wrkfnc) -> None:
+        end = time.perf_counter() + handler_cost
+        while time.perf_counter() < end:
+            pass
+
+    async def run() -> dict[str, Any]:
+        async with MockServer({devid: sample_pool_data(devid)}) as server:
+            async with Connection("bench", "bench", host=server.url) as conn:
+                await conn.connect()
+                conn.add_listener("poolDataChanged", handler)
+                stats = conn.queue_stats
+                expected = stats.processed + pushes
+                change = [{"pool": "P4", "field": "v0", "value": 1}]
+                start = time.perf_counter()
+                for _ in range(pushes):
+                    await server.push("poolDataChanged", [change, devid])
+                sent = time.perf_counter() - start
+                while conn.queue_stats.processed < expected:
+                    await asyncio.sleep(0.001)
+                processed = time.perf_counter() - start
+                return {"sent": sent, "processed": processed, "queue": asdict(conn.queue_stats)}
+
+    return asyncio.run(run())
+
+
+class InlineExecutor(Executor):
+    """Executor running functions immediately in the calling thread (no offloading)"""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:  # pylint: disable=arguments-differ
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exception:  # pylint: disable=broad-except
+            future.set_exception(exception)
+        return future
+
+
+def bench_loop_stall(
+    snapshots: int = 100, interval: float = 0.001, pool_data: Optional[dict[str, Any]] = None
+) -> dict[str, dict[str, float]]:
+    """Compares event loop stalls while many pool snapshots are requested and decoded at once
+
+    Snapshots are decoded in the event loop thread (inline) or in the default thread pool
+    executor (offloaded). Stall is how late a timer set to `interval` fires.
+
+    Args:
+        snapshots (int, optional): Number of concurrently created devices. Defaults to 100.
+        interval (float, optional): Probing timer interval. Defaults to 0.001.
+        pool_data (Optional[dict[str, Any]], optional): Pool data, eg. `parametry.json`,
+            None for `sample_pool_data`. Defaults to None.
+
+    Returns:
+        dict[str, dict[str, float]]: Stall percentiles and total time of both modes
+    """
+    devid = BENCH_DEVID.format(0)
+    pool_data = pool_data if pool_data is not None else sample_pool_data(devid)
+
+    async def probe(stalls: list[float], stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            stalls.append(time.perf_counter() - start - interval)
+
+    async def run(executor: Optional[Executor]) -> dict[str, float]:
+        async with MockServer({devid: pool_data}) as server:
+            async with Connection("bench", "bench", host=server.url, executor=executor) as conn:
+                await conn.connect()
+                stalls: list[float] = []
+                stop = asyncio.Event()
+                prober = asyncio.create_task(probe(stalls, stop))
+                devices = [
+                    Device(conn, DeviceInfo(**sample_device_info(devid))) for _ in range(snapshots)
+                ]
+                start = time.perf_counter()
+                await asyncio.gather(*(device.create() for device in devices))
+                total = time.perf_counter() - start
+                stop.set()
+                await prober
+        return {**percentiles(stalls), "total": total}
+
+    return {
+        "inline": asyncio.run(run(InlineExecutor())),
+        "offloaded": asyncio.run(run(None)),
+    }
+
+
+def bench_write_latency(
+    samples: int = 100, background: int = 32, latency: float = 0.005
+) -> dict[str, dict[str, float]]:
+    """Measures pool parameter write latency under background `s_getAllPoolData` load
+
+    Writes are sent with INTERACTIVE priority (prioritized) or with the same priority as the
+    background requests (FIFO).
+
+    Args:
+        samples (int, optional): Number of writes. Defaults to 100.
+        background (int, optional): Number of tasks requesting pool data in a loop.
+            Defaults to 32.
+        latency (float, optional): Mock server response delay. Defaults to 0.005.
+
+    Returns:
+        dict[str, dict[str, float]]: Write latency percentiles of both modes
+    """
+    devid = BENCH_DEVID.format(0)
+
+    async def load(conn: Connection, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            await conn.async_get_all_pool_data(Priority.BACKGROUND)
+
+    async def run(priority: Priority) -> dict[str, float]:
+        async with MockServer({devid: sample_pool_data(devid)}, latency=latency) as server:
+            async with Connection("bench", "bench", host=server.url) as conn:
+                await conn.connect()
+                stop = asyncio.Event()
+                loaders = [asyncio.create_task(load(conn, stop)) for _ in range(background)]
+                await asyncio.sleep(latency * 4)
+                writes = await async_measure_latency(
+                    lambda: conn.async_request("s_setPoolParam", [4, 0, 1], priority=priority),
+                    samples,
+                )
+                stop.set()
+                await asyncio.gather(*loaders)
+        return percentiles(writes)
+
+    return {
+        "fifo": asyncio.run(run(Priority.BACKGROUND)),
+        "prioritized": asyncio.run(run(Priority.INTERACTIVE)),
+    }
+
+
+def bench_subscription_fanout(
+    pushes: int = 10000, fields: int = 50, subscribed: int = 5, deadband: float = 1.0
+) -> dict[str, dict[str, float]]:
+    """Compares naive fan-out and deadband subscriptions notifying pool changes
+
+    Every push changes one of `fields` P4 temperatures by +-0.5. Naive fan-out calls every
+    listener (one per subscribed parameter) for every push, subscriptions are notified only
+    of their parameters changed by at least `deadband`.
+
+    Args:
+        pushes (int, optional): Number of pushes. Defaults to 10000.
+        fields (int, optional): Number of jittering fields. Defaults to 50.
+        subscribed (int, optional): Number of subscribed fields. Defaults to 5.
+        deadband (float, optional): Subscriptions deadband. Defaults to 1.0.
+
+    Returns:
+        dict[str, dict[str, float]]: Delivered notifications and total time of both approaches
+    """
+    devid = BENCH_DEVID.format(0)
+    numbers = sorted(Pool(init_data=sample_pool_data()).data[4])[:fields]
+
+    def run(notify: Callable[[list[tuple[int, int, str]], PoolValueType], None]) -> float:
+        pool = Pool(init_data=sample_pool_data())
+        start = time.perf_counter()
+        for no in range(pushes):
+            field_no = numbers[no % len(numbers)]
+            value = pool.data[4][field_no]["v"] + (0.5 if no // len(numbers) % 2 else -0.5)
+            changed = pool.update([{"pool": "P4", "field": f"v{field_no}", "value": value}])
+            notify(changed, pool.value)
+        return time.perf_counter() - start
+
+    delivered: list[ValueType] = []
+    listeners = [
+        lambda _changed, values, field_no=field_no: delivered.append(values[4][field_no])
+        for field_no in numbers[:subscribed]
+    ]
+
+    def fan_out(changed: list[tuple[int, int, str]], values: PoolValueType) -> None:
+        for listener in listeners:
+            listener(changed, values)
+
+    naive = run(fan_out)
+    index = SubscriptionIndex()
+    for field_no in numbers[:subscribed]:
+        index.subscribe(devid, 4, field_no, lambda *_args: None, deadband)
+    subscriptions = run(lambda changed, values: index.notify(devid, changed, values))
+    return {
+        "naive": {"delivered": len(delivered), "total": naive},
+        "subscriptions": {"delivered": index.delivered, "total": subscriptions},
+    }
+
+
+def bench_sync_throughput(
+    threads: tuple[int, ...] = (1, 4, 16, 64),
+    accounts: int = 4,
+    requests: int = 2000,
+    latency: float = 0.001,
+) -> dict[int, dict[str, float]]:
+    """Measures blocking requests throughput of caller threads sharing one loop thread
+
+    Caller threads send `s_getTaskQueue` requests through `SyncGateway`s of `accounts`
+    connections (round robin), all served by one loop thread.
+
+    Args:
+        threads (tuple[int, ...], optional): Numbers of caller threads.
+            Defaults to (1, 4, 16, 64).
+        accounts (int, optional): Number of gateways (connections). Defaults to 4.
+        requests (int, optional): Number of requests of every run. Defaults to 2000.
+        latency (float, optional): Mock server response delay. Defaults to 0.001.
+
+    Returns:
+        dict[int, dict[str, float]]: Requests per second and latency percentiles by number
+            of caller threads
+    """
+    devid = BENCH_DEVID.format(0)
+    results: dict[int, dict[str, float]] = {}
+    with LoopThread("bench") as loop_thread:
+        server = MockServer({devid: sample_pool_data(devid)}, latency=latency)
+        url = loop_thread.run(server.start())
+        gateways = [
+            SyncGateway("bench", "bench", loop_thread, host=url).connect()
+            for _ in range(accounts)
+        ]
+
+        def request(no: int) -> float:
+            start = time.perf_counter()
+            gateways[no % accounts].request("s_getTaskQueue")
+            return time.perf_counter() - start
+
+        for count in threads:
+            with ThreadPoolExecutor(count) as executor:
+                start = time.perf_counter()
+                samples = list(executor.map(request, range(requests)))
+                total = time.perf_counter() - start
+            results[count] = {"rps": requests / total, **percentiles(samples)}
+
+        for gateway in gateways:
+            gateway.close()
+        loop_thread.run(server.stop())
+    return results
+
+
+BURST_MARKER = 9999  # P4.v0 value of the last push of burst
+
+
+def _serve_burst(devids: list[str], pushes: int, changes: int, pipe: Any) -> None:
+    """Mock server process sending url, then burst of pushes on every received command"""
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        devices = {devid: sample_pool_data(devid) for devid in devids}
+        names = sorted(name for name in devices[devids[0]]["P4"] if name[0] == "v")
+        names.remove("v0")  # marker
+        pushes_args = [
+            [
+                [
+                    {"pool": "P4", "field": names[(no + i) % len(names)], "value": no % 90}
+                    for i in range(changes)
+                ],
+                devids[no % len(devids)],
+            ]
+            for no in range(pushes)
+        ]
+        marker = [{"pool": "P4", "field": "v0", "value": BURST_MARKER}]
+        pushes_args.extend([marker, devid] for devid in devids)
+        frames = [  # encoded once, the server should not be the bottleneck
+            json.dumps(
+                {
+                    "wrkfnc": True,
+                    "type": MessageType.PROCEDURE_EXEC,
+                    "name": "poolDataChanged",
+                    "args": args,
+                }
+            )
+            for args in pushes_args
+        ]
+        async with MockServer(devices) as server:
+            pipe.send(server.url)
+            while await loop.run_in_executor(None, pipe.recv):
+                for frame in frames:
+                    for client in list(server.clients):
+                        await client.send_str(frame)
+                pipe.send(True)
+
+    asyncio.run(run())
+
+
+def bench_sharded_gateway(
+    workers: tuple[int, ...] = (1, 2, 4),
+    accounts: int = 8,
+    devices: int = 4,
+    pushes: int = 2000,
+    changes: int = 50,
+) -> dict[int, dict[str, float]]:
+    """Measures pool changes throughput of sharded gateway with growing number of workers
+
+    Every account has its own mock server process, sending `pushes` pushes of `changes` P4
+    changes spread over `devices` devices. Time is measured until the coordinator received
+    the last change of all devices.
+
+    Args:
+        workers (tuple[int, ...], optional): Numbers of worker processes.
+            Defaults to (1, 2, 4).
+        accounts (int, optional): Number of accounts. Defaults to 8.
+        devices (int, optional): Number of devices of every account. Defaults to 4.
+        pushes (int, optional): Number of pushes of every account. Defaults to 2000.
+        changes (int, optional): Number of changes of every push. Defaults to 50.
+
+    Returns:
+        dict[int, dict[str, float]]: Time and changes per second by number of workers
+    """
+    context = multiprocessing.get_context("spawn")
+    servers = []
+    for account_no in range(accounts):
+        devids = [BENCH_DEVID.format(account_no * devices + no) for no in range(devices)]
+        parent, child = context.Pipe()
+        process = context.Process(
+            target=_serve_burst, args=(devids, pushes, changes, child), daemon=True
+        )
+        process.start()
+        servers.append((process, parent))
+    results: dict[int, dict[str, float]] = {}
+    try:
+        urls = [pipe.recv() for _, pipe in servers]
+        for count in workers:
+            with ShardedGateway(
+                [Account("bench", "bench", {"host": url}) for url in urls], count, context="spawn"
+            ) as gateway:
+                total = accounts * devices
+                if not gateway.wait(lambda: len(gateway.values) == total, timeout=120):
+                    raise RuntimeError(f"Devices not received: {gateway.errors}")
+                start = time.perf_counter()
+                for _, pipe in servers:
+                    pipe.send(True)
+                gateway.wait(
+                    lambda: all(
+                        values[4][0] == BURST_MARKER for values in gateway.values.values()
+                    ),
+                    timeout=600,
+                )
+                elapsed = time.perf_counter() - start
+                for _, pipe in servers:
+                    pipe.recv()
+            results[count] = {
+                "time": elapsed,
+                "changes_per_s": accounts * pushes * changes / elapsed,
+            }
+    finally:
+        for process, pipe in servers:
+            pipe.send(False)
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+    return results
+
+
+def measure_per_call(func: Callable[[], Any], number: int, repeat: int = 5) -> dict[str, float]:
+    """Measures time of one call of fast function, called `number` times in every run
+
+    Args:
+        func (Callable[[], Any]): Measured function
+        number (int): Calls in every run
+        repeat (int, optional): Number of runs. Defaults to 5.
+
+    Returns:
+        dict[str, float]: Minimum and mean time of one call in seconds
+    """
+    timings = measure(lambda: [func() for _ in range(number)], repeat)
+    return {key: value / number for key, value in timings.items()}
+
+
+def bench_message_parsing(
+    number: int = 1000, repeat: int = 5, pool_data: Optional[dict[str, Any]] = None
+) -> dict[str, dict[str, float]]:
+    """Measures `Message.from_text` of `poolDataChanged` push and `s_getAllPoolData` response
+
+    Args:
+        number (int, optional): Parsed frames in every run. Defaults to 1000.
+        repeat (int, optional): Number of runs. Defaults to 5.
+        pool_data (Optional[dict[str, Any]], optional): Pool data, None for
+            `sample_pool_data`. Defaults to None.
+
+    Returns:
+        dict[str, dict[str, float]]: Parsing time of one frame
+    """
+    pool_data = pool_data if pool_data is not None else sample_pool_data()
+    changes = [{"pool": "P4", "field": f"v{no}", "value": no} for no in range(10)]
+    push = json.dumps(
+        {
+            "wrkfnc": True,
+            "type": MessageType.PROCEDURE_EXEC,
+            "name": "poolDataChanged",
+            "args": [changes, BENCH_DEVID.format(0)],
+        }
+    )
+    response = json.dumps({"wrkfnc": True, "type": 12, "nr": 1, "resp": pool_data})
+    return {
+        "push": measure_per_call(lambda: Message.from_text(push), number, repeat),
+        "pool_data": measure_per_call(
+            lambda: Message.from_text(response), max(1, number // 100), repeat
+        ),
+    }
+
+
+def bench_pool_construction(
+    number: int = 20, repeat: int = 5, pool_data: Optional[dict[str, Any]] = None
+) -> dict[str, float]:
+    """Measures `Pool` construction from `s_getAllPoolData` response
+
+    Args:
+        number (int, optional): Created pools in every run. Defaults to 20.
+        repeat (int, optional): Number of runs. Defaults to 5.
+        pool_data (Optional[dict[str, Any]], optional): Pool data, eg. `parametry.json`,
+            None for `sample_pool_data`. Defaults to None.
+
+    Returns:
+        dict[str, float]: Construction time of one pool
+    """
+    pool_data = pool_data if pool_data is not None else sample_pool_data()
+    return measure_per_call(lambda: Pool(init_data=pool_data), number, repeat)
+
+
+def bench_delta_application(
+    changes: int = 10, number: int = 1000, repeat: int = 5
+) -> dict[str, float]:
+    """Measures `Pool.update` with `poolDataChanged` changes of P4 values
+
+    Args:
+        changes (int, optional): Changes in every update. Defaults to 10.
+        number (int, optional): Updates in every run. Defaults to 1000.
+        repeat (int, optional): Number of runs. Defaults to 5.
+
+    Returns:
+        dict[str, float]: Time of one update
+    """
+    pool = Pool(init_data=sample_pool_data())
+    numbers = sorted(pool.data[4])
+    deltas = [
+        [
+            {"pool": "P4", "field": f"v{numbers[(no + i) % len(numbers)]}", "value": no % 90}
+            for i in range(changes)
+        ]
+        for no in range(number)
+    ]
+    delta = cycle(deltas)
+    return measure_per_call(lambda: pool.update(next(delta)), number, repeat)
+
+
+def bench_update_devices(
+    devices: tuple[int, ...] = (10, 100), repeat: int = 3
+) -> dict[str, dict[str, float]]:
+    """Measures `Gateway.async_update_devices` creating all devices from the mock server
+
+    Args:
+        devices (tuple[int, ...], optional): Numbers of devices. Defaults to (10, 100).
+        repeat (int, optional): Number of runs (new gateway every run). Defaults to 3.
+
+    Returns:
+        dict[str, dict[str, float]]: Update time by number of devices
+    """
+
+    async def run(count: int) -> dict[str, float]:
+        devids = [BENCH_DEVID.format(no) for no in range(count)]
+        pools = {devid: sample_pool_data(devid) for devid in devids}
+        times = []
+        async with MockServer(pools) as server:
+            for _ in range(repeat):
+                async with Gateway(Connection("bench", "bench", host=server.url)) as gateway:
+                    start = time.perf_counter()
+                    await gateway.async_update_devices()
+                    times.append(time.perf_counter() - start)
+        return {"min": min(times), "mean": sum(times) / len(times)}
+
+    return {str(count): asyncio.run(run(count)) for count in devices}
+
+
+def bench_round_trip(
+    requests: int = 2000, concurrency: tuple[int, ...] = (1, 16), latency: float = 0.0
+) -> dict[str, dict[str, float]]:
+    """Measures requests throughput against the mock server
+
+    Args:
+        requests (int, optional): Number of `s_getTaskQueue` requests. Defaults to 2000.
+        concurrency (tuple[int, ...], optional): Numbers of concurrent requesting tasks.
+            Defaults to (1, 16).
+        latency (float, optional): Mock server response delay. Defaults to 0.0.
+
+    Returns:
+        dict[str, dict[str, float]]: Requests per second and latency percentiles by
+            concurrency
+    """
+
+    async def run(tasks: int) -> dict[str, float]:
+        devid = BENCH_DEVID.format(0)
+        async with MockServer({devid: sample_pool_data(devid)}, latency=latency) as server:
+            async with Connection("bench", "bench", host=server.url) as conn:
+                await conn.connect()
+                start = time.perf_counter()
+                samples = await asyncio.gather(
+                    *(
+                        async_measure_latency(
+                            lambda: conn.async_request("s_getTaskQueue"), requests // tasks
+                        )
+                        for _ in range(tasks)
+                    )
+                )
+                total = time.perf_counter() - start
+        latencies = [sample for task_samples in samples for sample in task_samples]
+        return {"rps": len(latencies) / total, **percentiles(latencies)}
+
+    return {str(tasks): asyncio.run(run(tasks)) for tasks in concurrency}
+
+
+# Hot paths benchmarks suite, with parameters of quick run
+SUITE: dict[str, tuple[Callable[..., Any], dict[str, Any]]] = {
+    "message_parsing": (bench_message_parsing, {"number": 100, "repeat": 2}),
+    "pool_construction": (bench_pool_construction, {"number": 2, "repeat": 2}),
+    "delta_application": (bench_delta_application, {"number": 100, "repeat": 2}),
+    "update_devices": (bench_update_devices, {"devices": (5,), "repeat": 1}),
+    "round_trip": (bench_round_trip, {"requests": 100, "concurrency": (1, 4)}),
+}
+# Compared metrics, "rps" is higher-is-better, other are times
+COMPARED_METRICS = ("min", "p50", "rps")
+
+
+def run_suite(
+    names: Optional[list[str]] = None,
+    quick: bool = False,
+    pool_data: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """Runs hot paths benchmarks
+
+    Args:
+        names (Optional[list[str]], optional): Benchmarks names, None for whole SUITE.
+            Defaults to None.
+        quick (bool, optional): Run with small parameters, eg. in tests. Defaults to False.
+        pool_data (Optional[dict[str, Any]], optional): Pool data used by parsing and
+            construction benchmarks, eg. `parametry.json`. Defaults to None.
+
+    Raises:
+        KeyError: When benchmark name is not known
+
+    Returns:
+        dict[str, Any]: Results by benchmark name and run metadata in "meta"
+    """
+    results: dict[str, Any] = {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.time(),
+            "quick": quick,
+        }
+    }
+    for name in names or SUITE:
+        func, quick_kwargs = SUITE[name]
+        kwargs = dict(quick_kwargs) if quick else {}
+        if pool_data is not None and name in ("message_parsing", "pool_construction"):
+            kwargs["pool_data"] = pool_data
+        results[name] = func(**kwargs)
+    return results
+
+
+def flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """Returns numeric results by dotted path, eg. "round_trip.16.rps", without metadata"""
+    flat: dict[str, float] = {}
+    for key, value in results.items():
+        if not prefix and key == "meta":
+            continue
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+@dataclass
+class Regression:
+    """Benchmark metric worse than baseline"""
+
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """Returns relative change of the metric value, positive is worse."""
+        if self.name.endswith(".rps"):
+            return self.baseline / self.current - 1 if self.current else float("inf")
+        return self.current / self.baseline - 1 if self.baseline else float("inf")
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float = 0.2
+) -> list[Regression]:
+    """Returns metrics worse than baseline by more than threshold
+
+    Only COMPARED_METRICS present in both results are compared.
+
+    Args:
+        baseline (dict[str, Any]): Baseline results, as returned by `run_suite`
+        current (dict[str, Any]): Current results
+        threshold (float, optional): Allowed relative change. Defaults to 0.2.
+
+    Returns:
+        list[Regression]: Regressions, worst first
+    """
+    old, new = flatten(baseline), flatten(current)
+    regressions = [
+        Regression(name, old[name], new[name])
+        for name in sorted(old.keys() & new.keys())
+        if name.rsplit(".", 1)[-1] in COMPARED_METRICS
+    ]
+    regressions = [regression for regression in regressions if regression.change > threshold]
+    return sorted(regressions, key=lambda regression: regression.change, reverse=True)
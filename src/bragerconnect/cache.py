@@ -0,0 +1,185 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Local snapshot cache and server responses cache
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import struct
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Hashable, Optional, Union
+
+from .const import LOGGER, RESPONSE_CACHE_SIZE
+
+# File layout: header, device pool blobs (JSON), index (JSON) with device info and blob positions
+CACHE_MAGIC = b"BRGC"
+CACHE_FORMAT = 1
+CACHE_HEADER = struct.Struct("<4sHxxQQ")  # magic, format, index offset, index length
+ACCOUNT_NAME_RE = re.compile(r"[^\w.-]")
+
+
+@dataclass
+class Snapshot:
+    """Last known state of the account devices"""
+
+    catalog: str
+    saved: float = field(default_factory=time.time)
+    devices: dict[str, dict[str, Any]] = field(default_factory=dict)  # devid -> device info
+    # devid -> pool data, JSON encoded when loaded from file (decoded by consumer on demand)
+    pools: dict[str, Union[dict[str, Any], bytes]] = field(default_factory=dict)
+
+
+class SnapshotCache:
+    """One file cache of account devices list and pool data"""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """One file cache of account devices list and pool data
+
+        Args:
+            path (Union[str, Path]): Cache file path
+        """
+        self.path = Path(path)
+
+    @classmethod
+    def for_account(cls, directory: Union[str, Path], username: str) -> SnapshotCache:
+        """Creates cache stored in `directory`, in file named after the account
+
+        Args:
+            directory (Union[str, Path]): Cache directory
+            username (str): Account username
+
+        Returns:
+            SnapshotCache: The SnapshotCache object
+        """
+        return cls(Path(directory) / f"{ACCOUNT_NAME_RE.sub('_', username)}.bcache")
+
+    def load(self) -> Optional[Snapshot]:
+        """Reads snapshot from the cache file
+
+        Returns:
+            Optional[Snapshot]: Stored snapshot, None if file does not exist or is not valid
+        """
+        try:
+            with open(self.path, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as buffer:
+                magic, version, index_offset, index_length = CACHE_HEADER.unpack_from(buffer)
+                if magic != CACHE_MAGIC or version != CACHE_FORMAT:
+                    LOGGER.warning("Cache file %s has unknown format, ignoring.", self.path)
+                    return None
+                index = json.loads(buffer[index_offset : index_offset + index_length])
+                snapshot = Snapshot(index["catalog"], index["saved"])
+                for devid, (info, offset, length) in index["devices"].items():
+                    snapshot.devices[devid] = info
+                    if length:
+                        snapshot.pools[devid] = buffer[offset : offset + length]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, struct.error) as exception:
+            LOGGER.warning("Could not read cache file %s (%s), ignoring.", self.path, exception)
+            return None
+
+        LOGGER.debug("Loaded %s devices from cache %s.", len(snapshot.devices), self.path)
+        return snapshot
+
+    def save(self, snapshot: Snapshot) -> None:
+        """Writes snapshot to the cache file, replacing it atomically
+
+        Args:
+            snapshot (Snapshot): Snapshot to store
+        """
+        index = {"catalog": snapshot.catalog, "saved": snapshot.saved, "devices": {}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f"{self.path.suffix}.tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(b"\0" * CACHE_HEADER.size)
+            for devid, info in snapshot.devices.items():
+                offset, length = file.tell(), 0
+                if (pool := snapshot.pools.get(devid)) is not None:
+                    if not isinstance(pool, bytes):
+                        pool = json.dumps(pool, separators=(",", ":")).encode()
+                    length = file.write(pool)
+                index["devices"][devid] = (info, offset, length)
+            index_offset = file.tell()
+            index_length = file.write(json.dumps(index, separators=(",", ":")).encode())
+            file.seek(0)
+            file.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_FORMAT, index_offset, index_length))
+        os.replace(tmp_path, self.path)
+        LOGGER.debug("Saved %s devices to cache %s.", len(snapshot.devices), self.path)
+
+
+class ResponseCache:
+    """In memory cache of server responses with per entry TTL and LRU eviction
+
+    Keys are tuples starting with the request name, so all responses of a request can be
+    invalidated at once. Responses are copied when stored and returned, so callers changing
+    them do not change the cached ones.
+    """
+
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE) -> None:
+        """In memory cache of server responses with per entry TTL and LRU eviction
+
+        Args:
+            size (int, optional): Maximum number of entries. Defaults to RESPONSE_CACHE_SIZE.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[Hashable, ...], tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[Hashable, ...], default: Any = None) -> Any:
+        """Returns cached response
+
+        Args:
+            key (tuple[Hashable, ...]): Entry key, eg. `("s_getUserVariable", "lang")`
+            default (Any, optional): Returned when entry is missing or expired. Defaults to None.
+
+        Returns:
+            Any: Copy of cached response
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return deepcopy(entry[1])
+
+    def set(self, key: tuple[Hashable, ...], value: Any, ttl: float) -> None:
+        """Stores response, evicting the least recently used entry when cache is full
+
+        Args:
+            key (tuple[Hashable, ...]): Entry key
+            value (Any): Response
+            ttl (float): Seconds the response is valid
+        """
+        self._entries[key] = (time.monotonic() + ttl, deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, name: str) -> None:
+        """Removes all responses of the request
+
+        Args:
+            name (str): Request name
+        """
+        for key in [key for key in self._entries if key[0] == name]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        """Removes all responses"""
+        self._entries.clear()
@@ -1,13 +1,141 @@
 """Console script for bragerconnect."""
+import asyncio
+import json
+import logging
 import sys
+
 import click
 
+from .bench import SUITE, compare_results, run_suite
+from .const import HOST, LOGGER, MONITOR_BUFFER_SIZE, MONITOR_FLUSH_INTERVAL
+from .monitor import async_monitor
+
+
+def parse_account(_ctx, _param, values):
+    """Splits USERNAME:PASSWORD accounts"""
+    accounts = []
+    for value in values:
+        username, sep, password = value.partition(":")
+        if not sep or not username:
+            raise click.BadParameter(f"expected USERNAME:PASSWORD, got {value!r}")
+        accounts.append((username, password))
+    return accounts
 
-@click.command()
-def main(args=None):
+
+@click.group()
+@click.option("-v", "--verbose", is_flag=True, help="Log debug messages to stderr.")
+def main(verbose):
     """Console script for bragerconnect."""
-    click.echo("Replace this message by putting your code into " "bragerconnect.cli.main")
-    click.echo("See click documentation at https://click.palletsprojects.com/")
+    logging.basicConfig(stream=sys.stderr)
+    LOGGER.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+
+@main.command()
+@click.option(
+    "-a",
+    "--account",
+    "accounts",
+    multiple=True,
+    required=True,
+    callback=parse_account,
+    envvar="BRAGERCONNECT_ACCOUNT",
+    help="USERNAME:PASSWORD of monitored account, can be repeated.",
+)
+@click.option("--host", default=HOST, show_default=True, help="WebSocket server URL.")
+@click.option("-d", "--device", "devices", multiple=True, help="Monitored device ID.")
+@click.option("-p", "--pool", "pools", multiple=True, type=int, help="Monitored pool number.")
+@click.option("-f", "--field", "fields", multiple=True, type=int, help="Monitored field number.")
+@click.option("--duration", type=float, help="Seconds to monitor, until interrupted if not set.")
+@click.option(
+    "--buffer-size",
+    type=int,
+    default=MONITOR_BUFFER_SIZE,
+    show_default=True,
+    help="Buffered output characters written at once.",
+)
+@click.option(
+    "--flush-interval",
+    type=float,
+    default=MONITOR_FLUSH_INTERVAL,
+    show_default=True,
+    help="Longest time event is buffered in seconds.",
+)
+def monitor(accounts, host, devices, pools, fields, duration, buffer_size, flush_interval):
+    """Streams pool changes, alarms and task events as newline-delimited JSON.
+
+    Filters of the same kind are alternatives, different kinds must all match.
+    """
+    try:
+        asyncio.run(
+            async_monitor(
+                accounts,
+                sys.stdout,
+                host,
+                devices,
+                pools,
+                fields,
+                duration,
+                buffer_size,
+                flush_interval,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+@main.command()
+@click.option(
+    "-b",
+    "--only",
+    "names",
+    multiple=True,
+    type=click.Choice(list(SUITE)),
+    help="Run only this benchmark, can be repeated.",
+)
+@click.option("--quick", is_flag=True, help="Run with small parameters (smoke test).")
+@click.option(
+    "--pool-data",
+    type=click.File("r", encoding="utf-8"),
+    help="s_getAllPoolData response (eg. parametry.json) used for parsing and construction.",
+)
+@click.option("-o", "--output", type=click.Path(dir_okay=False), help="Save results as JSON.")
+@click.option(
+    "-c",
+    "--compare",
+    "baseline",
+    type=click.File("r", encoding="utf-8"),
+    help="Baseline results JSON, exits with code 1 on regressions.",
+)
+@click.option(
+    "--threshold",
+    type=float,
+    default=0.2,
+    show_default=True,
+    help="Allowed relative slowdown against baseline.",
+)
+def bench(names, quick, pool_data, output, baseline, threshold):
+    """Runs hot paths benchmarks and compares them with baseline results."""
+    results = run_suite(
+        list(names) or None, quick, json.load(pool_data) if pool_data is not None else None
+    )
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as file:
+            file.write(text)
+    click.echo(text)
+    if baseline is None:
+        return 0
+    regressions = compare_results(json.load(baseline), results, threshold)
+    for regression in regressions:
+        click.echo(
+            f"REGRESSION {regression.name}: {regression.baseline:.6g} -> "
+            f"{regression.current:.6g} ({regression.change:+.0%})",
+            err=True,
+        )
+    if regressions:
+        sys.exit(1)
+    click.echo(f"No regressions above {threshold:.0%}.", err=True)
     return 0
 
 
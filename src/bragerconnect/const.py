@@ -11,6 +11,48 @@ from typing import Optional, Union
 HOST = "wss://cloud.bragerconnect.com"
 # HOST = "wss://sigma-dev.brager.dev"
 TIMEOUT = 10
+# Adaptive timeouts: RTT percentile * factor, bounded, after enough samples
+TIMEOUT_MIN = 1.0
+TIMEOUT_MAX = 30.0
+TIMEOUT_FACTOR = 3.0
+RTT_SAMPLES = 50
+RTT_MIN_SAMPLES = 5
+# Consecutive timed out requests after which connection is considered dead
+FAST_FAIL_TIMEOUTS = 3
+QUEUE_SIZE = 1000
+# Frames (characters) and pools (fields) at least that large are decoded in executor.
+# Calibrated with the real `s_getAllPoolData` response (materiały/parametry.json, ~9000
+# characters frame, 827 fields) against 100 us budget of event loop stall: parsing costs
+# ~0.02 us per character (0.19 ms for the frame), `Pool` construction ~0.75 us per field
+# (0.6 ms), executor round-trip ~45 us, so real snapshots are offloaded and small pushes
+# are not. Measured with `bench_message_parsing` and `bench_pool_construction`.
+OFFLOAD_SIZE = 4096
+OFFLOAD_FIELDS = 128
+# Requests sent and waiting for response, and longest wait before request is sent first
+MAX_IN_FLIGHT = 8
+MAX_SEND_WAIT = 1.0
+RESPONSE_CACHE_SIZE = 128
+# Operations (requests, messages processing) logged by SlowOperationLogger
+SLOW_OPERATION = 0.1
+
+# History samples kept for each tracked pool parameter (16 bytes per sample)
+HISTORY_SIZE = 1440
+# Streaming statistics rolling window and EWMA time constant (seconds)
+STATS_WINDOW = 3600.0
+STATS_TAU = 300.0
+
+# Sharded gateway: seconds pool changes are collected by worker before sending them
+DELTA_INTERVAL = 0.05
+# Sharded gateway: seconds before the first retry of failed account, doubled up to maximum
+ACCOUNT_RETRY = 1.0
+ACCOUNT_RETRY_MAX = 300.0
+# Shared memory publication: devices, parameter slots (16 bytes each), directory bytes
+SHARED_DEVICES = 256
+SHARED_SLOTS = 131072
+SHARED_DIRECTORY_SIZE = 2097152
+# Monitor output: characters written at once and longest time event is buffered (seconds)
+MONITOR_BUFFER_SIZE = 65536
+MONITOR_FLUSH_INTERVAL = 0.5
 
 
 # Logger
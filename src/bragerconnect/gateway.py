@@ -4,51 +4,310 @@ Python library to connect BragerConnect and Home Assistant to work together.
 BragerConnect gateway
 """
 from __future__ import annotations
-from typing import Any
+from dataclasses import asdict
+from typing import Any, Callable, Optional, Union
 
+from .aggregates import AggregateIndex, FleetAggregate
+from .cache import Snapshot, SnapshotCache
 from .websocket import Connection
 from .const import LOGGER
-from .models.device import Device, DeviceInfo
-from .models.websocket import JsonType
+from .shared import SharedPoolPublisher
+from .subscriptions import SubscriptionCallback, SubscriptionIndex
+from .tracing import Tracer
+from .models.device import Device, DeviceInfo, PendingWrite, catalog_version
+from .models.search import ParameterMatch, SearchIndex, get_search_index
+from .models.websocket import JsonType, RequestMessage, WorkerType
 
 
 class Gateway:
     """Main class handling data from BragerConnect service."""
 
-    def __init__(self, connection: Connection) -> None:
-        """Main class handling data from BragerConnect service."""
+    def __init__(
+        self,
+        connection: Connection,
+        cache: Optional[SnapshotCache] = None,
+        tracer: Optional[Tracer] = None,
+        lang: str = "pl",
+    ) -> None:
+        """Main class handling data from BragerConnect service.
+
+        Args:
+            connection (Connection): BragerConnect connection
+            cache (Optional[SnapshotCache], optional): Local snapshot cache. Defaults to None.
+            tracer (Optional[Tracer], optional): Tracer set on the connection, shared by
+                the connection, gateway and devices, None to keep connection tracer.
+                Defaults to None.
+            lang (str, optional): Units and pool names catalogs language of devices.
+                Defaults to "pl".
+        """
         self.conn = connection
+        if tracer is not None:
+            self.conn.tracer = tracer
+        self.cache = cache
+        self.lang = lang
         self.device: list[Device] = []
+        self._device_index: dict[str, Device] = {}
+        self._device_list: Optional[list[JsonType]] = None
+        self.subscriptions = SubscriptionIndex()
+        self.aggregates = AggregateIndex()
+        self.publisher: Optional[SharedPoolPublisher] = None
+        self._rollback_listeners: list[Callable[[Device, PendingWrite], None]] = []
+        self.conn.add_listener(WorkerType.POOL_DATA_CHANGED.value, self._on_pool_data_changed)
+        self.conn.add_listener(WorkerType.TASK_SUCCESS.value, self._on_task_success)
+        self.conn.add_listener(WorkerType.TASK_OVERWRITE.value, self._on_task_overwrite)
+
+    def get_device(self, devid: str) -> Optional[Device]:
+        """Returns device with given ID or None if it does not exist"""
+        return self._device_index.get(devid)
+
+    def _on_pool_data_changed(self, wrkfnc: RequestMessage) -> None:
+        """Applies `poolDataChanged` push to device pool"""
+        *data, devid = wrkfnc.args
+        data = data.pop()
+        device = self.get_device(devid)
+        if device is None or device.pool is None:
+            LOGGER.debug("Skipping %s pool data changes, device not created yet.", devid)
+            return
+        LOGGER.debug("Updating %s pool data... (data: %s)", devid, data)
+        with self.conn.tracer.span("pool.update", devid=devid, changes=len(data)):
+            changed = device.pool.update(data)
+        self._on_device_changed(device, changed)
+
+    def _on_device_changed(self, device: Device, changed: list[tuple[int, int, str]]) -> None:
+        """Notifies subscribers and aggregates about device pool changes"""
+        self.subscriptions.notify(device.info.devid, changed, device.pool.value)
+        self.aggregates.pool_changed(device, changed)
+        if self.publisher is not None:
+            self.publisher.pool_changed(device, changed)
+
+    def _on_task_success(self, wrkfnc: RequestMessage) -> None:
+        """Confirms local write of `taskSuccessConfirmation` push"""
+        task_id, devid = wrkfnc.args[:2]
+        if (device := self.get_device(devid)) is not None:
+            device.settle_task(task_id, True)
+
+    def _on_task_overwrite(self, wrkfnc: RequestMessage) -> None:
+        """Rolls back local write of `taskOverwriteConfimation` push"""
+        task_id, devid = wrkfnc.args[:2]
+        if (device := self.get_device(devid)) is not None:
+            device.settle_task(task_id, False)
+
+    def _on_rollback(self, device: Device, write: PendingWrite) -> None:
+        for callback in list(self._rollback_listeners):
+            try:
+                callback(device, write)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in rollback listener.")
+
+    def add_rollback_listener(
+        self, callback: Callable[[Device, PendingWrite], None]
+    ) -> Callable[[], None]:
+        """Adds listener of local writes rolled back, when the server rejected them
+
+        Args:
+            callback (Callable[[Device, PendingWrite], None]): Called with device and the write,
+                after the previous value is restored
+
+        Returns:
+            Callable[[], None]: Function removing the listener
+        """
+        self._rollback_listeners.append(callback)
+        return lambda: self._rollback_listeners.remove(callback)
+
+    def _add_device(self, device: Device) -> None:
+        device.on_change = self._on_device_changed
+        device.on_rollback = self._on_rollback
+        self.device.append(device)
+        self._device_index[device.info.devid] = device
+        self.aggregates.device_updated(device)
+        if self.publisher is not None:
+            self.publisher.device_updated(device)
+
+    def publish(self, publisher: Optional[SharedPoolPublisher]) -> None:
+        """Publishes pool values of all devices in shared memory from now on
+
+        Args:
+            publisher (Optional[SharedPoolPublisher]): Publisher, None to stop publishing
+        """
+        self.publisher = publisher
+        if publisher is not None:
+            for device in self.device:
+                publisher.device_updated(device)
+
+    def add_aggregate(self, aggregate: FleetAggregate) -> FleetAggregate:
+        """Registers fleet aggregate, updated with every device change from now on
+
+        Args:
+            aggregate (FleetAggregate): Aggregate
+
+        Returns:
+            FleetAggregate: Registered aggregate, computed from current devices
+        """
+        return self.aggregates.add(aggregate, self.device)
+
+    def remove_aggregate(self, aggregate: FleetAggregate) -> None:
+        """Unregisters fleet aggregate"""
+        self.aggregates.remove(aggregate)
+
+    def search_parameters(
+        self,
+        query: str = "",
+        pool_no: Optional[int] = None,
+        unit: Union[int, str, None] = None,
+        devid: Optional[str] = None,
+    ) -> list[ParameterMatch]:
+        """Finds pool parameters of all devices by name, pool and unit
+
+        Names are looked up in the language catalogs search index, then only matching
+        parameters of every device are checked.
+
+        Args:
+            query (str, optional): Name tokens (prefixes), eg. "temp cwu". Defaults to "".
+            pool_no (Optional[int], optional): Pool number. Defaults to None.
+            unit (Union[int, str, None], optional): Unit number or unit text, eg. "°C".
+                Defaults to None.
+            devid (Optional[str], optional): Device ID, None for all devices.
+                Defaults to None.
+
+        Returns:
+            list[ParameterMatch]: Parameters present in devices pools
+        """
+        devices = self.device if devid is None else [self.get_device(devid)]
+        matches = []
+        searches: dict[str, tuple[SearchIndex, set, Optional[set[int]]]] = {}
+        for device in devices:
+            if device is None or (pool := device.pool) is None:
+                continue
+            if pool.lang not in searches:
+                index = get_search_index(pool.lang)
+                units = {unit} if isinstance(unit, int) else None
+                if isinstance(unit, str):
+                    units = index.unit_ids(unit)
+                searches[pool.lang] = (index, index.search(query, pool_no), units)
+            index, keys, units = searches[pool.lang]
+            for key in keys:
+                values = pool.data.get(key[0], {}).get(key[1])
+                if values is None or (units is not None and values.get("u") not in units):
+                    continue
+                value = pool.value.get(key[0], {}).get(key[1])
+                matches.append(
+                    ParameterMatch(str(device), *key, index.names[key], value, values.get("u"))
+                )
+        return sorted(matches, key=lambda match: (match.devid, match.pool, match.field))
+
+    def subscribe(
+        self,
+        devid: str,
+        pool_no: int,
+        field_no: int,
+        callback: SubscriptionCallback,
+        deadband: float = 0.0,
+        percent: bool = False,
+        min_interval: float = 0.0,
+    ) -> Callable[[], None]:
+        """Subscribes device pool parameter value changes
+
+        Args:
+            devid (str): Device ID
+            pool_no (int): Pool number
+            field_no (int): Field number
+            callback (SubscriptionCallback): Called with device ID, pool, field and real value
+            deadband (float, optional): Minimum change of numeric value. Defaults to 0.0.
+            percent (bool, optional): Deadband is percent of the last value. Defaults to False.
+            min_interval (float, optional): Minimum seconds between notifications, the last
+                change is notified when interval ends. Defaults to 0.0.
+
+        Returns:
+            Callable[[], None]: Function removing the subscription
+        """
+        return self.subscriptions.subscribe(
+            devid, pool_no, field_no, callback, deadband, percent, min_interval
+        )
+
+    def load_cache(self) -> bool:
+        """Creates devices from local snapshot cache, without requesting the server
+
+        Devices created from cache are stale until refreshed by `async_update_devices`.
+        Snapshot saved with other version of units and pool names catalogs is discarded.
+
+        Returns:
+            bool: True if any device was loaded from cache
+        """
+        if self.cache is None or (snapshot := self.cache.load()) is None:
+            return False
+        if snapshot.catalog != catalog_version(self.lang):
+            LOGGER.debug("Discarding cache saved with %s catalogs.", snapshot.catalog)
+            return False
+
+        for devid, info in snapshot.devices.items():
+            if devid in self._device_index or devid not in snapshot.pools:
+                continue
+            device = Device(self.conn, DeviceInfo(**info), self.lang)
+            self._add_device(device.load(snapshot.pools[devid]))
+
+        LOGGER.debug("Loaded %s devices from cache.", len(snapshot.devices))
+        return bool(snapshot.devices)
+
+    def save_cache(self) -> None:
+        """Stores devices list and pool data in local snapshot cache"""
+        if self.cache is None:
+            return
+
+        snapshot = Snapshot(catalog_version(self.lang))
+        for device in self.device:
+            snapshot.devices[device.info.devid] = asdict(device.info)
+            if (pool_data := device.raw_pool_data) is not None:
+                snapshot.pools[device.info.devid] = pool_data
+        self.cache.save(snapshot)
 
     async def async_update_devices(self):
-        """Updates all devices from BragerConnect service."""
+        """Updates all devices from BragerConnect service.
+
+        Devices list is cached by the connection until it expires or server notifies about
+        its change, when it did not change and no device is stale nothing is done.
+        """
         actual_dev_list = await self.conn.async_get_device_id_list()
+        if actual_dev_list == self._device_list and not any(dev.stale for dev in self.device):
+            LOGGER.debug("Devices list not changed, skipping update.")
+            return
         actual_dev_id = {dev.get("devid") for dev in actual_dev_list}
         created_dev_id = {str(dev) for dev in self.device}
 
         # Remove not existing devices from self.device
-        remove_list = (dev for dev in created_dev_id.difference(actual_dev_id))
+        remove_list = created_dev_id.difference(actual_dev_id)
         for device in reversed(self.device):
             if str(device) in remove_list:
                 self.device.remove(device)
+                self._device_index.pop(str(device), None)
+                self.aggregates.device_removed(str(device))
+                if self.publisher is not None:
+                    self.publisher.device_removed(str(device))
 
         # Create or update devices
         for info in actual_dev_list:
             devid = info.get("devid")
             if devid in created_dev_id:
-                for device in self.device:
-                    if device.info.devid == devid:
-                        LOGGER.debug("Updating: %s", devid)
-                        # device.info = DeviceInfo.from_dict(info)
+                device = self._device_index[devid]
+                LOGGER.debug("Updating: %s", devid)
+                device.info = DeviceInfo(**info)
+                if device.stale:
+                    changed = await device.async_refresh()
+                    self.subscriptions.notify(devid, changed, device.pool.value)
+                    if self.publisher is not None:
+                        self.publisher.pool_changed(device, changed)
+                self.aggregates.device_updated(device)
             else:
                 LOGGER.debug("Creating device: %s", devid)
-                self.device.append(await Device(self.conn, DeviceInfo(**info)).create())
+                self._add_device(await Device(self.conn, DeviceInfo(**info), self.lang).create())
+
+        self._device_list = actual_dev_list
 
     async def __aenter__(self) -> Gateway:
         """Async enter.
         Returns:
             The Gateway object.
         """
+        self.load_cache()
         await self.conn.connect()
         return self
 
@@ -57,4 +316,5 @@ class Gateway:
         Args:
             _exc_info: Exec type.
         """
+        self.save_cache()
         await self.conn.close()
@@ -0,0 +1,252 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Local BragerConnect WebSocket server, used by tests and benchmarks
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+from itertools import count
+from typing import Any, Optional
+
+from aiohttp import WSMsgType, web
+
+from .const import LOGGER
+from .models.websocket import MessageType
+
+AUTH_ERROR = 2
+UNKNOWN_FUNCTION = 0
+
+
+class MockServer:
+    """Local BragerConnect WebSocket server
+
+    Implements the subset of BragerConnect functions used by `Connection`, pool parameter
+    writes are applied after `task_delay` and confirmed with the same pushes the real service
+    sends (`poolDataChanged`, `taskSuccessConfirmation`), or rejected with
+    `taskOverwriteConfimation` when `overwrite_tasks` is set.
+    """
+
+    def __init__(
+        self,
+        devices: Optional[dict[str, dict[str, Any]]] = None,
+        username: str = "bench",
+        password: str = "bench",
+        latency: float = 0.0,
+        task_delay: float = 0.0,
+    ) -> None:
+        """Local BragerConnect WebSocket server
+
+        Args:
+            devices (Optional[dict[str, dict[str, Any]]], optional): Pool data by device ID.
+                Defaults to None.
+            username (str, optional): Accepted username. Defaults to "bench".
+            password (str, optional): Accepted password. Defaults to "bench".
+            latency (float, optional): Delay of every response in seconds. Defaults to 0.0.
+            task_delay (float, optional): Delay of pool parameter writes, 0 confirms them
+                right after the response, in one burst. Defaults to 0.0.
+        """
+        self.devices = devices if devices is not None else {}
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.task_delay = task_delay
+        self.requests: dict[str, int] = {}
+        self.unanswered: set[str] = set()  # names of requests left without response
+        self.overwrite_tasks = False  # reject pool parameter writes
+        self.clients: set[web.WebSocketResponse] = set()
+        self._task_id = count(1)
+        self._tasks: set[asyncio.Task] = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts server
+
+        Args:
+            host (str, optional): Listening address. Defaults to "127.0.0.1".
+            port (int, optional): Listening port, 0 for random. Defaults to 0.
+
+        Returns:
+            str: WebSocket URL of the server
+        """
+        app = web.Application()
+        app.router.add_get("/", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        sock = socket.socket()
+        sock.bind((host, port))
+        site = web.SockSite(self._runner, sock)
+        await site.start()
+        self.url = f"ws://{host}:{sock.getsockname()[1]}"
+        LOGGER.debug("Mock server listening on %s.", self.url)
+        return self.url
+
+    async def stop(self) -> None:
+        """Stops server, closing all client connections"""
+        for client in list(self.clients):
+            await client.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def push(self, name: str, args: list[Any]) -> None:
+        """Sends request (push) to all connected clients
+
+        Args:
+            name (str): Request name, eg. `poolDataChanged`
+            args (list[Any]): Request arguments
+        """
+        message = json.dumps(
+            {"wrkfnc": True, "type": MessageType.PROCEDURE_EXEC, "name": name, "args": args}
+        )
+        for client in list(self.clients):
+            if not client.closed:
+                await client.send_str(message)
+
+    async def push_changes(self, devid: str, changes: list[dict[str, Any]]) -> None:
+        """Applies changes to device pool and sends `poolDataChanged` push
+
+        Args:
+            devid (str): Device ID
+            changes (list[dict[str, Any]]): Changes in `poolDataChanged` format
+        """
+        pool = self.devices[devid]
+        for change in changes:
+            pool.setdefault(change["pool"], {})[change["field"]] = change["value"]
+        await self.push("poolDataChanged", [changes, devid])
+
+    async def __aenter__(self) -> MockServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_exc_info: Any) -> None:
+        await self.stop()
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        client = web.WebSocketResponse()
+        await client.prepare(request)
+        self.clients.add(client)
+        state = {"devid": next(iter(self.devices), None), "logged_in": False}
+        tasks = set()
+        try:
+            ready = {"wrkfnc": True, "type": MessageType.READY_SIGNAL, "name": None, "args": None}
+            await client.send_json(ready)
+            async for message in client:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                request_msg = json.loads(message.data)
+                if request_msg.get("type") == MessageType.READY_SIGNAL:
+                    continue
+                task = asyncio.create_task(self._respond(client, state, request_msg))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            self.clients.discard(client)
+            for task in tasks:
+                task.cancel()
+        return client
+
+    async def _respond(
+        self, client: web.WebSocketResponse, state: dict[str, Any], request: dict[str, Any]
+    ) -> None:
+        name, args = request.get("name"), request.get("args") or []
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if name in self.unanswered:
+            return
+        mtype, resp, task = MessageType.FUNCTION_RESP, None, None
+        if name == "Authenticate":
+            state["logged_in"] = (args[0].get("username"), args[0].get("password")) == (
+                self.username,
+                self.password,
+            )
+            mtype, resp = (
+                (MessageType.FUNCTION_RESP, 1)
+                if state["logged_in"]
+                else (MessageType.EXCEPTION, AUTH_ERROR)
+            )
+        elif name in ("s_setUserVariable", "s_setActiveDevid"):
+            if name == "s_setActiveDevid":
+                state["devid"] = args[0]
+            resp = True
+        elif name == "s_getUserVariable":
+            resp = ""
+        elif name == "s_getActiveDevid":
+            resp = state["devid"]
+        elif name == "s_getMyDevIdList":
+            resp = [
+                {"username": self.username, "sharedfrom_name": None, "devid": devid}
+                for devid in self.devices
+            ]
+        elif name == "s_getAllPoolData":
+            resp = self.devices.get(state["devid"], {})
+        elif name in ("s_getTaskQueue", "s_getAlarmListExtended"):
+            resp = []
+        elif name == "s_setPoolParam":
+            resp = next(self._task_id)
+            task = self._run_task(resp, state["devid"], *args)
+        else:
+            mtype, resp = MessageType.EXCEPTION, UNKNOWN_FUNCTION
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not client.closed:
+            await client.send_json(
+                {"wrkfnc": True, "type": mtype, "nr": request.get("nr"), "resp": resp}
+            )
+        if task is not None and not self.task_delay:  # confirmed in one burst with response
+            await task
+        elif task is not None:
+            self._tasks.add(task := asyncio.create_task(task))
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_task(self, task_id: int, devid: str, pool_no: int, field: Any, value: Any):
+        if self.task_delay:
+            await asyncio.sleep(self.task_delay)
+        if self.overwrite_tasks:
+            await self.push("taskOverwriteConfimation", [task_id, devid])
+            return
+        field_name = field if isinstance(field, str) else f"v{field}"
+        change = {"pool": f"P{pool_no}", "field": field_name, "value": value}
+        await self.push_changes(devid, [change])
+        await self.push("taskSuccessConfirmation", [task_id, devid])
+
+
+async def start_modbus_server(
+    registers: dict[int, list[int]], host: str = "127.0.0.1", port: int = 0, unit: int = 88
+) -> tuple[Any, int]:
+    """Starts local Modbus TCP server (requires pymodbus)
+
+    Args:
+        registers (dict[int, list[int]]): Holding registers values by start address
+        host (str, optional): Listening address. Defaults to "127.0.0.1".
+        port (int, optional): Listening port, 0 for random. Defaults to 0.
+        unit (int, optional): Modbus unit (slave) ID. Defaults to 88.
+
+    Returns:
+        tuple[Any, int]: Server (stop it with `await server.shutdown()`) and listening port
+    """
+    # pylint: disable=import-outside-toplevel
+    from pymodbus.datastore import (
+        ModbusDeviceContext,
+        ModbusServerContext,
+        ModbusSparseDataBlock,
+    )
+    from pymodbus.server import ModbusTcpServer
+
+    if not port:
+        with socket.socket() as sock:
+            sock.bind((host, 0))
+            port = sock.getsockname()[1]
+
+    values = {
+        address + offset: value
+        for address, block in registers.items()
+        for offset, value in enumerate(block)
+    }
+    store = ModbusDeviceContext(hr=ModbusSparseDataBlock(values))
+    server = ModbusTcpServer(ModbusServerContext({unit: store}, single=False), address=(host, port))
+    await server.serve_forever(background=True)
+    return server, port
@@ -0,0 +1,498 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Asynchronous Modbus TCP client
+"""
+from __future__ import annotations
+
+from array import array
+from asyncio import AbstractEventLoop, CancelledError, Task, get_running_loop, sleep
+from dataclasses import dataclass
+from functools import cached_property
+from operator import attrgetter
+from typing import Any, Callable, Iterable, Optional, Sequence, Union
+
+try:
+    from pymodbus.client import AsyncModbusTcpClient
+    from pymodbus.exceptions import ModbusException
+except ImportError:  # pragma: no cover
+    AsyncModbusTcpClient = None
+    ModbusException = Exception
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from .const import LOGGER
+from .tracing import NULL_TRACER, Tracer
+from .models.device import PoolType, diff_pool_data, parse_field_name, reformat_pool_dict
+from .models.websocket import (
+    JsonType,
+    ListenerType,
+    MessageType,
+    Priority,
+    RequestMessage,
+    WorkerType,
+)
+
+MODBUS_PORT = 502
+MODBUS_UNIT = 88
+POLL_INTERVAL = 0.5
+MAX_READ_COUNT = 125  # Modbus limit of registers read with one request
+
+
+def decode_registers(
+    registers: Sequence[int],
+    signed: bool = True,
+    byteswap: bool = False,
+    scale: Union[int, float] = 1,
+    digits: int = 0,
+) -> list[Union[int, float]]:
+    """Converts registers to values in one pass (with NumPy when available)
+
+    Args:
+        registers (Sequence[int]): 16-bit registers
+        signed (bool, optional): Registers hold signed values. Defaults to True.
+        byteswap (bool, optional): Registers hold values with swapped bytes. Defaults to False.
+        scale (Union[int, float], optional): Values multiplier. Defaults to 1.
+        digits (int, optional): Decimal digits of scaled values. Defaults to 0.
+
+    Returns:
+        list[Union[int, float]]: Values
+    """
+    if numpy is not None:
+        values = numpy.asarray(registers, dtype=numpy.uint16)
+        if byteswap:
+            values = values.byteswap()
+        if signed:
+            values = values.view(numpy.int16)
+        if isinstance(scale, float):
+            return numpy.round(values * scale, digits).tolist()
+        return (values.astype(numpy.int64) * scale).tolist()
+
+    values = array("H", registers)
+    if byteswap:
+        values.byteswap()
+    if signed:
+        values = array("h", values.tobytes())
+    if isinstance(scale, float):
+        return [round(value * scale, digits) for value in values]
+    if scale != 1:
+        return [value * scale for value in values]
+    return values.tolist()
+
+
+@dataclass(frozen=True)
+class RegisterBlock:
+    """Holding registers block mapped to consecutive pool fields"""
+
+    address: int
+    count: int
+    pool: int
+    field: int = 0
+    letter: str = "v"
+    scale: Union[int, float] = 1
+    signed: bool = True
+    byteswap: bool = False
+
+    def __post_init__(self) -> None:
+        if not 0 < self.count <= MAX_READ_COUNT:
+            raise ValueError(f"Register block count must be in range <1, {MAX_READ_COUNT}>")
+
+    def __contains__(self, key: tuple[int, int, str]) -> bool:
+        pool_no, field_no, letter = key
+        return (
+            pool_no == self.pool
+            and letter == self.letter
+            and self.field <= field_no < self.field + self.count
+        )
+
+    @property
+    def digits(self) -> int:
+        """Number of decimal digits of scaled values"""
+        return len(repr(self.scale).partition(".")[2]) if isinstance(self.scale, float) else 0
+
+    @cached_property
+    def field_names(self) -> tuple[str, ...]:
+        """Names of fields mapped to block registers"""
+        return tuple(f"{self.letter}{self.field + offset}" for offset in range(self.count))
+
+    def decode_many(self, registers: Sequence[int]) -> list[Union[int, float]]:
+        """Converts all block registers to pool values
+
+        Args:
+            registers (Sequence[int]): Block registers
+
+        Returns:
+            list[Union[int, float]]: Pool values
+        """
+        return decode_registers(registers, self.signed, self.byteswap, self.scale, self.digits)
+
+    def decode(self, register: int) -> Union[int, float]:
+        """Converts register to pool value
+
+        Args:
+            register (int): Register value
+
+        Returns:
+            Union[int, float]: Pool value
+        """
+        if self.byteswap:
+            register = ((register & 0xFF) << 8) | (register >> 8)
+        if self.signed and register & 0x8000:
+            register -= 0x10000
+        return round(register * self.scale, self.digits) if self.scale != 1 else register
+
+    def encode(self, value: Union[int, float]) -> int:
+        """Converts pool value to register
+
+        Args:
+            value (Union[int, float]): Pool value
+
+        Returns:
+            int: Register value
+        """
+        register = int(round(value / self.scale)) & 0xFFFF
+        if self.byteswap:
+            register = ((register & 0xFF) << 8) | (register >> 8)
+        return register
+
+
+@dataclass(frozen=True)
+class RegisterRead:
+    """One Modbus read request covering one or more register blocks"""
+
+    address: int
+    count: int
+    blocks: tuple[RegisterBlock, ...]
+
+
+def plan_reads(
+    register_map: Iterable[RegisterBlock], max_count: int = MAX_READ_COUNT, max_gap: int = 0
+) -> tuple[RegisterRead, ...]:
+    """Merges adjacent (or overlapping) register blocks into as few reads as possible
+
+    Args:
+        register_map (Iterable[RegisterBlock]): Register blocks
+        max_count (int, optional): Maximum registers in one read. Defaults to MAX_READ_COUNT.
+        max_gap (int, optional): Maximum number of unmapped registers read between blocks.
+            Defaults to 0.
+
+    Returns:
+        tuple[RegisterRead, ...]: Reads ordered by address
+    """
+    reads: list[RegisterRead] = []
+    for block in sorted(register_map, key=attrgetter("address")):
+        end = block.address + block.count
+        if reads:
+            last = reads[-1]
+            last_end = last.address + last.count
+            count = max(end, last_end) - last.address
+            if block.address <= last_end + max_gap and count <= max_count:
+                reads[-1] = RegisterRead(last.address, count, (*last.blocks, block))
+                continue
+        reads.append(RegisterRead(block.address, block.count, (block,)))
+    return tuple(reads)
+
+
+# Registers read by the controller panel: 60 registers from 0x100, values in tenths stored
+# with swapped bytes. Mapping to P4 (sensors pool) fields is not confirmed by the producer.
+DEFAULT_REGISTER_MAP = (RegisterBlock(0x100, 60, pool=4, scale=0.1, byteswap=True),)
+
+
+class ModbusConnection:
+    """Class for handling local Modbus TCP connection with the boiler controller.
+
+    It can be used instead of `Connection` by `Device` and `Gateway`, holding registers are
+    polled according to the register map and changes are dispatched as `poolDataChanged`
+    pushes, the same way as received from BragerConnect WebSocket.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = MODBUS_PORT,
+        unit: int = MODBUS_UNIT,
+        devid: Optional[str] = None,
+        register_map: tuple[RegisterBlock, ...] = DEFAULT_REGISTER_MAP,
+        poll_interval: float = POLL_INTERVAL,
+        loop: Optional[AbstractEventLoop] = None,
+        tracer: Optional[Tracer] = None,
+    ) -> None:
+        """Class for handling local Modbus TCP connection with the boiler controller.
+
+        Args:
+            host (str): Controller address
+            port (int, optional): Controller Modbus TCP port. Defaults to MODBUS_PORT.
+            unit (int, optional): Modbus unit (slave) ID. Defaults to MODBUS_UNIT.
+            devid (Optional[str], optional): Device ID reported to `Gateway`. Defaults to None.
+            register_map (tuple[RegisterBlock, ...], optional): Register blocks to poll, adjacent
+                blocks are read with one request. Defaults to DEFAULT_REGISTER_MAP.
+            poll_interval (float, optional): Seconds between polls. Defaults to POLL_INTERVAL.
+            loop (Optional[asyncio.AbstractEventLoop], optional): Event loop. Defaults to None.
+            tracer (Optional[Tracer], optional): Tracer, None for no tracing. Defaults to None.
+
+        Raises:
+            RuntimeError: When pymodbus is not installed
+        """
+        if AsyncModbusTcpClient is None:
+            raise RuntimeError("Modbus TCP transport requires pymodbus package to be installed.")
+
+        self._host = host
+        self._port = port
+        self._unit = unit
+        self._devid = devid or f"MODBUS-{host}"
+        self.register_map = register_map
+        self.reads = plan_reads(register_map)
+        self.poll_interval = poll_interval
+
+        self._loop = loop if loop is not None else get_running_loop()
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        self._client = AsyncModbusTcpClient(host, port=port)
+        self._listeners: dict[str, list[ListenerType]] = {}
+        self._data: PoolType = {}
+        self._poll_task: Optional[Task] = None
+        self._reconnect: bool = False
+
+    @property
+    def connected(self) -> bool:
+        """Return if we are connected to the controller.
+
+        Returns:
+            bool: True if we are connected, False otherwise.
+        """
+        return self._client.connected
+
+    @property
+    def reconnect(self) -> bool:
+        """TODO: docstring"""
+        return self._reconnect
+
+    @reconnect.setter
+    def reconnect(self, value: bool) -> None:
+        """TODO: docstring"""
+        self._reconnect = bool(value)
+
+    @property
+    def active_device_id(self) -> str:
+        """Controller device ID"""
+        return self._devid
+
+    async def connect(self) -> None:
+        """Connects to the controller, reads all registers and starts polling.
+
+        Raises:
+            ConnectionError: Error occurred while communicating with the controller.
+        """
+        if self.connected:
+            return
+
+        LOGGER.info("Connecting to Modbus TCP controller at %s:%s.", self._host, self._port)
+        if not await self._client.connect():
+            raise ConnectionError(
+                f"Error occurred while connecting to Modbus TCP at {self._host}:{self._port}"
+            )
+        self._data = reformat_pool_dict(await self.async_read_pool_data())
+        self._poll_task = self._loop.create_task(self._async_poll())
+
+    async def async_read_pool_data(self) -> dict[str, JsonType]:
+        """Reads all mapped registers
+
+        Raises:
+            ConnectionError: When registers could not be read
+
+        Returns:
+            dict[str, JsonType]: Pool data in `s_getAllPoolData` format
+        """
+        data: dict[str, dict[str, Any]] = {}
+        for read in self.reads:
+            try:
+                response = await self._client.read_holding_registers(
+                    read.address, count=read.count, device_id=self._unit
+                )
+            except ModbusException as exception:
+                raise ConnectionError(f"Error reading registers at {read.address}") from exception
+            if response.isError():
+                raise ConnectionError(f"Error reading registers at {read.address}: {response}")
+            registers = response.registers
+            for block in read.blocks:
+                start = block.address - read.address
+                values = block.decode_many(registers[start : start + block.count])
+                data.setdefault(f"P{block.pool}", {}).update(zip(block.field_names, values))
+        return data
+
+    async def _async_poll(self) -> None:
+        """Polls registers and dispatches changes as `poolDataChanged` pushes"""
+        while True:
+            await sleep(self.poll_interval)
+            try:
+                changes = diff_pool_data(self._data, await self.async_read_pool_data())
+            except CancelledError:
+                raise
+            except ConnectionError:
+                LOGGER.warning("Error polling Modbus TCP controller at %s.", self._host)
+                continue
+            if not changes:
+                continue
+            for change in changes:
+                pool_no = parse_field_name(change["pool"])[0]
+                field_no, field_t = parse_field_name(change["field"])
+                values = self._data.setdefault(pool_no, {}).setdefault(field_no, {})
+                values[field_t] = change["value"]
+            self._dispatch(
+                RequestMessage(
+                    None,
+                    True,
+                    MessageType.PROCEDURE_EXEC,
+                    WorkerType.POOL_DATA_CHANGED.value,
+                    [changes, self._devid],
+                )
+            )
+
+    def add_listener(self, wrkfnc_name: str, callback: ListenerType) -> Callable[[], None]:
+        """Registers callback called for every push (only `poolDataChanged` is sent)
+
+        Args:
+            wrkfnc_name (str): Request name, eg. `poolDataChanged`
+            callback (ListenerType): Function called with the request message
+
+        Returns:
+            Callable[[], None]: Function removing the listener
+        """
+        listeners = self._listeners.setdefault(wrkfnc_name, [])
+        listeners.append(callback)
+        return lambda: listeners.remove(callback)
+
+    def _dispatch(self, wrkfnc: RequestMessage) -> None:
+        """Calls listeners registered for the request
+
+        Args:
+            wrkfnc (RequestMessage): Request message
+        """
+        tracer = self.tracer
+        for callback in self._listeners.get(wrkfnc.name, ()):
+            try:
+                with tracer.span("listener", name=wrkfnc.name, listener=callback):
+                    callback(wrkfnc)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in %s listener.", wrkfnc.name)
+
+    async def async_offload(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs CPU heavy function in the loop default executor
+
+        Args:
+            func (Callable[..., Any]): Function to run
+            args (Any): Function arguments
+
+        Returns:
+            Any: Function result
+        """
+        return await self._loop.run_in_executor(None, func, *args)
+
+    async def async_get_device_id_list(self) -> list[JsonType]:
+        """Returns the controller as the only device
+
+        Returns:
+            list[JsonType]: list with controller device information.
+        """
+        return [{"username": "", "sharedfrom_name": None, "devid": self._devid}]
+
+    async def async_get_active_device_id(self) -> str:
+        """Returns controller device ID"""
+        return self._devid
+
+    async def async_set_active_device_id(
+        self, device_id: str, priority: Optional[Priority] = None
+    ) -> bool:
+        """Checks if device ID is the controller device ID
+
+        Args:
+            device_id (str): Device ID
+            priority (Optional[Priority], optional): Not used, requests are not queued.
+                Defaults to None.
+
+        Returns:
+            bool: True if device ID is the controller device ID
+        """
+        return device_id == self._devid
+
+    async def async_get_all_pool_data(self, priority: Optional[Priority] = None) -> JsonType:
+        """Returns pool data read by the last poll
+
+        Args:
+            priority (Optional[Priority], optional): Not used, requests are not queued.
+                Defaults to None.
+
+        Returns:
+            JsonType: Pool data in `s_getAllPoolData` format
+        """
+        return {
+            f"P{pool_no}": {
+                f"{field_t}{field_no}": value
+                for field_no, values in fields.items()
+                for field_t, value in values.items()
+            }
+            for pool_no, fields in self._data.items()
+        }
+
+    async def async_set_pool_param(
+        self, pool_no: int, field_no: Union[int, str], value: Union[int, float]
+    ) -> None:
+        """Writes pool parameter to the mapped holding register
+
+        Args:
+            pool_no (int): Pool number
+            field_no (Union[int, str]): Field number (`v` field) or field name, eg. "v4"
+            value (Union[int, float]): Pool value
+
+        Raises:
+            ValueError: When field is not mapped to any register
+            ConnectionError: When register could not be written
+        """
+        letter = "v"
+        if isinstance(field_no, str):
+            field_no, letter = parse_field_name(field_no)
+        for block in self.register_map:
+            if (pool_no, field_no, letter) in block:
+                address = block.address + field_no - block.field
+                try:
+                    response = await self._client.write_register(
+                        address, block.encode(value), device_id=self._unit
+                    )
+                except ModbusException as exception:
+                    raise ConnectionError(f"Error writing register {address}") from exception
+                if response.isError():
+                    raise ConnectionError(f"Error writing register {address}: {response}")
+                return None
+        raise ValueError(f"P{pool_no}.{field_no} is not mapped to any register")
+
+    async def async_get_task_queue(self) -> JsonType:
+        """Modbus writes are executed immediately, there is no tasks queue"""
+        return []
+
+    async def async_get_alarm_list(self) -> JsonType:
+        """Alarms are not available over Modbus TCP"""
+        return []
+
+    async def close(self) -> None:
+        """Stops polling and closes Modbus TCP connection."""
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        LOGGER.info("Disconnecting from Modbus TCP controller.")
+        self._client.close()
+
+    async def __aenter__(self) -> ModbusConnection:
+        """Async enter.
+        Returns:
+            The ModbusConnection object.
+        """
+        return self
+
+    async def __aexit__(self, *_exc_info: Any) -> None:
+        """Async exit.
+        Args:
+            _exc_info: Exec type.
+        """
+        await self.close()
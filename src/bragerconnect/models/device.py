@@ -6,15 +6,30 @@ Device classes
 from __future__ import annotations
 
 import json
+import re
+import time
+import zlib
 from dataclasses import dataclass, field, InitVar
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Callable, Optional, Sequence, Union
 
-from ..models.websocket import JsonType
+from ..const import HISTORY_SIZE, LOGGER, OFFLOAD_FIELDS, STATS_TAU, STATS_WINDOW
+from ..models.history import History, RingBuffer
+from ..models.statistics import ParameterStatistics, Statistics
+from ..models.platform import EntityTable, get_entity_descriptors
+from ..models.thermostat import LIMIT_LETTERS, ThermostatSchedule
+from ..models.websocket import JsonType, Priority
 from ..websocket import Connection
 
-UnitType = dict[Union[float, str], float]
-PoolType = dict[int, dict[int, dict[str, Union[int, float, str]]]]
+ValueType = Union[int, float, str]
+PoolType = dict[int, dict[int, dict[str, ValueType]]]
+PoolValueType = dict[int, dict[int, ValueType]]
+PoolChangeType = dict[str, ValueType]  # {"pool": "P4", "field": "v1", "value": 58}
+
+MISSING = object()
+
+SCALE_RE = re.compile(r"^Wartość \* (\d+(?:\.(\d+))?)(?: = (.+))?$")
 
 
 def reformat_pool_dict(pool_data: dict[str, JsonType]) -> PoolType:
@@ -37,6 +52,106 @@ def reformat_pool_dict(pool_data: dict[str, JsonType]) -> PoolType:
     return data
 
 
+_FIELD_NAMES: dict[str, tuple[int, str]] = {}
+
+
+def parse_field_name(name: str) -> tuple[int, str]:
+    """Splits pool or field name into number and letter, eg. "v12" -> (12, "v")
+
+    Names are parsed once, the set of names is small and shared by all devices.
+
+    Args:
+        name (str): Pool or field name
+
+    Returns:
+        tuple[int, str]: Number and letter
+    """
+    try:
+        return _FIELD_NAMES[name]
+    except KeyError:
+        parsed = _FIELD_NAMES[name] = (int(name[1:]), name[0])
+        return parsed
+
+
+def diff_pool_data(old: PoolType, new: dict[str, JsonType]) -> list[PoolChangeType]:
+    """Compares pool data with new `s_getAllPoolData` response
+
+    Fields missing in the new response are not reported.
+
+    Args:
+        old (PoolType): Current pool data
+        new (dict[str, JsonType]): New pool data in `s_getAllPoolData` format
+
+    Returns:
+        list[PoolChangeType]: Changes in `poolDataChanged` format
+    """
+    changes = []
+    names, parse = _FIELD_NAMES, parse_field_name
+    for pool_name, fields in new.items():
+        old_fields = old.get(parse(pool_name)[0])
+        if old_fields is None:
+            changes.extend(
+                {"pool": pool_name, "field": field_name, "value": value}
+                for field_name, value in fields.items()
+            )
+            continue
+        get_values = old_fields.get
+        for field_name, value in fields.items():
+            field_no, field_t = names.get(field_name) or parse(field_name)
+            old_values = get_values(field_no)
+            if old_values is None or old_values.get(field_t, MISSING) != value:
+                changes.append({"pool": pool_name, "field": field_name, "value": value})
+
+    return changes
+
+
+@lru_cache(maxsize=None)
+def load_lang(lang: str) -> tuple[dict[str, Any], dict[str, dict[str, str]]]:
+    """Loads units and pool names catalogs for given language
+
+    Catalogs are read from disk only once per language and shared by all `Pool` objects,
+    so they must be treated as read-only.
+
+    Args:
+        lang (str): Language code, eg. "pl"
+
+    Raises:
+        RuntimeError: When catalog files could not be opened/read
+
+    Returns:
+        tuple[dict[str, Any], dict[str, dict[str, str]]]: units and pool names catalogs
+    """
+    path = Path(__file__).parent.parent
+    try:
+        with open(f"{path}/lang/{lang}_unit.json", "r", encoding="utf-8") as unit_f, open(
+            f"{path}/lang/{lang}_pool.json", "r", encoding="utf-8"
+        ) as name_f:
+            # TODO: klucze jako int
+            return json.load(unit_f), json.load(name_f)
+    except OSError as exception:
+        raise RuntimeError("Could not open/read JSON file.") from exception
+
+
+@lru_cache(maxsize=None)
+def catalog_version(lang: str) -> str:
+    """Returns version (checksum) of units and pool names catalogs for given language
+
+    Args:
+        lang (str): Language code, eg. "pl"
+
+    Returns:
+        str: Catalogs version, eg. "pl-1a2b3c4d"
+    """
+    path = Path(__file__).parent.parent
+    checksum = 0
+    for name in (f"{lang}_unit.json", f"{lang}_pool.json"):
+        try:
+            checksum = zlib.crc32(Path(f"{path}/lang/{name}").read_bytes(), checksum)
+        except OSError as exception:
+            raise RuntimeError("Could not open/read JSON file.") from exception
+    return f"{lang}-{checksum:08x}"
+
+
 @dataclass
 class DeviceInfo:
     """Object holding Brager Device information."""
@@ -60,20 +175,219 @@ class DeviceInfo:
     alert: Optional[bool] = None  # ":false
 
 
+@dataclass
+class PendingWrite:
+    """Pool parameter written locally, not confirmed by the server yet"""
+
+    pool: int
+    field: int
+    letter: str
+    value: ValueType  # written raw value
+    previous: Any  # raw value before write, MISSING if field did not exist
+    task_id: Optional[int] = None  # server task number
+
+    @property
+    def key(self) -> tuple[int, int, str]:
+        """Returns (pool, field, letter) of the written parameter"""
+        return (self.pool, self.field, self.letter)
+
+
+@dataclass(frozen=True)
+class Converter:
+    """Compiled unit converter (passthrough, scale or options lookup)"""
+
+    unit: Optional[str] = None
+    scale: Union[int, float] = 1
+    digits: int = 0
+    options: Optional[dict[int, str]] = field(default=None, hash=False, compare=False)
+    # Option name to raw value, None for names shared by several values
+    reverse: Optional[dict[str, Optional[int]]] = field(default=None, hash=False, compare=False)
+
+    def decode(self, value: ValueType) -> ValueType:
+        """Converts raw pool value to its real value
+
+        Args:
+            value (ValueType): Raw value
+
+        Returns:
+            ValueType: Real value (scaled number or option name)
+        """
+        if self.options is not None:
+            return self.options.get(value, value)
+        if self.scale != 1 and isinstance(value, (int, float)):
+            return round(value * self.scale, self.digits)
+        return value
+
+    def encode(self, value: ValueType) -> ValueType:
+        """Converts real value to raw pool value
+
+        Args:
+            value (ValueType): Real value (number or option name)
+
+        Raises:
+            ValueError: When option name is not known or is shared by several raw values
+
+        Returns:
+            ValueType: Raw value
+        """
+        if self.reverse is not None and isinstance(value, str):
+            try:
+                raw = self.reverse[value]
+            except KeyError as exception:
+                raise ValueError(f"Unknown option: {value}") from exception
+            if raw is None:
+                raw_values = [raw for raw, name in self.options.items() if name == value]
+                raise ValueError(f"Ambiguous option: {value} {raw_values}, write raw value")
+            return raw
+        if self.scale != 1 and isinstance(value, (int, float)):
+            return int(round(value / self.scale))
+        return value
+
+    @staticmethod
+    def compile(definition: Any) -> Converter:
+        """Compiles units catalog entry into converter
+
+        Args:
+            definition (Any): Units catalog entry (str, {"options": ...}, {"text": ...}
+                or bare options map, eg. {"0": "Monoblock", "1": "Split"})
+
+        Returns:
+            Converter: Compiled converter
+        """
+        if isinstance(definition, dict):
+            options = definition.get("options", definition)
+            if options and all(isinstance(key, str) and key.isdigit() for key in options):
+                options = {int(key): name for key, name in options.items()}
+                reverse: dict[str, Optional[int]] = {}
+                for raw, name in options.items():  # eg. "Wyłączony" of several controllers
+                    reverse[name] = None if name in reverse else raw
+                return Converter(options=options, reverse=reverse)
+            text = definition.get("text", "")
+        elif isinstance(definition, str):
+            text = definition
+        else:
+            return PASSTHROUGH
+        if match := SCALE_RE.match(text):
+            scale, fraction, unit = match.groups()
+            return Converter(
+                unit=unit,
+                scale=float(scale) if fraction else int(scale),
+                digits=len(fraction or ""),
+            )
+        if isinstance(definition, str):
+            return Converter(unit=definition or None)
+        return PASSTHROUGH
+
+
+PASSTHROUGH = Converter()
+
+
 class Unit:
-    """Brager Unit model"""
+    """Brager Unit model
 
-    def __init__(self) -> None:
-        """TODO: docstring"""
-        pass
+    Compiles units catalog entries into converters, each unit number is compiled only once.
+    """
 
-    def get_value(self, value, unit_no) -> UnitType:
-        """TODO: docstring"""
-        pass
+    def __init__(self, catalog: dict[str, Any]) -> None:
+        """Brager Unit model
 
-    def set_value(self, value, unit_no) -> int:
-        """TODO: docstring"""
-        pass
+        Args:
+            catalog (dict[str, Any]): Units catalog loaded from `<lang>_unit.json`
+        """
+        self.catalog = catalog
+        self._converters: dict[Any, Converter] = {}
+
+    def converter(self, unit_no: Optional[int]) -> Converter:
+        """Returns (compiled on first use) converter for unit number
+
+        Args:
+            unit_no (Optional[int]): Unit number (`u` field), None for fields without unit
+
+        Returns:
+            Converter: Unit converter
+        """
+        try:
+            return self._converters[unit_no]
+        except KeyError:
+            converter = self._converters[unit_no] = Converter.compile(
+                self.catalog.get(str(unit_no))
+            )
+            return converter
+
+    def get_value(self, value: ValueType, unit_no: Optional[int]) -> ValueType:
+        """Converts raw pool value to its real value
+
+        Args:
+            value (ValueType): Raw value
+            unit_no (Optional[int]): Unit number
+
+        Returns:
+            ValueType: Real value
+        """
+        return self.converter(unit_no).decode(value)
+
+    def set_value(self, value: ValueType, unit_no: Optional[int]) -> ValueType:
+        """Converts real value to raw pool value, ready to be sent to the device
+
+        Args:
+            value (ValueType): Real value
+            unit_no (Optional[int]): Unit number
+
+        Returns:
+            ValueType: Raw value
+        """
+        return self.converter(unit_no).encode(value)
+
+    def decode_pool(self, data: PoolType) -> PoolValueType:
+        """Converts all `v` fields of pool data to real values
+
+        Args:
+            data (PoolType): Pool data
+
+        Returns:
+            PoolValueType: Real values by pool and field number
+        """
+        converter = self.converter
+        return {
+            pool_no: {
+                field_no: converter(values.get("u")).decode(values["v"])
+                for field_no, values in fields.items()
+                if "v" in values
+            }
+            for pool_no, fields in data.items()
+        }
+
+    def encode_pool(self, values: PoolValueType, data: PoolType) -> PoolValueType:
+        """Converts real values to raw values, using units from pool data
+
+        Args:
+            values (PoolValueType): Real values by pool and field number
+            data (PoolType): Pool data holding `u` fields
+
+        Returns:
+            PoolValueType: Raw values by pool and field number
+        """
+        converter = self.converter
+        return {
+            pool_no: {
+                field_no: converter(data.get(pool_no, {}).get(field_no, {}).get("u")).encode(value)
+                for field_no, value in fields.items()
+            }
+            for pool_no, fields in values.items()
+        }
+
+
+@lru_cache(maxsize=None)
+def get_unit(lang: str) -> Unit:
+    """Returns Unit object for given language, shared by all `Pool` objects
+
+    Args:
+        lang (str): Language code, eg. "pl"
+
+    Returns:
+        Unit: Unit object
+    """
+    return Unit(load_lang(lang)[0])
 
 
 @dataclass
@@ -85,6 +399,17 @@ class Pool:
     name: dict[str, dict[int, str]] = field(init=False, default_factory=dict)
     init_data: InitVar[dict] = None
     init_lang: InitVar[str] = "pl"
+    lang: str = field(init=False, default="pl")
+    value: PoolValueType = field(init=False, default_factory=dict)
+    codec: Unit = field(init=False, repr=False, compare=False, default=None)
+    schedule: ThermostatSchedule = field(init=False, repr=False, default=None)
+    history: Optional[History] = field(init=False, repr=False, compare=False, default=None)
+    statistics: Optional[Statistics] = field(
+        init=False, repr=False, compare=False, default=None
+    )
+    pending: dict[tuple[int, int, str], PendingWrite] = field(
+        init=False, repr=False, compare=False, default_factory=dict
+    )
 
     def __post_init__(self, init_data, init_lang):
         """TODO: docstring"""
@@ -98,19 +423,223 @@ class Pool:
                 field_t = str(field_name[0])
                 self.data.setdefault(pool_no, {}).setdefault(field_no, {})[field_t] = field_value
 
-        try:
-            path = Path(__file__).parent.parent
-            unit_f = open(f"{path}/lang/{init_lang}_unit.json", "r", encoding="utf-8")
-            name_f = open(f"{path}/lang/{init_lang}_pool.json", "r", encoding="utf-8")
-        except OSError as exception:
-            raise RuntimeError("Could not open/read JSON file.") from exception
-        else:
-            # TODO: klucze jako int
-            self.unit = json.load(unit_f)
-            self.name = json.load(name_f)
-        finally:
-            unit_f.close()
-            name_f.close()
+        self.lang = init_lang
+        self.unit, self.name = load_lang(init_lang)
+        self.codec = get_unit(init_lang)
+        self.value = self.codec.decode_pool(self.data)
+        self.schedule = ThermostatSchedule.from_pool(self.data)
+
+    def to_dict(self) -> dict[str, dict[str, ValueType]]:
+        """Returns pool data in `s_getAllPoolData` format
+
+        Returns:
+            dict[str, dict[str, ValueType]]: Pool data, eg. `{"P4": {"v0": 65.5, ...}, ...}`
+        """
+        return {
+            f"P{pool_no}": {
+                f"{field_t}{field_no}": value
+                for field_no, values in fields.items()
+                for field_t, value in values.items()
+            }
+            for pool_no, fields in self.data.items()
+        }
+
+    def update(self, changes: list[PoolChangeType]) -> list[tuple[int, int, str]]:
+        """Applies `poolDataChanged` changes to pool data and real values
+
+        Args:
+            changes (list[PoolChangeType]): Changes, eg. `[{"pool": "P4", "field": "v1", ...}]`
+
+        Returns:
+            list[tuple[int, int, str]]: Changed (pool, field, letter) triples
+        """
+        changed = []
+        thermostat = False
+        pending = self.pending
+        for change in changes:
+            pool_no = parse_field_name(change["pool"])[0]
+            field_no, field_t = parse_field_name(change["field"])
+            if pending and (write := pending.get((pool_no, field_no, field_t))) is not None:
+                if write.value == change["value"]:  # the server applied local write
+                    del pending[write.key]
+                else:  # eg. repeated value sent before the write, restored on rollback
+                    write.previous = change["value"]
+            values = self.data.setdefault(pool_no, {}).setdefault(field_no, {})
+            values[field_t] = change["value"]
+            if field_t in ("v", "u") and "v" in values:
+                self.value.setdefault(pool_no, {})[field_no] = self.codec.converter(
+                    values.get("u")
+                ).decode(values["v"])
+            changed.append((pool_no, field_no, field_t))
+            thermostat = thermostat or pool_no == self.schedule.pool_no
+
+        if thermostat:
+            self.schedule.update(changes)
+        if self.history is not None or self.statistics is not None:
+            now = time.time()
+            if self.history is not None:
+                self.history.record(changed, self.value, now)
+            if self.statistics is not None:
+                self.statistics.record(changed, self.value, now)
+
+        return changed
+
+    def validate(self, pool_no: int, field_no: int, letter: str, value: ValueType) -> None:
+        """Checks raw value against the field `n`/`x` (min/max) values
+
+        Args:
+            pool_no (int): Pool number
+            field_no (int): Field number
+            letter (str): Field letter, eg. "v" or thermostat program slot "a"
+            value (ValueType): Raw value
+
+        Raises:
+            ValueError: When value is out of range
+        """
+        values = self.data.get(pool_no, {}).get(field_no, {})
+        if letter in LIMIT_LETTERS or not isinstance(value, (int, float)):
+            return
+        minimum, maximum = values.get("n"), values.get("x")
+        if minimum is None or maximum is None or minimum >= maximum:  # eg. 0/0, not limited
+            return
+        if not minimum <= value <= maximum:
+            raise ValueError(
+                f"P{pool_no}.{letter}{field_no}={value} out of range <{minimum}, {maximum}>"
+            )
+
+    def write(self, pool_no: int, field_no: int, letter: str, value: ValueType) -> PendingWrite:
+        """Validates and applies written value locally, until the server confirms it
+
+        Args:
+            pool_no (int): Pool number
+            field_no (int): Field number
+            letter (str): Field letter
+            value (ValueType): Raw value
+
+        Raises:
+            ValueError: When value is out of the field range
+
+        Returns:
+            PendingWrite: Pending write, to be settled or rolled back
+        """
+        self.validate(pool_no, field_no, letter, value)
+        previous = self.data.get(pool_no, {}).get(field_no, {}).get(letter, MISSING)
+        pending = self.pending.get((pool_no, field_no, letter))
+        if pending is not None:  # previous write is not confirmed yet, keep server value
+            previous = pending.previous
+        self.update([{"pool": f"P{pool_no}", "field": f"{letter}{field_no}", "value": value}])
+        write = PendingWrite(pool_no, field_no, letter, value, previous)
+        self.pending[write.key] = write
+        return write
+
+    def find_pending(self, task_id: int) -> Optional[PendingWrite]:
+        """Returns pending write of the server task"""
+        for write in self.pending.values():
+            if write.task_id == task_id:
+                return write
+        return None
+
+    def settle(self, write: PendingWrite) -> None:
+        """Confirms pending write, local value is kept"""
+        if self.pending.get(write.key) is write:
+            del self.pending[write.key]
+
+    def rollback(self, write: PendingWrite) -> list[tuple[int, int, str]]:
+        """Restores value from before the pending write
+
+        Args:
+            write (PendingWrite): Pending write
+
+        Returns:
+            list[tuple[int, int, str]]: Changed (pool, field, letter) triples, empty when
+                the write was already settled
+        """
+        if self.pending.get(write.key) is not write:
+            return []
+        del self.pending[write.key]
+        if write.previous is MISSING:  # field did not exist before the write, remove it
+            fields = self.data.get(write.pool, {})
+            values = fields.get(write.field, {})
+            if values.pop(write.letter, MISSING) is MISSING:
+                return []
+            if not values:
+                del fields[write.field]
+            if "v" in values:
+                self.value[write.pool][write.field] = self.codec.converter(
+                    values.get("u")
+                ).decode(values["v"])
+            else:
+                self.value.get(write.pool, {}).pop(write.field, None)
+            return [write.key]
+        change = {"pool": f"P{write.pool}", "field": f"{write.letter}{write.field}"}
+        return self.update([{**change, "value": write.previous}])
+
+    def track_history(
+        self, pool_no: int, field_no: int, capacity: int = HISTORY_SIZE
+    ) -> RingBuffer:
+        """Starts recording parameter values history, beginning with the current value
+
+        Args:
+            pool_no (int): Pool number
+            field_no (int): Field number
+            capacity (int, optional): Samples kept for each parameter of the pool, used when
+                the first parameter is tracked. Defaults to HISTORY_SIZE.
+
+        Returns:
+            RingBuffer: Parameter history
+        """
+        if self.history is None:
+            self.history = History(capacity)
+        new = (pool_no, field_no) not in self.history.buffers
+        buffer = self.history.track(pool_no, field_no)
+        value = self.value.get(pool_no, {}).get(field_no)
+        if new and isinstance(value, (int, float)):
+            buffer.append(time.time(), value)
+        return buffer
+
+    def track_statistics(
+        self,
+        pool_no: int,
+        field_no: int,
+        window: float = STATS_WINDOW,
+        tau: float = STATS_TAU,
+        states: Optional[bool] = None,
+    ) -> ParameterStatistics:
+        """Starts computing parameter streaming statistics, beginning with the current value
+
+        Args:
+            pool_no (int): Pool number
+            field_no (int): Field number
+            window (float, optional): Rolling minimum and maximum window in seconds.
+                Defaults to STATS_WINDOW.
+            tau (float, optional): EWMA time constant in seconds. Defaults to STATS_TAU.
+            states (Optional[bool], optional): Count time spent in states, None to count
+                them for parameters with options unit (eg. operating mode). Defaults to None.
+
+        Returns:
+            ParameterStatistics: Parameter statistics
+        """
+        if self.statistics is None:
+            self.statistics = Statistics()
+        values = self.data.get(pool_no, {}).get(field_no, {})
+        if states is None:
+            states = self.codec.converter(values.get("u")).options is not None
+        new = (pool_no, field_no) not in self.statistics.parameters
+        stats = self.statistics.track(pool_no, field_no, window, tau, states)
+        if new and "v" in values:
+            stats.update(time.time(), self.value[pool_no][field_no])
+        return stats
+
+    def resync(self, pool_data: dict[str, JsonType]) -> list[tuple[int, int, str]]:
+        """Applies only differences between pool and new `s_getAllPoolData` response
+
+        Args:
+            pool_data (dict[str, JsonType]): New pool data
+
+        Returns:
+            list[tuple[int, int, str]]: Changed (pool, field, letter) triples
+        """
+        return self.update(diff_pool_data(self.data, pool_data))
 
 
 class Device:
@@ -118,18 +647,208 @@ class Device:
 
     conn: Connection
     info: DeviceInfo
-    pool: Pool
+    lang: str  # units and pool names catalogs language of the pool
+    stale: bool
+    # Called with device and changed (pool, field, letter) triples of local writes/rollbacks
+    on_change: Optional[Callable[[Device, list[tuple[int, int, str]]], None]]
+    on_rollback: Optional[Callable[[Device, PendingWrite], None]]
 
-    def __init__(self, connection: Connection, info: DeviceInfo) -> None:
+    def __init__(self, connection: Connection, info: DeviceInfo, lang: str = "pl") -> None:
         self.conn = connection
         self.info = info
+        self.lang = lang
+        self.stale = False
+        self.on_change = None
+        self.on_rollback = None
+        # Task confirmations handled before the response of their write was resumed
+        self._confirmations: dict[int, bool] = {}
+        self._pool: Optional[Pool] = None
+        self._pool_data: Union[dict[str, JsonType], bytes, None] = None
+
+    @property
+    def pool(self) -> Optional[Pool]:
+        """Device pool, created on first access when device was loaded from local data"""
+        if self._pool is None and self._pool_data is not None:
+            data, self._pool_data = self._pool_data, None
+            self._pool = Pool(
+                init_data=json.loads(data) if isinstance(data, bytes) else data,
+                init_lang=self.lang,
+            )
+        return self._pool
+
+    @pool.setter
+    def pool(self, pool: Pool) -> None:
+        self._pool, self._pool_data = pool, None
+
+    @property
+    def raw_pool_data(self) -> Union[dict[str, JsonType], bytes, None]:
+        """Pool data in `s_getAllPoolData` format (JSON encoded if pool was not created yet)"""
+        return self._pool_data if self._pool is None else self._pool.to_dict()
+
+    async def _async_create_pool(self, pool_data: dict[str, JsonType]) -> Pool:
+        """Creates pool, large pools are created in connection executor
+
+        Args:
+            pool_data (dict[str, JsonType]): Pool data in `s_getAllPoolData` format
+
+        Returns:
+            Pool: Created pool
+        """
+        if not pool_data or sum(map(len, pool_data.values())) < OFFLOAD_FIELDS:
+            return Pool(init_data=pool_data, init_lang=self.lang)
+        return await self.conn.async_offload(
+            partial(Pool, init_data=pool_data, init_lang=self.lang)
+        )
 
     async def create(self) -> Device:
         """TODO: docstring"""
-        await self.conn.async_set_active_device_id(self.info.devid)
-        pool = await self.conn.async_get_all_pool_data()
-        self.pool = Pool(init_data=pool)
+        with self.conn.tracer.span("device.create", devid=self.info.devid) as span:
+            await self.conn.async_set_active_device_id(self.info.devid)
+            span.mark("activated")
+            pool = await self.conn.async_get_all_pool_data()
+            span.mark("fetched")
+            self.pool = await self._async_create_pool(pool)
+            span.mark("created")
+        return self
+
+    def load(self, pool_data: Union[dict[str, JsonType], bytes]) -> Device:
+        """Loads locally stored pool data, without requesting the server
+
+        Pool is created on first access and device is marked as stale until next
+        `async_refresh`.
+
+        Args:
+            pool_data (Union[dict[str, JsonType], bytes]): Pool data in `s_getAllPoolData`
+                format, may be JSON encoded
+
+        Returns:
+            Device: The Device object
+        """
+        self._pool, self._pool_data = None, pool_data
+        self.stale = True
         return self
 
+    async def async_refresh(self) -> list[tuple[int, int, str]]:
+        """Updates device pool with data requested from the server
+
+        Returns:
+            list[tuple[int, int, str]]: Changed (pool, field, letter) triples
+        """
+        await self.conn.async_set_active_device_id(self.info.devid, Priority.BACKGROUND)
+        pool_data = await self.conn.async_get_all_pool_data(Priority.BACKGROUND)
+        self.stale = False
+        if self.pool is None:
+            self.pool = await self._async_create_pool(pool_data)
+            return []
+        return self.pool.resync(pool_data)
+
+    async def async_set_pool_param(
+        self, pool_no: int, field_no: Union[int, str], value: ValueType
+    ) -> Optional[int]:
+        """Sets raw pool parameter value on the device
+
+        Args:
+            pool_no (int): Pool number
+            field_no (Union[int, str]): Field number (`v` field) or field name, eg. "a4"
+            value (ValueType): Raw value
+
+        Raises:
+            ValueError: When value is out of the field `n`/`x` range, nothing is sent
+
+        Returns:
+            Optional[int]: Server task number
+        """
+        write = None
+        if self.pool is not None:  # applied locally until the server confirms or rejects
+            number, letter = (
+                parse_field_name(field_no) if isinstance(field_no, str) else (field_no, "v")
+            )
+            write = self.pool.write(pool_no, number, letter, value)
+            self._changed([write.key])
+        try:
+            if self.conn.active_device_id != self.info.devid:
+                await self.conn.async_set_active_device_id(self.info.devid, Priority.INTERACTIVE)
+            task_id = await self.conn.async_set_pool_param(pool_no, field_no, value)
+        except Exception:
+            if write is not None:
+                self.rollback(write)
+                self._forget_confirmations()
+            raise
+        if write is not None:
+            write.task_id = task_id
+            if (success := self._confirmations.pop(task_id, None)) is not None:
+                self.settle_task(task_id, success)
+            self._forget_confirmations()
+        return task_id
+
+    def _forget_confirmations(self) -> None:
+        """Drops buffered confirmations when no write waits for its task number"""
+        pending = self.pool.pending.values() if self.pool is not None else ()
+        if all(write.task_id is not None for write in pending):
+            self._confirmations.clear()
+
+    def _changed(self, changed: list[tuple[int, int, str]]) -> None:
+        if changed and self.on_change is not None:
+            self.on_change(self, changed)
+
+    def rollback(self, write: PendingWrite) -> None:
+        """Restores value from before the write rejected by the server
+
+        Args:
+            write (PendingWrite): Pending write
+        """
+        if self.pool is None or self.pool.pending.get(write.key) is not write:
+            return
+        LOGGER.warning("%s: write %s=%s rolled back.", self.info.devid, write.key, write.value)
+        self._changed(self.pool.rollback(write))
+        if self.on_rollback is not None:
+            self.on_rollback(self, write)
+
+    def settle_task(self, task_id: int, success: bool) -> Optional[PendingWrite]:
+        """Confirms or rolls back the pending write of the server task
+
+        Confirmation of a write whose task number is not known yet (the confirmation was
+        received together with the write response) is applied when the number is assigned.
+
+        Args:
+            task_id (int): Server task number
+            success (bool): Task succeeded
+
+        Returns:
+            Optional[PendingWrite]: Settled write, None when no write is pending for the task
+        """
+        write = self.pool.find_pending(task_id) if self.pool is not None else None
+        if write is None and self.pool is not None:
+            if any(pending.task_id is None for pending in self.pool.pending.values()):
+                self._confirmations[task_id] = success
+        elif write is not None:
+            if success:
+                self.pool.settle(write)
+            else:
+                self.rollback(write)
+        return write
+
+    async def async_set_schedule(
+        self, field_no: int, program: Sequence[Optional[int]]
+    ) -> list[Optional[int]]:
+        """Writes thermostat program, sending only changed `a`..`i` fields
+
+        Args:
+            field_no (int): Thermostat field number
+            program (Sequence[Optional[int]]): New program, None leaves value unchanged
+
+        Returns:
+            list[Optional[int]]: Server task numbers of sent writes
+        """
+        return [
+            await self.async_set_pool_param(pool_no, field_name, value)
+            for pool_no, field_name, value in self.pool.schedule.writes(field_no, program)
+        ]
+
+    @property
+    def entities(self) -> EntityTable:
+        """Entity descriptors for this device, shared by all devices of the same model"""
+        return get_entity_descriptors(self.pool)
+
     def __str__(self) -> str:
         return self.info.devid
@@ -0,0 +1,191 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Pool parameters history classes
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from ..const import HISTORY_SIZE
+
+if TYPE_CHECKING:
+    from .device import PoolValueType
+
+AGGREGATES = ("min", "max", "mean")
+
+
+class RingBuffer:
+    """Fixed size buffer of (timestamp, value) samples, the oldest samples are overwritten
+
+    Samples are kept in two preallocated `array("d")`, 16 bytes per sample.
+    """
+
+    __slots__ = ("capacity", "times", "values", "head", "size")
+
+    def __init__(self, capacity: int = HISTORY_SIZE) -> None:
+        """Fixed size buffer of (timestamp, value) samples
+
+        Args:
+            capacity (int, optional): Number of samples. Defaults to HISTORY_SIZE.
+
+        Raises:
+            ValueError: When capacity is not positive
+        """
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.head = 0  # next write position
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Adds sample, overwriting the oldest one when buffer is full
+
+        Args:
+            timestamp (float): Sample time (seconds since epoch), not older than the last one
+            value (float): Sample value
+        """
+        self.times[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def ordered(self) -> tuple[array, array]:
+        """Returns copies of timestamps and values, from the oldest sample
+
+        Returns:
+            tuple[array, array]: Timestamps and values
+        """
+        if self.size < self.capacity:
+            return self.times[: self.size], self.values[: self.size]
+        return (
+            self.times[self.head :] + self.times[: self.head],
+            self.values[self.head :] + self.values[: self.head],
+        )
+
+    def window(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> tuple[array, array]:
+        """Returns samples from time range
+
+        Args:
+            start (Optional[float], optional): Range start (inclusive). Defaults to None.
+            end (Optional[float], optional): Range end (inclusive). Defaults to None.
+
+        Returns:
+            tuple[array, array]: Timestamps and values
+        """
+        times, values = self.ordered()
+        low = bisect_left(times, start) if start is not None else 0
+        high = bisect_right(times, end) if end is not None else len(times)
+        return times[low:high], values[low:high]
+
+    def downsample(
+        self,
+        step: float,
+        how: str = "mean",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> list[tuple[float, float]]:
+        """Aggregates samples from time range into `step` seconds buckets
+
+        Args:
+            step (float): Bucket length in seconds
+            how (str, optional): Aggregate, one of AGGREGATES. Defaults to "mean".
+            start (Optional[float], optional): Range start, buckets are aligned to it, None
+                for the oldest sample. Defaults to None.
+            end (Optional[float], optional): Range end. Defaults to None.
+
+        Raises:
+            ValueError: When aggregate is not known or step is not positive
+
+        Returns:
+            list[tuple[float, float]]: Bucket start time and aggregated value, empty buckets
+                are skipped
+        """
+        if how not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate {how}, expected one of {AGGREGATES}")
+        if step <= 0:
+            raise ValueError(f"Step must be positive, got {step}")
+        times, values = self.window(start, end)
+        if not times:
+            return []
+        origin = start if start is not None else times[0]
+        result: list[tuple[float, float]] = []
+        bucket, acc, count = None, 0.0, 0
+        for timestamp, value in zip(times, values):
+            current = origin + (timestamp - origin) // step * step
+            if current != bucket:
+                if count:
+                    result.append((bucket, acc / count if how == "mean" else acc))
+                bucket, acc, count = current, value, 1
+                continue
+            count += 1
+            if how == "mean":
+                acc += value
+            elif (value < acc) == (how == "min"):
+                acc = value
+        result.append((bucket, acc / count if how == "mean" else acc))
+        return result
+
+
+class History:
+    """Ring buffers of tracked pool parameters values"""
+
+    def __init__(self, capacity: int = HISTORY_SIZE) -> None:
+        """Ring buffers of tracked pool parameters values
+
+        Args:
+            capacity (int, optional): Samples kept for each parameter. Defaults to HISTORY_SIZE.
+        """
+        self.capacity = capacity
+        self.buffers: dict[tuple[int, int], RingBuffer] = {}
+
+    @property
+    def memory(self) -> int:
+        """Returns bytes used by samples of all tracked parameters."""
+        return len(self.buffers) * self.capacity * 16
+
+    def track(self, pool_no: int, field_no: int) -> RingBuffer:
+        """Starts recording parameter values
+
+        Args:
+            pool_no (int): Pool number
+            field_no (int): Field number
+
+        Returns:
+            RingBuffer: Parameter buffer
+        """
+        buffer = self.buffers.get((pool_no, field_no))
+        if buffer is None:
+            buffer = self.buffers[(pool_no, field_no)] = RingBuffer(self.capacity)
+        return buffer
+
+    def untrack(self, pool_no: int, field_no: int) -> None:
+        """Stops recording parameter values, dropping its samples"""
+        self.buffers.pop((pool_no, field_no), None)
+
+    def record(
+        self, changed: Iterable[tuple[int, int, str]], values: PoolValueType, timestamp: float
+    ) -> None:
+        """Records numeric values of changed tracked parameters
+
+        Args:
+            changed (Iterable[tuple[int, int, str]]): Changed (pool, field, letter) triples
+            values (PoolValueType): Real values by pool and field number
+            timestamp (float): Changes time
+        """
+        buffers = self.buffers
+        for pool_no, field_no, field_t in changed:
+            if field_t != "v" or (buffer := buffers.get((pool_no, field_no))) is None:
+                continue
+            value = values.get(pool_no, {}).get(field_no)
+            if isinstance(value, (int, float)):
+                buffer.append(timestamp, value)
@@ -3,15 +3,110 @@ Python library to connect BragerConnect and Home Assistant to work together.
 
 Platform classes
 """
+from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
 
+if TYPE_CHECKING:
+    from .device import Pool
 
-@dataclass
+# P11 fields identifying controller model: 1 - controller firmware, 4 - boiler model,
+# 5 - communication module firmware (6 holds device ID, so it is not a part of the key)
+MODEL_FIELDS = (1, 4, 5)
+
+ModelKey = tuple[str, ...]
+
+
+@dataclass(frozen=True)
 class Sensor:
     """BragerConnect Sensor base model"""
 
+    pool: int
+    field: int
+    name: str
+    letter: str = "v"
+    unit: Optional[int] = None
+    unit_name: Optional[str] = None
+    options: Optional[dict[int, str]] = field(default=None, hash=False, compare=False)
 
-@dataclass
+    @property
+    def key(self) -> str:
+        """Unique (per device) entity key, eg. `P4.v0`"""
+        return f"P{self.pool}.{self.letter}{self.field}"
+
+
+@dataclass(frozen=True)
 class BinarySensor(Sensor):
     """BragerConnect BinarySensor base model"""
+
+
+EntityTable = tuple[Sensor, ...]
+
+_ENTITY_TABLES: dict[ModelKey, EntityTable] = {}
+
+
+def model_key(pool: Pool) -> Optional[ModelKey]:
+    """Builds controller model key from P11 pool strings
+
+    Args:
+        pool (Pool): Device pool
+
+    Returns:
+        Optional[ModelKey]: Model/firmware strings and pool language, None when the pool
+            has no model strings
+    """
+    info = pool.data.get(11, {})
+    model = tuple(str(info.get(no, {}).get("v", "")) for no in MODEL_FIELDS)
+    return (*model, pool.lang) if any(model) else None
+
+
+def build_entity_descriptors(pool: Pool) -> EntityTable:
+    """Joins pool structure with names and units catalogs into entity descriptors
+
+    Args:
+        pool (Pool): Device pool
+
+    Returns:
+        EntityTable: Entity descriptors
+    """
+    entities = []
+    for pool_no, fields in sorted(pool.data.items()):
+        names = pool.name.get(f"P{pool_no}", {})
+        for field_no, values in sorted(fields.items()):
+            if "v" in values:
+                letter = "v"
+            elif "s" in values and len(values) == 1:
+                letter = "s"  # status only pool (P5)
+            else:
+                continue  # eg. thermostat (P12) fields
+
+            name = names.get(str(field_no), f"P{pool_no}.{letter}{field_no}")
+            unit_no = values.get("u")
+            converter = pool.codec.converter(unit_no)
+            if (options := converter.options) is not None:
+                cls = BinarySensor if set(options) == {0, 1} else Sensor
+                entities.append(cls(pool_no, field_no, name, letter, unit_no, None, options))
+            else:
+                entities.append(Sensor(pool_no, field_no, name, letter, unit_no, converter.unit))
+
+    return tuple(entities)
+
+
+def get_entity_descriptors(pool: Pool) -> EntityTable:
+    """Returns entity descriptors for pool, built once per controller model
+
+    Pools of unknown model (without P11 model strings) are not cached, as they may have
+    different parameters.
+
+    Args:
+        pool (Pool): Device pool
+
+    Returns:
+        EntityTable: Entity descriptors shared by all devices of the same model
+    """
+    if (key := model_key(pool)) is None:
+        return build_entity_descriptors(pool)
+    if (table := _ENTITY_TABLES.get(key)) is None:
+        table = _ENTITY_TABLES[key] = build_entity_descriptors(pool)
+    return table
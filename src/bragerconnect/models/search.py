@@ -0,0 +1,143 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Pool parameters search index
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from .device import Converter, ValueType, get_unit, load_lang
+
+ParamKey = tuple[int, int]  # (pool number, field number)
+
+TOKEN_RE = re.compile(r"[^\W_]+|%|°c", re.UNICODE)
+# Letters not decomposed by NFKD
+TRANSLITERATION = str.maketrans({"ł": "l", "Ł": "L", "ø": "o", "ß": "ss"})
+
+
+def normalize(text: str) -> list[str]:
+    """Splits text into lowercase tokens without diacritics
+
+    Args:
+        text (str): Text, eg. "Temperatura kotła"
+
+    Returns:
+        list[str]: Tokens, eg. ["temperatura", "kotla"]
+    """
+    text = unicodedata.normalize("NFKD", text.translate(TRANSLITERATION).lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return TOKEN_RE.findall(text)
+
+
+def unit_text(converter: Converter) -> str:
+    """Returns display text of compiled unit, option names of options units"""
+    if converter.options is not None:
+        return " ".join(map(str, converter.options.values()))
+    return converter.unit or ""
+
+
+@dataclass(frozen=True)
+class ParameterMatch:
+    """Pool parameter of a device found by fleet search"""
+
+    devid: str
+    pool: int
+    field: int
+    name: str
+    value: Optional[ValueType]
+    unit: Optional[int]
+
+
+class SearchIndex:
+    """Inverted index of pool parameter names and units of a language catalogs
+
+    Query tokens match name tokens by prefix, all query tokens must match.
+    """
+
+    def __init__(self, lang: str = "pl") -> None:
+        """Inverted index of pool parameter names and units of a language catalogs
+
+        Args:
+            lang (str, optional): Catalogs language. Defaults to "pl".
+        """
+        units, names = load_lang(lang)
+        self.lang = lang
+        self.names: dict[ParamKey, str] = {}
+        self.tokens: dict[str, set[ParamKey]] = {}
+        self.pools: dict[int, set[ParamKey]] = {}
+        self.unit_tokens: dict[str, set[int]] = {}
+
+        for pool_name, fields in names.items():
+            pool_no = int(pool_name[1:])
+            for field_no, name in fields.items():
+                key = (pool_no, int(field_no))
+                self.names[key] = name
+                self.pools.setdefault(pool_no, set()).add(key)
+                for token in normalize(name):
+                    self.tokens.setdefault(token, set()).add(key)
+        codec = get_unit(lang)  # units are compiled like for decoding
+        for unit_no in map(int, units):
+            for token in normalize(unit_text(codec.converter(unit_no))):
+                self.unit_tokens.setdefault(token, set()).add(unit_no)
+        self._sorted_tokens = sorted(self.tokens)
+
+    def _prefixed(self, prefix: str) -> set[ParamKey]:
+        tokens, keys = self._sorted_tokens, set()
+        position = bisect_left(tokens, prefix)
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            keys |= self.tokens[tokens[position]]
+            position += 1
+        return keys
+
+    def search(self, query: str = "", pool_no: Optional[int] = None) -> set[ParamKey]:
+        """Returns parameters which names match all query tokens
+
+        Args:
+            query (str, optional): Searched text, eg. "temp cwu", empty for all parameters.
+                Defaults to "".
+            pool_no (Optional[int], optional): Pool number. Defaults to None.
+
+        Returns:
+            set[ParamKey]: Matching (pool, field) keys
+        """
+        result = set(self.pools.get(pool_no, ())) if pool_no is not None else None
+        for token in normalize(query):
+            keys = self._prefixed(token)
+            result = keys if result is None else result & keys
+            if not result:
+                return set()
+        return result if result is not None else set(self.names)
+
+    def unit_ids(self, text: str) -> set[int]:
+        """Returns unit numbers which display text matches all tokens
+
+        Args:
+            text (str): Unit text, eg. "°C"
+
+        Returns:
+            set[int]: Unit numbers
+        """
+        result: Optional[set[int]] = None
+        for token in normalize(text):
+            ids = self.unit_tokens.get(token, set())
+            result = ids if result is None else result & ids
+        return result or set()
+
+
+@lru_cache(maxsize=None)
+def get_search_index(lang: str = "pl") -> SearchIndex:
+    """Returns search index of the language catalogs, built once
+
+    Args:
+        lang (str, optional): Catalogs language. Defaults to "pl".
+
+    Returns:
+        SearchIndex: Search index
+    """
+    return SearchIndex(lang)
@@ -0,0 +1,185 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Pool parameters streaming statistics classes
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+from ..const import STATS_TAU, STATS_WINDOW
+
+if TYPE_CHECKING:
+    from .device import PoolValueType, ValueType
+
+
+class ParameterStatistics:
+    """Statistics of one parameter, updated in O(1) (amortized) for every value change
+
+    Numeric values: time weighted EWMA, rolling minimum and maximum over the last `window`
+    seconds (monotonic deques), last and EWMA smoothed rate of change (per second).
+    State values (`states=True`, eg. operating mode): seconds spent in every state.
+    """
+
+    __slots__ = (
+        "window",
+        "tau",
+        "states",
+        "count",
+        "value",
+        "timestamp",
+        "ewma",
+        "rate",
+        "rate_ewma",
+        "_minima",
+        "_maxima",
+        "_state_time",
+    )
+
+    def __init__(
+        self, window: float = STATS_WINDOW, tau: float = STATS_TAU, states: bool = False
+    ) -> None:
+        """Statistics of one parameter
+
+        Args:
+            window (float, optional): Rolling minimum and maximum window in seconds.
+                Defaults to STATS_WINDOW.
+            tau (float, optional): EWMA time constant in seconds. Defaults to STATS_TAU.
+            states (bool, optional): Count time spent in states instead of numeric
+                statistics. Defaults to False.
+        """
+        self.window = window
+        self.tau = tau
+        self.states = states
+        self.count = 0
+        self.value: Optional[ValueType] = None
+        self.timestamp: Optional[float] = None
+        self.ewma: Optional[float] = None
+        self.rate: Optional[float] = None
+        self.rate_ewma: Optional[float] = None
+        self._minima: deque[tuple[float, float]] = deque()  # increasing values
+        self._maxima: deque[tuple[float, float]] = deque()  # decreasing values
+        self._state_time: dict[Any, float] = {}
+
+    def update(self, timestamp: float, value: ValueType) -> None:
+        """Adds parameter value
+
+        Args:
+            timestamp (float): Change time in seconds
+            value (ValueType): New value
+        """
+        last_value, last_time = self.value, self.timestamp
+        self.value, self.timestamp = value, timestamp
+        self.count += 1
+        if self.states:
+            if last_time is not None:
+                self._state_time[last_value] = (
+                    self._state_time.get(last_value, 0.0) + timestamp - last_time
+                )
+            return
+        if not isinstance(value, (int, float)):
+            return
+
+        if self.ewma is None or last_time is None:
+            self.ewma = float(value)
+        else:
+            alpha = 1.0 - math.exp(-(timestamp - last_time) / self.tau)
+            self.ewma += alpha * (value - self.ewma)
+            if timestamp > last_time and isinstance(last_value, (int, float)):
+                self.rate = (value - last_value) / (timestamp - last_time)
+                self.rate_ewma = (
+                    self.rate
+                    if self.rate_ewma is None
+                    else self.rate_ewma + alpha * (self.rate - self.rate_ewma)
+                )
+
+        minima, maxima = self._minima, self._maxima
+        while minima and minima[-1][1] >= value:
+            minima.pop()
+        minima.append((timestamp, value))
+        while maxima and maxima[-1][1] <= value:
+            maxima.pop()
+        maxima.append((timestamp, value))
+        expired = timestamp - self.window
+        while minima[0][0] < expired:
+            minima.popleft()
+        while maxima[0][0] < expired:
+            maxima.popleft()
+
+    @property
+    def minimum(self) -> Optional[float]:
+        """Returns minimum of the window ending with the last value."""
+        return self._minima[0][1] if self._minima else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        """Returns maximum of the window ending with the last value."""
+        return self._maxima[0][1] if self._maxima else None
+
+    def time_in_state(self, now: Optional[float] = None) -> dict[Any, float]:
+        """Returns seconds spent in every state
+
+        Args:
+            now (Optional[float], optional): Current time, counted for the current state,
+                None to count until the last change. Defaults to None.
+
+        Returns:
+            dict[Any, float]: Seconds by state
+        """
+        result = dict(self._state_time)
+        if now is not None and self.timestamp is not None and now > self.timestamp:
+            result[self.value] = result.get(self.value, 0.0) + now - self.timestamp
+        return result
+
+
+class Statistics:
+    """Streaming statistics of tracked pool parameters"""
+
+    def __init__(self) -> None:
+        self.parameters: dict[tuple[int, int], ParameterStatistics] = {}
+
+    def track(
+        self,
+        pool_no: int,
+        field_no: int,
+        window: float = STATS_WINDOW,
+        tau: float = STATS_TAU,
+        states: bool = False,
+    ) -> ParameterStatistics:
+        """Starts computing parameter statistics
+
+        Args:
+            pool_no (int): Pool number
+            field_no (int): Field number
+            window (float, optional): Rolling minimum and maximum window in seconds.
+                Defaults to STATS_WINDOW.
+            tau (float, optional): EWMA time constant in seconds. Defaults to STATS_TAU.
+            states (bool, optional): Count time spent in states. Defaults to False.
+
+        Returns:
+            ParameterStatistics: Parameter statistics
+        """
+        stats = self.parameters.get((pool_no, field_no))
+        if stats is None:
+            stats = self.parameters[(pool_no, field_no)] = ParameterStatistics(
+                window, tau, states
+            )
+        return stats
+
+    def record(
+        self, changed: Iterable[tuple[int, int, str]], values: PoolValueType, timestamp: float
+    ) -> None:
+        """Updates statistics of changed tracked parameters
+
+        Args:
+            changed (Iterable[tuple[int, int, str]]): Changed (pool, field, letter) triples
+            values (PoolValueType): Real values by pool and field number
+            timestamp (float): Changes time
+        """
+        parameters = self.parameters
+        for pool_no, field_no, field_t in changed:
+            if field_t != "v" or (stats := parameters.get((pool_no, field_no))) is None:
+                continue
+            stats.update(timestamp, values[pool_no][field_no])
@@ -0,0 +1,146 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Thermostat schedule classes
+"""
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, Iterable, Sequence, Union
+
+if TYPE_CHECKING:
+    from .device import PoolChangeType, PoolType
+
+THERMOSTAT_POOL = 12
+PROGRAM_LETTERS = "abcdefghi"
+PROGRAM_SIZE = len(PROGRAM_LETTERS)
+LIMIT_LETTERS = "nxus"  # min, max, unit, status
+
+WriteType = tuple[int, str, int]  # (pool number, field name, value), eg. (12, "a4", 5)
+
+
+class ThermostatSchedule:
+    """Weekly programs of all thermostats in the pool
+
+    Programs (`a`..`i` fields) of all thermostats are kept in one flat array, `PROGRAM_SIZE`
+    slots per thermostat, limits (`n`, `x`, `u`, `s` fields) in another one.
+    """
+
+    def __init__(self, pool_no: int = THERMOSTAT_POOL) -> None:
+        """Weekly programs of all thermostats in the pool
+
+        Args:
+            pool_no (int, optional): Thermostat pool number. Defaults to THERMOSTAT_POOL.
+        """
+        self.pool_no = pool_no
+        self.index: dict[int, int] = {}  # field number -> thermostat slot
+        self.program = array("i")
+        self.limits = array("i")
+
+    @classmethod
+    def from_pool(cls, data: PoolType, pool_no: int = THERMOSTAT_POOL) -> ThermostatSchedule:
+        """Decodes all thermostat programs from pool data
+
+        Args:
+            data (PoolType): Pool data
+            pool_no (int, optional): Thermostat pool number. Defaults to THERMOSTAT_POOL.
+
+        Returns:
+            ThermostatSchedule: Decoded programs
+        """
+        schedule = cls(pool_no)
+        for field_no, values in sorted(data.get(pool_no, {}).items()):
+            if "a" not in values:
+                continue
+            schedule.index[field_no] = len(schedule.index)
+            schedule.program.extend(int(values.get(letter, 0)) for letter in PROGRAM_LETTERS)
+            schedule.limits.extend(int(values.get(letter, 0)) for letter in LIMIT_LETTERS)
+        return schedule
+
+    def __contains__(self, field_no: int) -> bool:
+        return field_no in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, field_no: int) -> array:
+        """Returns program of the thermostat
+
+        Args:
+            field_no (int): Thermostat field number
+
+        Returns:
+            array: Copy of `a`..`i` values
+        """
+        start = self.index[field_no] * PROGRAM_SIZE
+        return self.program[start : start + PROGRAM_SIZE]
+
+    def limit(self, field_no: int, letter: str) -> int:
+        """Returns one of `n`, `x`, `u`, `s` fields of the thermostat"""
+        return self.limits[self.index[field_no] * len(LIMIT_LETTERS) + LIMIT_LETTERS.index(letter)]
+
+    def _add(self, field_no: int) -> int:
+        slot = self.index[field_no] = len(self.index)
+        self.program.extend([0] * PROGRAM_SIZE)
+        self.limits.extend([0] * len(LIMIT_LETTERS))
+        return slot
+
+    def update(self, changes: Iterable[PoolChangeType]) -> set[int]:
+        """Patches programs in place with `poolDataChanged` changes
+
+        Args:
+            changes (Iterable[PoolChangeType]): Pool changes, other pools are ignored
+
+        Returns:
+            set[int]: Changed thermostat field numbers
+        """
+        pool_name = f"P{self.pool_no}"
+        changed = set()
+        for change in changes:
+            if change["pool"] != pool_name:
+                continue
+            letter = change["field"][0]
+            field_no = int(change["field"][1:])
+            if letter in PROGRAM_LETTERS:
+                slot = self.index.get(field_no)
+                if slot is None:
+                    slot = self._add(field_no)
+                self.program[slot * PROGRAM_SIZE + PROGRAM_LETTERS.index(letter)] = int(
+                    change["value"]
+                )
+            elif letter in LIMIT_LETTERS and field_no in self.index:
+                self.limits[
+                    self.index[field_no] * len(LIMIT_LETTERS) + LIMIT_LETTERS.index(letter)
+                ] = int(change["value"])
+            else:
+                continue
+            changed.add(field_no)
+        return changed
+
+    def writes(self, field_no: int, program: Sequence[Union[int, None]]) -> list[WriteType]:
+        """Returns minimal set of writes needed to change thermostat program
+
+        Only slots which differ from the current program are written, None leaves slot as is.
+
+        Args:
+            field_no (int): Thermostat field number
+            program (Sequence[Union[int, None]]): New `a`..`i` values
+
+        Raises:
+            ValueError: When program length or any value is out of thermostat `n`/`x` range
+
+        Returns:
+            list[WriteType]: Writes to send with `s_setPoolParam`
+        """
+        if len(program) != PROGRAM_SIZE:
+            raise ValueError(f"Program must have {PROGRAM_SIZE} values, got {len(program)}")
+        minimum, maximum = self.limit(field_no, "n"), self.limit(field_no, "x")
+        current = self.get(field_no)
+        writes = []
+        for letter, old, new in zip(PROGRAM_LETTERS, current, program):
+            if new is None or new == old:
+                continue
+            if not minimum <= new <= maximum:
+                raise ValueError(f"{letter}{field_no}={new} out of range <{minimum}, {maximum}>")
+            writes.append((self.pool_no, f"{letter}{field_no}", int(new)))
+        return writes
@@ -10,7 +10,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from json import loads
 from enum import Enum, IntEnum
-from typing import Optional, Union, Any
+from typing import Callable, Optional, Union, Any
 from websockets.connection import State
 
 from bragerconnect.exceptions import MessageException
@@ -30,6 +30,39 @@ class MessageType(IntEnum):
     PORT_MESSAGE = 21
 
 
+class Priority(IntEnum):
+    """Outgoing request priority, lower value is sent first"""
+
+    INTERACTIVE = 0  # user writes
+    READ = 1
+    BACKGROUND = 2  # resyncs and periodic refreshes
+
+
+# Default priority of requests, not listed requests are sent with READ priority
+REQUEST_PRIORITY: dict[str, Priority] = {
+    "Authenticate": Priority.INTERACTIVE,
+    "s_setPoolParam": Priority.INTERACTIVE,
+    "s_setUserVariable": Priority.INTERACTIVE,
+    "s_getTaskQueue": Priority.BACKGROUND,
+    "s_getAlarmListExtended": Priority.BACKGROUND,
+}
+
+# Seconds responses of rarely changing requests are cached by `Connection`
+RESPONSE_TTL: dict[str, float] = {
+    "s_getMyDevIdList": 300,
+    "s_getUserVariable": 300,
+    "s_getActiveDevid": 60,
+}
+
+# Cached responses invalidated by received request (push) or sent request
+RESPONSE_INVALIDATION: dict[str, tuple[str, ...]] = {
+    "moduleListChanged": ("s_getMyDevIdList",),
+    "moduleSharedToMe": ("s_getMyDevIdList",),
+    "s_setActiveDevid": ("s_getActiveDevid",),
+    "s_setUserVariable": ("s_getUserVariable",),
+}
+
+
 class WorkerTaskType(Enum):
     """Worker types for tasks"""
 
@@ -112,6 +145,40 @@ class ResponseMessage(Message):
 
 
 ResponseType = dict[int, Future[ResponseMessage]]
+ListenerType = Callable[[RequestMessage], None]
+
+
+@dataclass
+class QueueStats:
+    """Received messages processing queue statistics"""
+
+    depth: int = 0  # messages waiting for processing
+    max_depth: int = 0
+    received: int = 0
+    processed: int = 0
+    full: int = 0  # times reader waited for free space in the queue
+    blocked_time: float = 0.0  # total time reader waited for free space in the queue
+
+
+@dataclass
+class SchedulerStats:
+    """Outgoing requests scheduler statistics"""
+
+    queued: int = 0  # requests waiting for sending
+    in_flight: int = 0  # requests sent, waiting for response
+    sent: list[int] = field(default_factory=lambda: [0] * len(Priority))  # by priority
+    promoted: int = 0  # requests sent before higher priority ones, because waited too long
+
+
+@dataclass
+class RateLimiterStats:
+    """Rate limiter statistics"""
+
+    acquired: int = 0
+    delayed: int = 0  # requests which waited for tokens
+    wait_time: float = 0.0  # total seconds requests waited for tokens
+    max_wait: float = 0.0
+    wait_time_by_name: dict[str, float] = field(default_factory=dict)
 
 
 @dataclass
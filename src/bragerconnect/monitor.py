@@ -0,0 +1,214 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Pool changes, alarms and task events monitor
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, Iterable, Optional, TextIO
+
+from .const import HOST, LOGGER, MONITOR_BUFFER_SIZE, MONITOR_FLUSH_INTERVAL
+from .gateway import Gateway
+from .models.device import parse_field_name
+from .models.websocket import RequestMessage, WorkerType
+from .websocket import Connection
+
+TASK_EVENTS = {
+    WorkerType.TASK_SUCCESS.value: "success",
+    WorkerType.TASK_OVERWRITE.value: "overwrite",
+    WorkerType.TASK_LIST_CHANGED.value: "list_changed",
+}
+
+
+class NdjsonWriter:
+    """Buffered writer of newline-delimited JSON events
+
+    Lines are written to the stream in one chunk when buffer exceeds `buffer_size` characters
+    or `interval` seconds after the first buffered line.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        buffer_size: int = MONITOR_BUFFER_SIZE,
+        interval: float = MONITOR_FLUSH_INTERVAL,
+    ) -> None:
+        """Buffered writer of newline-delimited JSON events
+
+        Args:
+            stream (TextIO): Output stream, eg. stdout
+            buffer_size (int, optional): Buffered characters written at once.
+                Defaults to MONITOR_BUFFER_SIZE.
+            interval (float, optional): Longest time event is buffered in seconds.
+                Defaults to MONITOR_FLUSH_INTERVAL.
+        """
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.interval = interval
+        self.events = 0
+        self._lines: list[str] = []
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+    def write(self, event: dict[str, Any]) -> None:
+        """Buffers event
+
+        Args:
+            event (dict[str, Any]): JSON serializable event
+        """
+        line = self._encode(event)
+        self._lines.append(line)
+        self._size += len(line) + 1
+        self.events += 1
+        if self._size >= self.buffer_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self.flush)
+
+    def flush(self) -> None:
+        """Writes buffered events to the stream"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._lines:
+            return
+        self._lines.append("")
+        chunk = "\n".join(self._lines)
+        self._lines.clear()
+        self._size = 0
+        self.stream.write(chunk)
+        self.stream.flush()
+
+
+class Monitor:
+    """Converts gateways pushes to events, filtered by device, pool and field"""
+
+    def __init__(
+        self,
+        write: Callable[[dict[str, Any]], None],
+        devices: Iterable[str] = (),
+        pools: Iterable[int] = (),
+        fields: Iterable[int] = (),
+    ) -> None:
+        """Converts gateways pushes to events
+
+        Args:
+            write (Callable[[dict[str, Any]], None]): Called with every event
+            devices (Iterable[str], optional): Monitored device IDs, empty for all.
+                Defaults to ().
+            pools (Iterable[int], optional): Monitored pool numbers, empty for all.
+                Defaults to ().
+            fields (Iterable[int], optional): Monitored field numbers, empty for all.
+                Defaults to ().
+        """
+        self.write = write
+        self.devices = frozenset(devices)
+        self.pools = frozenset(pools)
+        self.fields = frozenset(fields)
+
+    def attach(self, gateway: Gateway) -> None:
+        """Registers listeners, after gateway ones so pools are already updated"""
+        conn = gateway.conn
+        conn.add_listener(
+            WorkerType.POOL_DATA_CHANGED.value,
+            lambda wrkfnc: self._on_pool_data_changed(gateway, wrkfnc),
+        )
+        conn.add_listener(WorkerType.NEW_ALARMS.value, self._on_alarms)
+        for name in TASK_EVENTS:
+            conn.add_listener(name, self._on_task)
+
+    def _on_pool_data_changed(self, gateway: Gateway, wrkfnc: RequestMessage) -> None:
+        *data, devid = wrkfnc.args
+        if self.devices and devid not in self.devices:
+            return
+        device = gateway.get_device(devid)
+        values = device.pool.value if device is not None and device.pool is not None else {}
+        pools, fields, write, now = self.pools, self.fields, self.write, time.time()
+        for change in data.pop():
+            pool_no = parse_field_name(change["pool"])[0]
+            field_no, field_t = parse_field_name(change["field"])
+            if (pools and pool_no not in pools) or (fields and field_no not in fields):
+                continue
+            event = {
+                "event": "pool",
+                "time": now,
+                "devid": devid,
+                "pool": pool_no,
+                "field": field_no,
+                "letter": field_t,
+                "raw": change["value"],
+            }
+            if field_t == "v":
+                event["value"] = values.get(pool_no, {}).get(field_no, change["value"])
+            write(event)
+
+    def _on_alarms(self, wrkfnc: RequestMessage) -> None:
+        devid = wrkfnc.args[-1] if wrkfnc.args and isinstance(wrkfnc.args[-1], str) else None
+        if self.devices and devid not in self.devices:
+            return
+        self.write({"event": "alarm", "time": time.time(), "devid": devid, "args": wrkfnc.args})
+
+    def _on_task(self, wrkfnc: RequestMessage) -> None:
+        args = wrkfnc.args or []
+        event = {"event": "task", "time": time.time(), "type": TASK_EVENTS[wrkfnc.name]}
+        if len(args) == 2 and isinstance(args[1], str):  # [task number, device ID]
+            if self.devices and args[1] not in self.devices:
+                return
+            event.update(task_id=args[0], devid=args[1])
+        else:
+            event["args"] = args
+        self.write(event)
+
+
+async def async_monitor(
+    accounts: Iterable[tuple[str, str]],
+    stream: TextIO,
+    host: str = HOST,
+    devices: Iterable[str] = (),
+    pools: Iterable[int] = (),
+    fields: Iterable[int] = (),
+    duration: Optional[float] = None,
+    buffer_size: int = MONITOR_BUFFER_SIZE,
+    interval: float = MONITOR_FLUSH_INTERVAL,
+) -> int:
+    """Streams events of all accounts as newline-delimited JSON until cancelled
+
+    Args:
+        accounts (Iterable[tuple[str, str]]): Usernames and passwords
+        stream (TextIO): Output stream
+        host (str, optional): WebSocket server URL. Defaults to HOST.
+        devices (Iterable[str], optional): Monitored device IDs. Defaults to ().
+        pools (Iterable[int], optional): Monitored pool numbers. Defaults to ().
+        fields (Iterable[int], optional): Monitored field numbers. Defaults to ().
+        duration (Optional[float], optional): Seconds to monitor, None until cancelled.
+            Defaults to None.
+        buffer_size (int, optional): Buffered characters. Defaults to MONITOR_BUFFER_SIZE.
+        interval (float, optional): Longest time event is buffered.
+            Defaults to MONITOR_FLUSH_INTERVAL.
+
+    Returns:
+        int: Number of written events
+    """
+    writer = NdjsonWriter(stream, buffer_size, interval)
+    monitor = Monitor(writer.write, devices, pools, fields)
+    gateways = [
+        Gateway(Connection(username, password, host=host)) for username, password in accounts
+    ]
+    try:
+        for gateway in gateways:
+            monitor.attach(gateway)
+            await gateway.__aenter__()
+            await gateway.async_update_devices()
+            LOGGER.info("Monitoring devices: %s", ", ".join(map(str, gateway.device)))
+        if duration is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(duration)
+    finally:
+        writer.flush()
+        for gateway in gateways:
+            await gateway.conn.close()
+    return writer.events
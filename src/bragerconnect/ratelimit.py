@@ -0,0 +1,135 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Client side rate limiting
+"""
+from __future__ import annotations
+
+from asyncio import sleep
+from threading import Lock
+from time import monotonic
+from typing import Optional
+
+from .models.websocket import RateLimiterStats
+
+
+class TokenBucket:
+    """Token bucket, refilled with `rate` tokens per second up to `burst` tokens
+
+    Tokens are reserved in advance (the bucket may go below zero), so waiting callers are
+    served in the order they asked for tokens. Bucket may be shared between threads.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        """Token bucket, refilled with `rate` tokens per second up to `burst` tokens
+
+        Args:
+            rate (float): Tokens per second
+            burst (Optional[float], optional): Bucket size, None for one second of tokens
+                (at least one). Defaults to None.
+
+        Raises:
+            ValueError: When rate or burst is not positive
+        """
+        burst = burst if burst is not None else max(rate, 1.0)
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"Rate and burst must be positive, got {rate}, {burst}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes tokens from the bucket
+
+        Args:
+            tokens (float, optional): Number of tokens. Defaults to 1.0.
+
+        Returns:
+            float: Seconds to wait until reserved tokens are available
+        """
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimiter:
+    """Request rate limiter with optional per request name limits
+
+    Request waits for tokens of the limiter bucket, bucket of its name (if configured) and of
+    the parent limiter, eg. one process wide limiter shared by all connections:
+
+        budget = RateLimiter(50)
+        conn = Connection(..., rate_limiter=RateLimiter(10, parent=budget))
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        limits: Optional[dict[str, tuple[float, Optional[float]]]] = None,
+        parent: Optional[RateLimiter] = None,
+    ) -> None:
+        """Request rate limiter with optional per request name limits
+
+        Args:
+            rate (Optional[float], optional): Requests per second, None for no limit of all
+                requests. Defaults to None.
+            burst (Optional[float], optional): Requests sent at once after being idle.
+                Defaults to None.
+            limits (Optional[dict[str, tuple[float, Optional[float]]]], optional): Rate and
+                burst by request name, eg. `{"s_getAllPoolData": (2, 5)}`. Defaults to None.
+            parent (Optional[RateLimiter], optional): Limiter shared with other connections.
+                Defaults to None.
+        """
+        self.bucket = TokenBucket(rate, burst) if rate is not None else None
+        self.buckets = {
+            name: TokenBucket(name_rate, name_burst)
+            for name, (name_rate, name_burst) in (limits or {}).items()
+        }
+        self.parent = parent
+        self.stats = RateLimiterStats()
+
+    def reserve(self, name: str) -> float:
+        """Takes tokens needed to send request
+
+        Args:
+            name (str): Request name
+
+        Returns:
+            float: Seconds to wait before sending request
+        """
+        delay = self.parent.reserve(name) if self.parent is not None else 0.0
+        if self.bucket is not None:
+            delay = max(delay, self.bucket.reserve())
+        if (bucket := self.buckets.get(name)) is not None:
+            delay = max(delay, bucket.reserve())
+        return delay
+
+    async def async_acquire(self, name: str) -> float:
+        """Waits until request can be sent
+
+        Args:
+            name (str): Request name
+
+        Returns:
+            float: Seconds waited
+        """
+        delay = self.reserve(name)
+        limiter: Optional[RateLimiter] = self
+        while limiter is not None:  # parent statistics include all connections
+            stats = limiter.stats
+            stats.acquired += 1
+            if delay > 0:
+                stats.delayed += 1
+                stats.wait_time += delay
+                stats.max_wait = max(stats.max_wait, delay)
+                stats.wait_time_by_name[name] = stats.wait_time_by_name.get(name, 0.0) + delay
+            limiter = limiter.parent
+        if delay > 0:
+            await sleep(delay)
+        return delay
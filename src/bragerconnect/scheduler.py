@@ -0,0 +1,122 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Outgoing requests scheduler
+"""
+from __future__ import annotations
+
+from asyncio import CancelledError, Event, Future
+from collections import deque
+from time import monotonic, perf_counter
+from typing import Awaitable, Callable, Optional
+
+from .const import LOGGER, MAX_IN_FLIGHT, MAX_SEND_WAIT
+from .models.websocket import Priority, SchedulerStats
+
+
+class OutboundScheduler:
+    """Sends requests by priority, limiting number of requests waiting for response
+
+    Every priority has its own FIFO lane. The highest priority non-empty lane is sent first,
+    unless the oldest request of a lower priority lane waits longer than `max_wait`, then it
+    is sent first, so background requests are never starved.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_wait: float = MAX_SEND_WAIT,
+    ) -> None:
+        """Sends requests by priority, limiting number of requests waiting for response
+
+        Args:
+            send (Callable[[str], Awaitable[None]]): Coroutine function sending the frame
+            max_in_flight (int, optional): Maximum number of sent requests waiting for response.
+                Defaults to MAX_IN_FLIGHT.
+            max_wait (float, optional): Seconds after which waiting request is sent before
+                higher priority ones. Defaults to MAX_SEND_WAIT.
+        """
+        self._send = send
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self._lanes: tuple[deque[tuple[float, str, Future, Optional[Future]]], ...] = tuple(
+            deque() for _ in Priority
+        )
+        self._wakeup = Event()
+        self._stats = SchedulerStats()
+
+    @property
+    def stats(self) -> SchedulerStats:
+        """Returns scheduler statistics."""
+        self._stats.queued = sum(map(len, self._lanes))
+        return self._stats
+
+    def submit(
+        self, priority: Priority, data: str, response: Future, sent: Optional[Future] = None
+    ) -> None:
+        """Queues frame for sending
+
+        Args:
+            priority (Priority): Request priority
+            data (str): Frame to send
+            response (Future): Request response future, while it is not done request occupies
+                in-flight slot. Sending errors are set as its exception.
+            sent (Optional[Future], optional): Future resolved with `perf_counter()` time when
+                the frame was sent. Defaults to None.
+        """
+        self._lanes[priority].append((monotonic(), data, response, sent))
+        self._wakeup.set()
+
+    def fail_queued(self, exception: Exception) -> None:
+        """Removes all frames waiting for sending, setting exception of their responses
+
+        Args:
+            exception (Exception): Exception set to responses, eg. ConnectionError
+        """
+        for lane in self._lanes:
+            while lane:
+                response = lane.popleft()[2]
+                if not response.done():
+                    response.set_exception(exception)
+
+    def _release(self, _response: Future) -> None:
+        self._stats.in_flight -= 1
+        self._wakeup.set()
+
+    def _next(self) -> Optional[tuple[str, Future, Optional[Future]]]:
+        """Removes and returns the next frame to send, None if all lanes are empty"""
+        lanes = [(priority, lane) for priority, lane in enumerate(self._lanes) if lane]
+        if not lanes:
+            return None
+        priority, lane = lanes[0]
+        oldest = min(lanes, key=lambda item: item[1][0][0])
+        if oldest[1] is not lane and monotonic() - oldest[1][0][0] > self.max_wait:
+            self._stats.promoted += 1
+            priority, lane = oldest
+        self._stats.sent[priority] += 1
+        return lane.popleft()[1:]
+
+    async def async_run(self) -> None:
+        """Sending loop, runs until cancelled"""
+        while True:
+            if self._stats.in_flight >= self.max_in_flight or (item := self._next()) is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            data, response, sent = item
+            if response.done():  # cancelled or timed out before sending
+                continue
+            self._stats.in_flight += 1
+            response.add_done_callback(self._release)
+            try:
+                await self._send(data)
+            except CancelledError:
+                raise
+            except Exception as exception:  # pylint: disable=broad-except
+                LOGGER.debug("Error sending request: %s", exception)
+                if not response.done():
+                    response.set_exception(exception)
+            else:
+                if sent is not None and not sent.done():
+                    sent.set_result(perf_counter())
@@ -0,0 +1,381 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Shared memory publication of pool values
+"""
+from __future__ import annotations
+
+import json
+import math
+import struct
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Iterable, Optional
+
+from .const import LOGGER, SHARED_DEVICES, SHARED_DIRECTORY_SIZE, SHARED_SLOTS
+from .models.device import Device, PoolValueType, ValueType, get_unit
+
+MAGIC = b"BRGS"
+LAYOUT_VERSION = 1
+# magic, layout version, reserved, directory sequence, directory length, directory capacity,
+# devices capacity, slots capacity
+HEADER = struct.Struct("<4sHHQQQQQ")
+SEQUENCE = struct.Struct("<Q")
+SLOT = struct.Struct("<dd")  # raw value, unit (NaN if missing)
+DIRECTORY_SEQUENCE = 8  # offsets of header fields
+DIRECTORY_LENGTH = 16
+READ_RETRIES = 100000
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class _Layout:
+    """Offsets of segment regions
+
+    Header, JSON directory of devices (its own sequence in header), sequence of every device,
+    slots of (raw value, unit) float64 pairs. Odd sequence means writer is changing the region.
+    """
+
+    def __init__(self, directory: int, devices: int, slots: int) -> None:
+        self.directory_capacity = directory
+        self.devices = devices
+        self.slots = slots
+        self.directory = _align(HEADER.size)
+        self.sequences = _align(self.directory + directory)
+        self.values = _align(self.sequences + devices * SEQUENCE.size)
+        self.size = self.values + slots * SLOT.size
+
+
+class SharedPoolPublisher:
+    """Publishes raw values of gateway devices pools in a shared memory segment
+
+    Every device is guarded by its own sequence lock, so readers in other processes copy
+    consistent values of a device without locks and without blocking the writer. Only
+    numeric values are published (P11 texts are not).
+
+    Implements `AggregateIndex` notifications interface, see `Gateway.publish`.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        devices: int = SHARED_DEVICES,
+        slots: int = SHARED_SLOTS,
+        directory_size: int = SHARED_DIRECTORY_SIZE,
+        lang: str = "pl",
+    ) -> None:
+        """Creates shared memory segment
+
+        Args:
+            name (Optional[str], optional): Segment name, None for random one.
+                Defaults to None.
+            devices (int, optional): Maximum number of devices. Defaults to SHARED_DEVICES.
+            slots (int, optional): Maximum number of parameters of all devices.
+                Defaults to SHARED_SLOTS.
+            directory_size (int, optional): Directory capacity in bytes.
+                Defaults to SHARED_DIRECTORY_SIZE.
+            lang (str, optional): Units catalog language of readers. Defaults to "pl".
+        """
+        self.layout = _Layout(directory_size, devices, slots)
+        self.shm = SharedMemory(name, create=True, size=self.layout.size)
+        self.name = self.shm.name
+        self.lang = lang
+        self._buf = self.shm.buf
+        self._directory_sequence = 0
+        self._sequences = [0] * devices
+        # devid -> (device number, first slot, [(pool, field), ...])
+        self.devices: dict[str, tuple[int, int, list[tuple[int, int]]]] = {}
+        self._slots: dict[str, dict[tuple[int, int], int]] = {}
+        self._free_numbers = list(range(devices - 1, -1, -1))
+        self._free_slots: list[tuple[int, int]] = [(0, slots)]  # (start, length)
+        HEADER.pack_into(
+            self._buf, 0, MAGIC, LAYOUT_VERSION, 0, 0, 0, directory_size, devices, slots
+        )
+        self._begin_directory()
+        self._end_directory()
+
+    def _begin_directory(self) -> None:
+        """Marks directory and slots layout as changing, readers retry until it ends"""
+        self._directory_sequence += 1
+        SEQUENCE.pack_into(self._buf, DIRECTORY_SEQUENCE, self._directory_sequence)
+
+    def _end_directory(self) -> None:
+        directory = json.dumps(
+            {
+                "lang": self.lang,
+                "devices": {
+                    devid: [number, start, fields]
+                    for devid, (number, start, fields) in self.devices.items()
+                },
+            },
+            separators=(",", ":"),
+        ).encode()
+        if len(directory) > self.layout.directory_capacity:
+            raise ValueError("Shared memory directory is full")
+        start = self.layout.directory
+        self._buf[start : start + len(directory)] = directory
+        SEQUENCE.pack_into(self._buf, DIRECTORY_LENGTH, len(directory))
+        self._directory_sequence += 1
+        SEQUENCE.pack_into(self._buf, DIRECTORY_SEQUENCE, self._directory_sequence)
+
+    def _allocate(self, length: int) -> int:
+        for index, (start, free) in enumerate(self._free_slots):
+            if free >= length:
+                if free == length:
+                    del self._free_slots[index]
+                else:
+                    self._free_slots[index] = (start + length, free - length)
+                return start
+        raise ValueError("Shared memory slots are full")
+
+    def _release(self, devid: str) -> None:
+        number, start, fields = self.devices.pop(devid)
+        del self._slots[devid]
+        self._free_numbers.append(number)
+        self._free_slots.append((start, len(fields)))
+        self._free_slots.sort()
+        merged: list[tuple[int, int]] = []
+        for start, length in self._free_slots:
+            if merged and merged[-1][0] + merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], merged[-1][1] + length)
+            else:
+                merged.append((start, length))
+        self._free_slots = merged
+
+    def _write_values(self, devid: str, data: Any, keys: Iterable[tuple[int, int]]) -> None:
+        number = self.devices[devid][0]
+        slots, buf = self._slots[devid], self._buf
+        offset = self.layout.sequences + number * SEQUENCE.size
+        self._sequences[number] += 1  # odd, readers retry
+        SEQUENCE.pack_into(buf, offset, self._sequences[number])
+        for key in keys:
+            values = data.get(key[0], {}).get(key[1], {})
+            raw, unit = values.get("v"), values.get("u")
+            SLOT.pack_into(
+                buf,
+                self.layout.values + slots[key] * SLOT.size,
+                raw if isinstance(raw, (int, float)) else math.nan,
+                unit if isinstance(unit, (int, float)) else math.nan,
+            )
+        self._sequences[number] += 1
+        SEQUENCE.pack_into(buf, offset, self._sequences[number])
+
+    def device_updated(self, device: Device) -> None:
+        """Publishes all values of added device or device which pool was recreated"""
+        if device.pool is None:
+            return
+        devid, data = device.info.devid, device.pool.data
+        fields = [
+            (pool_no, field_no)
+            for pool_no, pool_fields in sorted(data.items())
+            for field_no, values in sorted(pool_fields.items())
+            if "v" in values
+        ]
+        current = self.devices.get(devid)
+        if current is not None and current[2] == fields:
+            self._write_values(devid, data, fields)
+            return
+        self._begin_directory()
+        try:
+            if current is not None:
+                self._release(devid)
+            if not self._free_numbers:
+                raise ValueError("Shared memory devices are full")
+            start = self._allocate(len(fields))
+            number = self._free_numbers.pop()
+            self.devices[devid] = (number, start, fields)
+            self._slots[devid] = {key: start + index for index, key in enumerate(fields)}
+            self._write_values(devid, data, fields)
+        except ValueError as error:
+            LOGGER.warning("%s, %s not published.", error, devid)
+        finally:
+            self._end_directory()
+
+    def device_removed(self, devid: str) -> None:
+        """Removes device from the directory"""
+        if devid in self.devices:
+            self._begin_directory()
+            self._release(devid)
+            self._end_directory()
+
+    def pool_changed(self, device: Device, changed: Iterable[tuple[int, int, str]]) -> None:
+        """Publishes changed values of device
+
+        Args:
+            device (Device): Changed device
+            changed (Iterable[tuple[int, int, str]]): Changed (pool, field, letter) triples
+        """
+        slots = self._slots.get(device.info.devid)
+        if slots is None:
+            return
+        keys = {
+            (pool_no, field_no) for pool_no, field_no, field_t in changed if field_t in ("v", "u")
+        }
+        if not keys:
+            return
+        if not keys.issubset(slots):  # new parameters, device is laid out again
+            self.device_updated(device)
+            return
+        self._write_values(device.info.devid, device.pool.data, keys)
+
+    def close(self) -> None:
+        """Closes and removes the segment, readers keep their mapping"""
+        self._buf = None
+        self.shm.close()
+        # Readers sharing the resource tracker of this process dropped its registration
+        name = self.shm._name  # pylint: disable=protected-access
+        resource_tracker.register(name, "shared_memory")
+        self.shm.unlink()
+
+    def __enter__(self) -> SharedPoolPublisher:
+        return self
+
+    def __exit__(self, *_exc_info: Any) -> None:
+        self.close()
+
+
+class SharedPoolReader:
+    """Reads pool values published by `SharedPoolPublisher` in another process
+
+    Reads never block the publisher, copies are retried while the device is being written.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Attaches to published segment
+
+        Args:
+            name (str): Segment name
+
+        Raises:
+            ValueError: When segment is not a pool publication of known layout version
+        """
+        self.shm = _attach(name)
+        self._buf = self.shm.buf
+        magic, version, _, _, _, directory, devices, slots = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported shared memory layout {magic!r} v{version}")
+        self.layout = _Layout(directory, devices, slots)
+        self._directory: dict[str, Any] = {}
+        self._directory_sequence = -1
+        self.retries = 0  # reads repeated because of concurrent write
+
+    def _read_sequence(self, offset: int) -> int:
+        """Returns even sequence, waiting while the writer holds it odd"""
+        for _ in range(READ_RETRIES):
+            if not (sequence := SEQUENCE.unpack_from(self._buf, offset)[0]) % 2:
+                return sequence
+            self.retries += 1
+            time.sleep(0)
+        raise TimeoutError("Shared memory writer did not finish writing")
+
+    @property
+    def directory(self) -> dict[str, Any]:
+        """Returns published devices: ID -> [device number, first slot, [[pool, field], ...]]"""
+        for _ in range(READ_RETRIES):
+            sequence = self._read_sequence(DIRECTORY_SEQUENCE)
+            if sequence == self._directory_sequence:
+                return self._directory["devices"]
+            length = SEQUENCE.unpack_from(self._buf, DIRECTORY_LENGTH)[0]
+            start = self.layout.directory
+            data = bytes(self._buf[start : start + length])
+            if SEQUENCE.unpack_from(self._buf, DIRECTORY_SEQUENCE)[0] == sequence:
+                self._directory = json.loads(data)
+                self._directory_sequence = sequence
+                return self._directory["devices"]
+            self.retries += 1
+        raise TimeoutError("Shared memory directory is changing too often")
+
+    @property
+    def device_ids(self) -> list[str]:
+        """Returns IDs of published devices."""
+        return list(self.directory)
+
+    def read_raw(self, devid: str) -> dict[tuple[int, int], tuple[ValueType, Optional[int]]]:
+        """Returns consistent copy of device raw values
+
+        Args:
+            devid (str): Device ID
+
+        Raises:
+            KeyError: When device is not published
+
+        Returns:
+            dict[tuple[int, int], tuple[ValueType, Optional[int]]]: Raw value and unit by
+                (pool, field), NaN value if it is not numeric
+        """
+        for _ in range(READ_RETRIES):
+            number, first, fields = self.directory[devid]
+            directory_sequence = self._directory_sequence
+            offset = self.layout.sequences + number * SEQUENCE.size
+            sequence = self._read_sequence(offset)
+            start = self.layout.values + first * SLOT.size
+            slots = self._buf[start : start + len(fields) * SLOT.size].cast("d").tolist()
+            if (
+                SEQUENCE.unpack_from(self._buf, offset)[0] == sequence
+                and SEQUENCE.unpack_from(self._buf, DIRECTORY_SEQUENCE)[0] == directory_sequence
+            ):
+                return {
+                    (pool_no, field_no): (_number(slots[2 * index]), _unit(slots[2 * index + 1]))
+                    for index, (pool_no, field_no) in enumerate(fields)
+                }
+            self.retries += 1
+        raise TimeoutError(f"Shared memory values of {devid} are changing too often")
+
+    def read(self, devid: str) -> PoolValueType:
+        """Returns consistent copy of device real values
+
+        Args:
+            devid (str): Device ID
+
+        Returns:
+            PoolValueType: Real values by pool and field number
+        """
+        raw_values = self.read_raw(devid)
+        codec = get_unit(self._directory.get("lang", "pl"))
+        result: PoolValueType = {}
+        for (pool_no, field_no), (raw, unit) in raw_values.items():
+            result.setdefault(pool_no, {})[field_no] = codec.converter(unit).decode(raw)
+        return result
+
+    def get_value(self, devid: str, pool_no: int, field_no: int) -> Optional[ValueType]:
+        """Returns real value of device pool parameter, None if it is not published"""
+        if devid not in self.directory:
+            return None
+        return self.read(devid).get(pool_no, {}).get(field_no)
+
+    def close(self) -> None:
+        """Detaches from the segment"""
+        self._buf = None
+        self.shm.close()
+
+    def __enter__(self) -> SharedPoolReader:
+        return self
+
+    def __exit__(self, *_exc_info: Any) -> None:
+        self.close()
+
+
+def _number(value: float) -> ValueType:
+    return int(value) if value.is_integer() else value
+
+
+def _unit(value: float) -> Optional[int]:
+    return None if math.isnan(value) else int(value)
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attaches to segment, without resource tracker removing it when this process exits
+
+    Before Python 3.13 attaching always registers the segment, so it is unregistered at once.
+    """
+    try:
+        return SharedMemory(name, track=False)  # type: ignore[call-arg]
+    except TypeError:  # Python < 3.13 always tracks attached segments
+        pass
+    shm = SharedMemory(name)
+    resource_tracker.unregister(shm._name, "shared_memory")  # pylint: disable=protected-access
+    return shm
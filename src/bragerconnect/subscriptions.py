@@ -0,0 +1,165 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Pool parameters subscriptions
+"""
+from __future__ import annotations
+
+from asyncio import TimerHandle, get_running_loop
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Callable, Iterable, Optional
+
+from .const import LOGGER
+from .models.device import MISSING, PoolValueType, ValueType
+
+SubscriptionKey = tuple[str, int, int]  # (device ID, pool, field)
+SubscriptionCallback = Callable[[str, int, int, ValueType], None]  # devid, pool, field, value
+
+
+@dataclass(eq=False)
+class Subscription:
+    """Subscription of one pool parameter value with deadband and minimum interval"""
+
+    key: SubscriptionKey
+    callback: SubscriptionCallback
+    deadband: float = 0.0  # minimum change of numeric value, absolute or percent
+    percent: bool = False
+    min_interval: float = 0.0  # seconds between notifications, later changes are deferred
+    last_value: Any = field(default=MISSING, repr=False)  # last notified value
+    last_time: float = field(default=float("-inf"), repr=False)
+    pending: Optional[TimerHandle] = field(default=None, repr=False)
+    pending_value: Any = field(default=MISSING, repr=False)
+
+    def passes(self, value: ValueType) -> bool:
+        """Returns True when value differs enough from the last notified one
+
+        Args:
+            value (ValueType): New value
+
+        Returns:
+            bool: True if subscriber should be notified
+        """
+        old = self.last_value
+        if old is MISSING:
+            return True
+        if value == old:
+            return False
+        if not self.deadband or not (
+            isinstance(value, (int, float)) and isinstance(old, (int, float))
+        ):
+            return True
+        band = abs(old) * self.deadband / 100 if self.percent else self.deadband
+        return abs(value - old) >= band
+
+
+class SubscriptionIndex:
+    """Subscriptions indexed by (device, pool, field), so changes wake only subscribers of
+    changed parameters
+    """
+
+    def __init__(self) -> None:
+        self._index: dict[SubscriptionKey, list[Subscription]] = {}
+        self.delivered = 0
+        self.suppressed = 0  # changes filtered by deadband or deferred by minimum interval
+
+    def __len__(self) -> int:
+        return sum(map(len, self._index.values()))
+
+    def subscribe(
+        self,
+        devid: str,
+        pool_no: int,
+        field_no: int,
+        callback: SubscriptionCallback,
+        deadband: float = 0.0,
+        percent: bool = False,
+        min_interval: float = 0.0,
+    ) -> Callable[[], None]:
+        """Subscribes pool parameter value changes
+
+        Args:
+            devid (str): Device ID
+            pool_no (int): Pool number
+            field_no (int): Field number
+            callback (SubscriptionCallback): Called with device ID, pool, field and real value
+            deadband (float, optional): Minimum change of numeric value. Defaults to 0.0.
+            percent (bool, optional): Deadband is percent of the last value. Defaults to False.
+            min_interval (float, optional): Minimum seconds between notifications, the last
+                change is notified when interval ends. Defaults to 0.0.
+
+        Returns:
+            Callable[[], None]: Function removing the subscription
+        """
+        key = (devid, pool_no, field_no)
+        subscription = Subscription(key, callback, deadband, percent, min_interval)
+        self._index.setdefault(key, []).append(subscription)
+
+        def unsubscribe() -> None:
+            if subscription.pending is not None:
+                subscription.pending.cancel()
+            subscriptions = self._index[key]
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del self._index[key]
+
+        return unsubscribe
+
+    def notify(
+        self, devid: str, changed: Iterable[tuple[int, int, str]], values: PoolValueType
+    ) -> None:
+        """Notifies subscribers of changed parameters
+
+        Args:
+            devid (str): Device ID
+            changed (Iterable[tuple[int, int, str]]): Changed (pool, field, letter) triples,
+                as returned by `Pool.update`
+            values (PoolValueType): Device pool real values
+        """
+        if not self._index:
+            return
+        index, seen = self._index, set()
+        for pool_no, field_no, field_t in changed:
+            if field_t not in ("v", "u") or (pool_no, field_no) in seen:
+                continue
+            seen.add((pool_no, field_no))
+            subscriptions = index.get((devid, pool_no, field_no))
+            if subscriptions is None:
+                continue
+            value = values.get(pool_no, {}).get(field_no, MISSING)
+            if value is MISSING:
+                continue
+            for subscription in list(subscriptions):
+                self._offer(subscription, value)
+
+    def _offer(self, subscription: Subscription, value: ValueType) -> None:
+        if subscription.pending is not None:  # only the latest value is notified
+            subscription.pending_value = value
+            self.suppressed += 1
+            return
+        if not subscription.passes(value):
+            self.suppressed += 1
+            return
+        wait = subscription.last_time + subscription.min_interval - monotonic()
+        if wait > 0:
+            subscription.pending_value = value
+            subscription.pending = get_running_loop().call_later(wait, self._flush, subscription)
+            self.suppressed += 1
+            return
+        self._deliver(subscription, value)
+
+    def _flush(self, subscription: Subscription) -> None:
+        subscription.pending = None
+        value, subscription.pending_value = subscription.pending_value, MISSING
+        if value is not MISSING and subscription.passes(value):
+            self._deliver(subscription, value)
+
+    def _deliver(self, subscription: Subscription, value: ValueType) -> None:
+        subscription.last_value = value
+        subscription.last_time = monotonic()
+        self.delivered += 1
+        devid, pool_no, field_no = subscription.key
+        try:
+            subscription.callback(devid, pool_no, field_no, value)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("Error in P%s.%s subscriber.", pool_no, field_no)
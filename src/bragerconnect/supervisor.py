@@ -0,0 +1,381 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Multi-process sharded gateway
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+from typing import Any, Callable, Optional, Sequence
+
+from .const import ACCOUNT_RETRY, ACCOUNT_RETRY_MAX, DELTA_INTERVAL, LOGGER
+from .exceptions import AuthError
+from .gateway import Gateway
+from .models.device import PoolValueType, ValueType, parse_field_name
+from .models.websocket import RequestMessage, WorkerType
+from .websocket import Connection
+
+DeltaType = dict[str, dict[tuple[int, int], ValueType]]  # devid -> (pool, field) -> value
+DeltaCallback = Callable[[str, dict[tuple[int, int], ValueType]], None]
+
+
+@dataclass
+class Account:
+    """BragerConnect account served by a worker process"""
+
+    username: str
+    password: str
+    options: dict[str, Any] = field(default_factory=dict)  # `Connection` keyword arguments
+
+
+@dataclass
+class WorkerProcess:
+    """Worker process state kept by the coordinator"""
+
+    number: int
+    process: Any  # multiprocessing.Process
+    commands: Any  # multiprocessing.Queue
+    results: Any  # receiving end of the worker own pipe
+    accounts: set[int] = field(default_factory=set)
+
+
+def _worker_main(number: int, commands: Any, results: Any, interval: float, retry: float) -> None:
+    """Worker process entry point"""
+    try:
+        asyncio.run(_async_worker(number, commands, results, interval, retry))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _async_worker(
+    number: int, commands: Any, results: Any, interval: float, retry: float
+) -> None:
+    """Serves accounts sent by the coordinator, streaming real values of changed parameters
+
+    Messages are sent to the worker own pipe by a sending thread, so the event loop is not
+    blocked and killed worker can not leave a lock shared with other workers acquired.
+    Changes are collected for `interval` seconds, only the last value of every parameter
+    is sent. Accounts which failed to log in or to update devices are retried after `retry`
+    seconds, doubled after every failure up to ACCOUNT_RETRY_MAX (authentication errors are
+    not retried).
+    """
+    loop = asyncio.get_running_loop()
+    sender = ThreadPoolExecutor(1, "bragerconnect-sender")  # keeps messages order
+    gateways: dict[int, Gateway] = {}
+    pending: DeltaType = {}
+    flush: list[Optional[asyncio.TimerHandle]] = [None]
+
+    def send_delta() -> None:
+        flush[0] = None
+        delta = dict(pending)
+        pending.clear()
+        sender.submit(results.send, ("delta", number, delta))
+
+    def send_devices(account_no: int) -> None:
+        gateway = gateways[account_no]
+        devices = {  # copied, the pipe pickles it in another thread
+            str(device): {pool_no: dict(fields) for pool_no, fields in device.pool.value.items()}
+            for device in gateway.device
+            if device.pool is not None
+        }
+        sender.submit(results.send, ("devices", number, account_no, devices))
+
+    def on_pool_data_changed(gateway: Gateway, wrkfnc: RequestMessage) -> None:
+        # Called after gateway listener, so device pool is already updated
+        *data, devid = wrkfnc.args
+        device = gateway.get_device(devid)
+        if device is None or device.pool is None:
+            return
+        values = device.pool.value
+        delta = pending.setdefault(devid, {})
+        for change in data.pop():
+            field_no, field_t = parse_field_name(change["field"])
+            if field_t not in ("v", "u"):
+                continue
+            pool_no = parse_field_name(change["pool"])[0]
+            if (value := values.get(pool_no, {}).get(field_no)) is not None:
+                delta[(pool_no, field_no)] = value
+        if flush[0] is None:
+            flush[0] = loop.call_later(interval, send_delta)
+
+    async def add_account(account_no: int, account: Account) -> None:
+        delay = retry
+        while True:
+            gateway = Gateway(Connection(account.username, account.password, **account.options))
+            conn = gateway.conn
+            conn.add_listener(
+                WorkerType.POOL_DATA_CHANGED.value,
+                lambda wrkfnc, gateway=gateway: on_pool_data_changed(gateway, wrkfnc),
+            )
+            try:
+                await gateway.__aenter__()
+                await gateway.async_update_devices()
+                break
+            except Exception as error:  # pylint: disable=broad-except
+                await conn.close()
+                sender.submit(results.send, ("error", number, account_no, repr(error)))
+                if isinstance(error, AuthError):
+                    return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, ACCOUNT_RETRY_MAX)
+        gateways[account_no] = gateway
+        send_devices(account_no)
+
+        async def update_devices() -> None:
+            await gateway.async_update_devices()
+            send_devices(account_no)
+
+        conn.add_listener(
+            WorkerType.MODULE_LIST_CHANGED.value,
+            lambda _wrkfnc: loop.create_task(update_devices()),
+        )
+
+    tasks: set[asyncio.Task] = set()
+    while (command := await loop.run_in_executor(None, commands.get)) is not None:
+        task = loop.create_task(add_account(*command))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    for task in tasks:
+        task.cancel()
+    if flush[0] is not None:
+        flush[0].cancel()
+        send_delta()
+    for gateway in gateways.values():
+        await gateway.conn.close()
+    sender.shutdown()
+
+
+class ShardedGateway:
+    """Coordinator of worker processes, each running gateways of its share of accounts
+
+    Workers parse messages and update pools, sending back only real values of changed
+    parameters, merged into `values` by `poll`. Accounts of a dead worker are moved to the
+    least loaded live workers (a new worker is started when none is left). Failed accounts
+    are retried by their workers, `errors` holds the last error until the account is served.
+    """
+
+    def __init__(
+        self,
+        accounts: Sequence[Account],
+        workers: Optional[int] = None,
+        interval: float = DELTA_INTERVAL,
+        context: Optional[str] = None,
+        retry: float = ACCOUNT_RETRY,
+    ) -> None:
+        """Coordinator of worker processes
+
+        Args:
+            accounts (Sequence[Account]): Served accounts
+            workers (Optional[int], optional): Number of worker processes, None for number of
+                CPUs (at most number of accounts). Defaults to None.
+            interval (float, optional): Seconds workers collect changes before sending them.
+                Defaults to DELTA_INTERVAL.
+            context (Optional[str], optional): Multiprocessing start method, eg. "spawn",
+                None for the platform default. Defaults to None.
+            retry (float, optional): Seconds before workers retry failed account, doubled
+                after every failure. Defaults to ACCOUNT_RETRY.
+        """
+        self.accounts = list(accounts)
+        self.workers_count = max(1, min(workers or os.cpu_count() or 1, len(self.accounts)))
+        self.interval = interval
+        self.retry = retry
+        self._context = multiprocessing.get_context(context)
+        self._next_number = 0
+        self.workers: dict[int, WorkerProcess] = {}
+        self.values: dict[str, PoolValueType] = {}  # merged fleet view, by device ID
+        self.device_account: dict[str, int] = {}
+        self.stale: set[str] = set()  # devices of moved accounts, until worker sends them
+        self.errors: dict[int, str] = {}  # last error by account number
+        self.changes = 0  # received changed parameters
+        self._listeners: list[DeltaCallback] = []
+
+    def start(self) -> ShardedGateway:
+        """Starts worker processes and assigns accounts round robin
+
+        Returns:
+            ShardedGateway: Self
+        """
+        for _ in range(self.workers_count):
+            self._start_worker()
+        numbers = list(self.workers)
+        for account_no in range(len(self.accounts)):
+            self._assign(account_no, self.workers[numbers[account_no % len(numbers)]])
+        return self
+
+    def _start_worker(self) -> WorkerProcess:
+        number, self._next_number = self._next_number, self._next_number + 1
+        commands = self._context.Queue()
+        results, writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(number, commands, writer, self.interval, self.retry),
+            name=f"bragerconnect-worker-{number}",
+            daemon=True,
+        )
+        process.start()
+        writer.close()  # only the worker writes, reading fails with EOFError when it exits
+        worker = self.workers[number] = WorkerProcess(number, process, commands, results)
+        return worker
+
+    def _assign(self, account_no: int, worker: WorkerProcess) -> None:
+        worker.accounts.add(account_no)
+        worker.commands.put((account_no, self.accounts[account_no]))
+
+    def add_listener(self, callback: DeltaCallback) -> Callable[[], None]:
+        """Adds listener called with device ID and changed values by (pool, field)
+
+        Returns:
+            Callable[[], None]: Function removing the listener
+        """
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+
+    def get_value(self, devid: str, pool_no: int, field_no: int) -> Optional[ValueType]:
+        """Returns real value of device pool parameter from the merged view"""
+        return self.values.get(devid, {}).get(pool_no, {}).get(field_no)
+
+    def check_workers(self) -> list[int]:
+        """Moves accounts of dead workers to live ones
+
+        Returns:
+            list[int]: Numbers of dead workers
+        """
+        dead = [number for number, worker in self.workers.items() if not worker.process.is_alive()]
+        for number in dead:
+            worker = self.workers.pop(number)
+            self._receive(worker)  # messages sent before it exited
+            worker.results.close()
+            LOGGER.warning(
+                "Worker %s exited (code %s), moving %s accounts.",
+                number,
+                worker.process.exitcode,
+                len(worker.accounts),
+            )
+            self.stale.update(
+                devid for devid, account_no in self.device_account.items()
+                if account_no in worker.accounts
+            )
+            for account_no in sorted(worker.accounts):
+                if not self.workers:
+                    self._start_worker()
+                target = min(self.workers.values(), key=lambda worker: len(worker.accounts))
+                self._assign(account_no, target)
+        return dead
+
+    def poll(self, timeout: float = 0.0) -> int:
+        """Applies messages received from workers and checks workers
+
+        Args:
+            timeout (float, optional): Seconds to wait for the first message.
+                Defaults to 0.0.
+
+        Returns:
+            int: Number of received messages
+        """
+        received = 0
+        workers = {worker.results: worker for worker in self.workers.values()}
+        for results in wait(list(workers), timeout):
+            received += self._receive(workers[results])
+        self.check_workers()
+        return received
+
+    def _receive(self, worker: WorkerProcess) -> int:
+        """Applies all messages waiting in the worker pipe
+
+        Returns:
+            int: Number of received messages
+        """
+        received = 0
+        try:
+            while worker.results.poll():
+                self._handle(worker.results.recv())
+                received += 1
+        except (EOFError, OSError):  # worker exited, possibly in the middle of a message
+            pass
+        return received
+
+    def _handle(self, message: tuple) -> None:
+        kind, number, *args = message
+        if kind == "delta":
+            for devid, delta in args[0].items():
+                values = self.values.setdefault(devid, {})
+                for (pool_no, field_no), value in delta.items():
+                    values.setdefault(pool_no, {})[field_no] = value
+                self.changes += len(delta)
+                for callback in list(self._listeners):
+                    try:
+                        callback(devid, delta)
+                    except Exception:  # pylint: disable=broad-except
+                        LOGGER.exception("Error in sharded gateway listener.")
+        elif kind == "devices":
+            account_no, devices = args
+            for devid in [
+                devid for devid, owner in self.device_account.items() if owner == account_no
+            ]:
+                if devid not in devices:
+                    del self.device_account[devid]
+                    self.values.pop(devid, None)
+            for devid, values in devices.items():
+                self.values[devid] = values
+                self.device_account[devid] = account_no
+                self.stale.discard(devid)
+            self.errors.pop(account_no, None)
+        elif kind == "error":
+            account_no, error = args
+            self.errors[account_no] = error
+            LOGGER.error("Worker %s failed to serve account %s: %s", number, account_no, error)
+
+    async def async_run(self, stop: asyncio.Event) -> None:
+        """Polls workers messages until stopped
+
+        Args:
+            stop (asyncio.Event): Stop event
+        """
+        while not stop.is_set():
+            if not self.poll():
+                await asyncio.sleep(self.interval)
+
+    def wait(self, predicate: Callable[[], bool], timeout: float) -> bool:
+        """Polls workers messages until predicate is true
+
+        Args:
+            predicate (Callable[[], bool]): Condition, eg. all devices received
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            bool: True if predicate became true
+        """
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if (left := deadline - time.monotonic()) <= 0:
+                return False
+            self.poll(min(left, self.interval))
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops worker processes, killing those not stopped within timeout"""
+        for worker in self.workers.values():
+            worker.commands.put(None)
+        deadline = time.monotonic() + timeout
+        for worker in self.workers.values():
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+        for worker in self.workers.values():
+            self._receive(worker)
+            worker.results.close()
+        self.workers.clear()
+
+    def __enter__(self) -> ShardedGateway:
+        return self.start()
+
+    def __exit__(self, *_exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,393 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Synchronous (blocking) facade of the asynchronous client
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, TimeoutError as FutureTimeoutError
+from functools import partial
+from threading import Event, Lock, Thread, get_ident
+from typing import Any, Callable, Coroutine, Optional, TypeVar, Union
+
+from .cache import SnapshotCache
+from .const import LOGGER
+from .gateway import Gateway
+from .models.device import Device, PendingWrite, ValueType
+from .models.websocket import JsonType, ListenerType, Priority
+from .websocket import Connection
+
+T = TypeVar("T")
+
+
+class LoopThread:
+    """Event loop running forever in a dedicated daemon thread
+
+    Any thread can submit coroutines and functions to the loop and block until they finish,
+    all connections and gateways created in the loop are used only from its thread.
+    """
+
+    def __init__(self, name: str = "bragerconnect") -> None:
+        """Event loop running forever in a dedicated daemon thread
+
+        Args:
+            name (str, optional): Thread name. Defaults to "bragerconnect".
+        """
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._thread_id: Optional[int] = None
+        self._lock = Lock()
+
+    @property
+    def running(self) -> bool:
+        """Returns True if the loop thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> LoopThread:
+        """Starts the loop thread, does nothing when already running
+
+        Returns:
+            LoopThread: Self
+        """
+        with self._lock:
+            if self.running:
+                return self
+            started = Event()
+            self.loop = asyncio.new_event_loop()
+            self._thread = Thread(target=self._run, args=(started,), name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+        return self
+
+    def _run(self, started: Event) -> None:
+        loop = self.loop
+        asyncio.set_event_loop(loop)
+        self._thread_id = get_ident()
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+            self._thread_id = None
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the loop, cancelling its remaining tasks, and waits for the thread
+
+        Args:
+            timeout (Optional[float], optional): Seconds to wait for the thread.
+                Defaults to None.
+        """
+        with self._lock:
+            if not self.running:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Runs coroutine in the loop and waits for its result
+
+        Args:
+            coro (Coroutine[Any, Any, T]): Coroutine
+            timeout (Optional[float], optional): Seconds to wait, the coroutine is cancelled
+                when exceeded. Defaults to None.
+
+        Raises:
+            RuntimeError: When called from the loop thread (it would block forever)
+            TimeoutError: When timeout is exceeded
+
+        Returns:
+            T: Coroutine result
+        """
+        if get_ident() == self._thread_id:
+            coro.close()
+            raise RuntimeError("Blocking call from the event loop thread.")
+        if not self.running:
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+    def call(self, func: Callable[..., T], *args: Any) -> T:
+        """Calls function in the loop thread and waits for its result
+
+        Used to create objects requiring running loop and to read state changed by the loop.
+
+        Args:
+            func (Callable[..., T]): Function
+            *args (Any): Function arguments
+
+        Returns:
+            T: Function result
+        """
+
+        async def call() -> T:
+            return func(*args)
+
+        return self.run(call())
+
+    def call_soon(self, func: Callable[..., Any], *args: Any) -> None:
+        """Schedules function call in the loop thread, without waiting"""
+        if get_ident() == self._thread_id:
+            func(*args)
+        elif self.running:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    def __enter__(self) -> LoopThread:
+        return self.start()
+
+    def __exit__(self, *_exc_info: Any) -> None:
+        self.stop()
+
+
+_shared_loop_thread: Optional[LoopThread] = None
+_shared_lock = Lock()
+
+
+def get_loop_thread() -> LoopThread:
+    """Returns loop thread shared by all synchronous gateways, started on first use"""
+    global _shared_loop_thread  # pylint: disable=global-statement
+    with _shared_lock:
+        if _shared_loop_thread is None:
+            _shared_loop_thread = LoopThread()
+        return _shared_loop_thread.start()
+
+
+class SyncGateway:
+    """Blocking facade of `Gateway`, for scripts and threads without event loop
+
+    Connection and gateway live in the loop thread, every method submits work to it and
+    waits. Many gateways (accounts) can share one loop thread. Push, subscription and rollback
+    callbacks are called in the loop thread, or in `executor` when given, and must not block
+    the loop.
+    """
+
+    def __init__(
+        self,
+        username: str = "",
+        password: str = "",
+        loop_thread: Optional[LoopThread] = None,
+        cache: Optional[SnapshotCache] = None,
+        timeout: Optional[float] = None,
+        executor: Optional[Executor] = None,
+        connection_factory: Optional[Callable[[], Connection]] = None,
+        **connection_kwargs: Any,
+    ) -> None:
+        """Blocking facade of `Gateway`
+
+        Args:
+            username (str, optional): BragerConnect username. Defaults to "".
+            password (str, optional): BragerConnect password. Defaults to "".
+            loop_thread (Optional[LoopThread], optional): Loop thread, None for the shared
+                one. Defaults to None.
+            cache (Optional[SnapshotCache], optional): Local snapshot cache. Defaults to None.
+            timeout (Optional[float], optional): Seconds every blocking call waits,
+                None to wait until done. Defaults to None.
+            executor (Optional[Executor], optional): Executor calling callbacks, None to call
+                them in the loop thread. Defaults to None.
+            connection_factory (Optional[Callable[[], Connection]], optional): Function
+                creating connection in the loop thread, eg. `ModbusConnection`, None for
+                `Connection(username, password, **connection_kwargs)`. Defaults to None.
+            **connection_kwargs (Any): `Connection` arguments
+        """
+        self.loop_thread = loop_thread.start() if loop_thread is not None else get_loop_thread()
+        self.timeout = timeout
+        self.executor = executor
+        if connection_factory is None:
+            connection_factory = partial(Connection, username, password, **connection_kwargs)
+        self.gateway: Gateway = self.loop_thread.call(
+            lambda: Gateway(connection_factory(), cache)
+        )
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        return self.loop_thread.run(coro, self.timeout)
+
+    def _callback(self, callback: Callable[..., Any]) -> Callable[..., None]:
+        """Wraps callback, so it is called in the executor"""
+        if self.executor is None:
+            return callback
+        executor = self.executor
+
+        def submit(*args: Any) -> None:
+            future = executor.submit(callback, *args)
+            future.add_done_callback(_log_callback_error)
+
+        return submit
+
+    def connect(self) -> SyncGateway:
+        """Loads cached devices and connects to BragerConnect service
+
+        Returns:
+            SyncGateway: Self
+        """
+        self._run(self.gateway.__aenter__())
+        return self
+
+    def close(self) -> None:
+        """Closes connection, the loop thread keeps running"""
+        self._run(self.gateway.__aexit__(None, None, None))
+
+    def update_devices(self) -> list[str]:
+        """Updates all devices from BragerConnect service
+
+        Returns:
+            list[str]: Device IDs
+        """
+        self._run(self.gateway.async_update_devices())
+        return self.device_ids
+
+    @property
+    def device_ids(self) -> list[str]:
+        """Returns IDs of gateway devices."""
+        return self.loop_thread.call(lambda: [str(device) for device in self.gateway.device])
+
+    def get_value(self, devid: str, pool_no: int, field_no: int) -> Optional[ValueType]:
+        """Returns real value of device pool parameter
+
+        Args:
+            devid (str): Device ID
+            pool_no (int): Pool number
+            field_no (int): Field number
+
+        Returns:
+            Optional[ValueType]: Value, None when device or parameter does not exist
+        """
+
+        def get_value() -> Optional[ValueType]:
+            device = self.gateway.get_device(devid)
+            if device is None or device.pool is None:
+                return None
+            return device.pool.value.get(pool_no, {}).get(field_no)
+
+        return self.loop_thread.call(get_value)
+
+    def get_values(self, devid: str) -> dict[int, dict[int, ValueType]]:
+        """Returns copy of all real values of device pool
+
+        Args:
+            devid (str): Device ID
+
+        Returns:
+            dict[int, dict[int, ValueType]]: Values by pool and field number
+        """
+
+        def get_values() -> dict[int, dict[int, ValueType]]:
+            device = self.gateway.get_device(devid)
+            if device is None or device.pool is None:
+                return {}
+            return {pool_no: dict(fields) for pool_no, fields in device.pool.value.items()}
+
+        return self.loop_thread.call(get_values)
+
+    def set_pool_param(
+        self, devid: str, pool_no: int, field_no: Union[int, str], value: ValueType
+    ) -> Optional[int]:
+        """Sets raw pool parameter value on the device
+
+        Args:
+            devid (str): Device ID
+            pool_no (int): Pool number
+            field_no (Union[int, str]): Field number (`v` field) or field name, eg. "a4"
+            value (ValueType): Raw value
+
+        Raises:
+            KeyError: When device does not exist
+            ValueError: When value is out of the field range
+
+        Returns:
+            Optional[int]: Server task number
+        """
+        device: Optional[Device] = self.loop_thread.call(self.gateway.get_device, devid)
+        if device is None:
+            raise KeyError(devid)
+        return self._run(device.async_set_pool_param(pool_no, field_no, value))
+
+    def request(
+        self,
+        wrkfnc_name: str,
+        wrkfnc_args: Optional[list[Any]] = None,
+        priority: Optional[Priority] = None,
+    ) -> JsonType:
+        """Sends request to the server and waits for the response
+
+        Args:
+            wrkfnc_name (str): Function name, eg. "s_getTaskQueue"
+            wrkfnc_args (Optional[list[Any]], optional): Function parameters. Defaults to None.
+            priority (Optional[Priority], optional): Sending priority. Defaults to None.
+
+        Returns:
+            JsonType: Server response
+        """
+        return self._run(
+            self.gateway.conn.async_request(wrkfnc_name, wrkfnc_args, priority=priority)
+        )
+
+    def add_listener(self, wrkfnc_name: str, callback: ListenerType) -> Callable[[], None]:
+        """Registers callback called for every push received from the server
+
+        Args:
+            wrkfnc_name (str): Push name, eg. `poolDataChanged`
+            callback (ListenerType): Function called with the received request message
+
+        Returns:
+            Callable[[], None]: Function removing the listener, from any thread
+        """
+        remove = self.loop_thread.call(
+            self.gateway.conn.add_listener, wrkfnc_name, self._callback(callback)
+        )
+        return partial(self.loop_thread.call_soon, remove)
+
+    def subscribe(
+        self, devid: str, pool_no: int, field_no: int, callback: Callable[..., None], **kwargs
+    ) -> Callable[[], None]:
+        """Subscribes pool parameter value changes, see `Gateway.subscribe`
+
+        Args:
+            devid (str): Device ID
+            pool_no (int): Pool number
+            field_no (int): Field number
+            callback (Callable[..., None]): Called with device ID, pool, field and real value
+            **kwargs: `deadband`, `percent` and `min_interval`
+
+        Returns:
+            Callable[[], None]: Function removing the subscription, from any thread
+        """
+        unsubscribe = self.loop_thread.call(
+            partial(self.gateway.subscribe, **kwargs),
+            devid,
+            pool_no,
+            field_no,
+            self._callback(callback),
+        )
+        return partial(self.loop_thread.call_soon, unsubscribe)
+
+    def add_rollback_listener(
+        self, callback: Callable[[Device, PendingWrite], None]
+    ) -> Callable[[], None]:
+        """Adds listener of local writes rolled back, see `Gateway.add_rollback_listener`
+
+        Returns:
+            Callable[[], None]: Function removing the listener, from any thread
+        """
+        remove = self.loop_thread.call(self.gateway.add_rollback_listener, self._callback(callback))
+        return partial(self.loop_thread.call_soon, remove)
+
+    def __enter__(self) -> SyncGateway:
+        return self.connect()
+
+    def __exit__(self, *_exc_info: Any) -> None:
+        self.close()
+
+
+def _log_callback_error(future: Any) -> None:
+    if (error := future.exception()) is not None:
+        LOGGER.error("Error in callback: %s", error, exc_info=error)
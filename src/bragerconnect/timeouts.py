@@ -0,0 +1,105 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Adaptive request timeouts
+"""
+from __future__ import annotations
+
+from collections import deque
+
+from .const import (
+    FAST_FAIL_TIMEOUTS,
+    RTT_MIN_SAMPLES,
+    RTT_SAMPLES,
+    TIMEOUT,
+    TIMEOUT_FACTOR,
+    TIMEOUT_MAX,
+    TIMEOUT_MIN,
+)
+
+
+class AdaptiveTimeout:
+    """Request timeouts computed from measured round-trip times
+
+    Timeout of a request is its 99th percentile of recent round-trip times multiplied by
+    `factor` and bounded by `minimum` and `maximum`. Until enough round-trips are measured,
+    `default` is used. Timed out requests are counted as taking the whole timeout, so
+    timeouts grow when the service slows down.
+    """
+
+    def __init__(
+        self,
+        default: float = TIMEOUT,
+        minimum: float = TIMEOUT_MIN,
+        maximum: float = TIMEOUT_MAX,
+        factor: float = TIMEOUT_FACTOR,
+        samples: int = RTT_SAMPLES,
+        fail_after: int = FAST_FAIL_TIMEOUTS,
+    ) -> None:
+        """Request timeouts computed from measured round-trip times
+
+        Args:
+            default (float, optional): Timeout of requests without enough measurements.
+                Defaults to TIMEOUT.
+            minimum (float, optional): Minimum timeout. Defaults to TIMEOUT_MIN.
+            maximum (float, optional): Maximum timeout. Defaults to TIMEOUT_MAX.
+            factor (float, optional): Multiplier of the round-trip time percentile.
+                Defaults to TIMEOUT_FACTOR.
+            samples (int, optional): Number of recent round-trips kept by request name.
+                Defaults to RTT_SAMPLES.
+            fail_after (int, optional): Consecutive timeouts after which connection is
+                considered failing. Defaults to FAST_FAIL_TIMEOUTS.
+        """
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.samples = samples
+        self.fail_after = fail_after
+        self.timeouts = 0  # consecutive timeouts
+        self._rtt: dict[str, deque[float]] = {}
+
+    @property
+    def failing(self) -> bool:
+        """Returns True when the recent requests all timed out."""
+        return self.timeouts >= self.fail_after
+
+    def timeout(self, name: str) -> float:
+        """Returns timeout of the request
+
+        Args:
+            name (str): Request name
+
+        Returns:
+            float: Timeout in seconds
+        """
+        rtt = self._rtt.get(name)
+        if rtt is None or len(rtt) < RTT_MIN_SAMPLES:
+            return self.default
+        ordered = sorted(rtt)
+        percentile = ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)]
+        return min(self.maximum, max(self.minimum, percentile * self.factor))
+
+    def record(self, name: str, rtt: float) -> None:
+        """Records round-trip time of answered request
+
+        Args:
+            name (str): Request name
+            rtt (float): Round-trip time in seconds
+        """
+        self._rtt.setdefault(name, deque(maxlen=self.samples)).append(rtt)
+        self.timeouts = 0
+
+    def record_timeout(self, name: str, timeout: float) -> None:
+        """Records timed out request
+
+        Args:
+            name (str): Request name
+            timeout (float): Timeout the request waited
+        """
+        self._rtt.setdefault(name, deque(maxlen=self.samples)).append(timeout)
+        self.timeouts += 1
+
+    def reset(self) -> None:
+        """Clears consecutive timeouts, eg. after reconnecting"""
+        self.timeouts = 0
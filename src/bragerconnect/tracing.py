@@ -0,0 +1,156 @@
+"""
+Python library to connect BragerConnect and Home Assistant to work together.
+
+Tracing hooks
+"""
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+from typing import Any, Optional
+
+from .const import LOGGER, SLOW_OPERATION
+
+
+class Span:
+    """Timed operation, with optional marks of its phases ends"""
+
+    __slots__ = ("tracer", "name", "attrs", "start", "end", "marks")
+
+    def __init__(
+        self, tracer: Tracer, name: str, attrs: dict[str, Any], start: Optional[float] = None
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = start if start is not None else 0.0
+        self.end = 0.0
+        self.marks: list[tuple[str, float]] = []
+
+    @property
+    def duration(self) -> float:
+        """Returns span duration in seconds."""
+        return self.end - self.start
+
+    def mark(self, phase: str, time: Optional[float] = None) -> None:
+        """Marks end of the operation phase, eg. "parsed"
+
+        Args:
+            phase (str): Phase name
+            time (Optional[float], optional): `perf_counter()` time the phase ended, None for
+                now. Defaults to None.
+        """
+        self.marks.append((phase, time if time is not None else perf_counter()))
+
+    def __enter__(self) -> Span:
+        if not self.start:
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *_exc_info: Any) -> None:
+        self.end = perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.finish(self)
+
+
+class _NullSpan:
+    """Span doing nothing, shared by all operations when tracing is off"""
+
+    __slots__ = ()
+
+    def mark(self, phase: str, time: Optional[float] = None) -> None:
+        """Does nothing"""
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *_exc_info: Any) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Tracer doing nothing, base class of tracers
+
+    Traced operations:
+        request: `Connection.async_request`, from queuing to response (attrs: name,
+            marks: limited, queued, sent)
+        message: received message, from receiving the frame to processing it (attrs: size,
+            marks: dequeued, parsed, handled)
+        listener: push listener call (attrs: name, listener)
+        pool.update: `Gateway` pool update with pushed changes (attrs: devid, changes)
+        device.create: `Device.create` (attrs: devid, marks: activated, fetched, created)
+
+    Subclasses set `enabled` and override `finish` to consume finished spans.
+    """
+
+    enabled = False
+
+    def span(self, name: str, /, start: Optional[float] = None, **attrs: Any) -> Any:
+        """Starts timing operation, use as context manager
+
+        Args:
+            name (str): Operation name
+            start (Optional[float], optional): `perf_counter()` time the operation started,
+                None for now. Defaults to None.
+            attrs (Any): Operation attributes
+
+        Returns:
+            Any: Span, or shared no-op span when tracer is not enabled
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs, start)
+
+    def finish(self, span: Span) -> None:
+        """Called with every finished span
+
+        Args:
+            span (Span): Finished span
+        """
+
+
+NULL_TRACER = Tracer()
+
+
+class SlowOperationLogger(Tracer):
+    """Tracer logging operations longer than threshold, with their phases durations"""
+
+    enabled = True
+
+    def __init__(
+        self,
+        threshold: float = SLOW_OPERATION,
+        logger: Optional[logging.Logger] = None,
+        level: int = logging.WARNING,
+    ) -> None:
+        """Tracer logging operations longer than threshold, with their phases durations
+
+        Args:
+            threshold (float, optional): Seconds. Defaults to SLOW_OPERATION.
+            logger (Optional[logging.Logger], optional): Logger, None for the package logger.
+                Defaults to None.
+            level (int, optional): Logging level. Defaults to logging.WARNING.
+        """
+        self.threshold = threshold
+        self.logger = logger if logger is not None else LOGGER
+        self.level = level
+
+    def finish(self, span: Span) -> None:
+        if span.duration < self.threshold:
+            return
+        phases, last = [], span.start
+        for phase, time in span.marks:
+            phases.append(f"{phase} +{(time - last) * 1000:.1f} ms")
+            last = time
+        self.logger.log(
+            self.level,
+            "Slow %s %s: %.1f ms (%s)",
+            span.name,
+            span.attrs,
+            span.duration * 1000,
+            ", ".join(phases),
+        )
@@ -6,9 +6,22 @@ Asynchronous WebSocket client
 from __future__ import annotations
 
 import json
+from concurrent.futures import Executor
 from socket import gaierror as GetAddressInfoError
 from threading import Lock
-from asyncio import AbstractEventLoop, get_running_loop, wait_for, CancelledError
+from asyncio import (
+    FIRST_COMPLETED,
+    AbstractEventLoop,
+    CancelledError,
+    Future,
+    Queue,
+    Task,
+    TimeoutError as AsyncTimeoutError,
+    get_running_loop,
+    wait,
+    wait_for,
+)
+from time import perf_counter
 from typing import Any, Coroutine, Optional, Final, Literal, Union, Awaitable, Callable
 
 from aiohttp import ClientWebSocketResponse, ClientSession, WSMsgType
@@ -21,9 +34,24 @@ from .models.websocket import (
     ResponseMessage,
     ResponseType,
     JsonType,
+    ListenerType,
+    Priority,
+    QueueStats,
+    REQUEST_PRIORITY,
+    RESPONSE_INVALIDATION,
+    RESPONSE_TTL,
+    SchedulerStats,
 )
 from .exceptions import MessageException, AuthError
-from .const import LOGGER, HOST, TIMEOUT
+from .const import LOGGER, HOST, MAX_IN_FLIGHT, OFFLOAD_SIZE, QUEUE_SIZE
+from .cache import ResponseCache
+from .ratelimit import RateLimiter
+from .scheduler import OutboundScheduler
+from .timeouts import AdaptiveTimeout
+from .tracing import NULL_SPAN, NULL_TRACER, Tracer
+
+
+_MISSING = object()
 
 
 class Connection:
@@ -35,19 +63,64 @@ class Connection:
         password: str,
         language: str = "en",
         loop: Optional[AbstractEventLoop] = None,
+        host: str = HOST,
+        queue_size: int = QUEUE_SIZE,
+        workers: int = 1,
+        executor: Optional[Executor] = None,
+        offload_size: int = OFFLOAD_SIZE,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        rate_limiter: Optional[RateLimiter] = None,
+        response_ttl: Optional[dict[str, float]] = None,
+        timeouts: Optional[AdaptiveTimeout] = None,
+        tracer: Optional[Tracer] = None,
     ) -> None:
         """Main class for handling connections with BragerConnect.
 
         Args:
             loop (Optional[asyncio.AbstractEventLoop], optional): Event loop. Defaults to None.
+            host (str, optional): WebSocket server URL. Defaults to HOST.
+            queue_size (int, optional): Maximum number of received, not processed messages.
+                Defaults to QUEUE_SIZE.
+            workers (int, optional): Number of messages processing tasks. Defaults to 1.
+            executor (Optional[Executor], optional): Executor decoding large frames and pools,
+                None for the loop default (thread pool) executor. Defaults to None.
+            offload_size (int, optional): Minimum frame length decoded in executor.
+                Defaults to OFFLOAD_SIZE.
+            max_in_flight (int, optional): Maximum number of requests waiting for response,
+                next requests are queued and sent by priority. Defaults to MAX_IN_FLIGHT.
+            rate_limiter (Optional[RateLimiter], optional): Requests rate limiter of this
+                connection, None for no limits. Defaults to None.
+            response_ttl (Optional[dict[str, float]], optional): Seconds responses are cached
+                by request name, None for RESPONSE_TTL. Defaults to None.
+            timeouts (Optional[AdaptiveTimeout], optional): Request timeouts, None for default
+                AdaptiveTimeout. Defaults to None.
+            tracer (Optional[Tracer], optional): Tracer of requests and received messages,
+                None for no tracing. Defaults to None.
         """
-        self._host: str = HOST
+        self._host: str = host
         self._username: str = username
         self._password: str = password
         self._language: str = language
 
         self._loop = loop if loop is not None else get_running_loop()
         self._responses: ResponseType = {}
+        self._sent: dict[int, Future] = {}  # resolved with time when request was sent
+        self._listeners: dict[str, list[ListenerType]] = {}
+        self._queue_size = queue_size
+        self._workers = workers
+        self._queue: Queue[Optional[tuple[str, float]]] = Queue(queue_size)  # frame, received
+        self._queue_stats = QueueStats()
+        self._reader_task: Optional[Task] = None
+        self._worker_tasks: list[Task] = []
+        self.executor = executor
+        self.offload_size = offload_size
+        self._scheduler = OutboundScheduler(self._async_send_frame, max_in_flight)
+        self._sender_task: Optional[Task] = None
+        self.rate_limiter = rate_limiter
+        self.response_ttl = response_ttl if response_ttl is not None else RESPONSE_TTL
+        self.response_cache = ResponseCache()
+        self.timeouts = timeouts if timeouts is not None else AdaptiveTimeout()
+        self.tracer = tracer if tracer is not None else NULL_TRACER
         self._messages_counter: int = -2
         self._messages_counter_thread_lock: Lock = Lock()
 
@@ -96,6 +169,8 @@ class Connection:
             return
 
         LOGGER.info("Connecting to BragerConnect WebSocket server.")
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
         try:
             self._session = ClientSession()
             self._client = await self._session.ws_connect(url=self._host)
@@ -113,13 +188,14 @@ class Connection:
             ) from exception
 
         LOGGER.debug("Waiting for READY_SIGNAL.")
-        message = await self._client.receive_json(timeout=TIMEOUT)
+        message = await self._client.receive_json(timeout=self.timeouts.default)
         LOGGER.debug("Message received. (%s)", message)
         wrkfnc = Message.from_json(message)
 
         if wrkfnc.mtype == MessageType.READY_SIGNAL:
             LOGGER.debug("Got READY_SIGNAL, sending back, connection ready.")
             await self._client.send_json(message)
+            self.timeouts.reset()
         else:
             LOGGER.exception("Received message is not a READY_SIGNAL, exiting")
             raise RuntimeError(
@@ -127,8 +203,13 @@ class Connection:
                 "READY_SIGNAL was expected."
             )
 
-        LOGGER.info("Creating task for received messages processing")
-        self._loop.create_task(self._async_process_messages())
+        LOGGER.info("Creating tasks for received messages reading and processing")
+        self._queue = Queue(self._queue_size)
+        self._worker_tasks = [
+            self._loop.create_task(self._async_process_messages()) for _ in range(self._workers)
+        ]
+        self._reader_task = self._loop.create_task(self._async_read_messages())
+        self._sender_task = self._loop.create_task(self._scheduler.async_run())
 
         await self._async_login(self._username, self._password)
 
@@ -169,55 +250,174 @@ class Connection:
             # IDEA: could be a `bc_web` or `ht_app` - what does it mean?
         )
 
-    async def _async_process_messages(self) -> None:
-        """Main function that processes incoming messages from Websocket."""
+    async def _async_read_messages(self) -> None:
+        """Reads frames from WebSocket and puts them into the processing queue.
 
+        Frames are not parsed here, so reading is not delayed by messages processing. Every
+        frame is queued with the time it was received.
+        """
+        queue = self._queue
+        stats = self._queue_stats
         async for message in self._client:
             if message.type == WSMsgType.TEXT:
-                try:
-                    wrkfnc = Message.from_text(message.data)
-                except MessageException:
-                    LOGGER.error("Received message type is not known, skipping...")
-                    continue
-                if isinstance(wrkfnc, ResponseMessage):
-                    # It is a response for request sent
-                    LOGGER.debug("Received response: %s", message.data)
-                    if len(self._responses) > 0:
-                        self._responses.pop(wrkfnc.number).set_result(wrkfnc)
-                elif isinstance(wrkfnc, RequestMessage):
-                    # It is a request
-                    LOGGER.debug("Received request: %s(%s)", wrkfnc.name, wrkfnc.args)
-                    if wrkfnc.name == "poolDataChanged":
-                        *data, devid = wrkfnc.args
-                        data = data.pop()
-                        LOGGER.debug("Updating %s pool data... (data: %s)", devid, data)
-                        # TODO: update pool data
-                    elif wrkfnc.name == "":
-                        pass
+                stats.received += 1
+                received = perf_counter()
+                if queue.full():
+                    stats.full += 1
+                    await queue.put((message.data, received))
+                    stats.blocked_time += perf_counter() - received
                 else:
-                    LOGGER.debug("Received unknown message: %s", message.data)
+                    queue.put_nowait((message.data, received))
+                stats.max_depth = max(stats.max_depth, queue.qsize())
             elif message.type == WSMsgType.ERROR:
                 LOGGER.info("WebSocket message error.")
                 continue
-            elif message.type == WSMsgType.CLOSE or WSMsgType.CLOSED or WSMsgType.CLOSING:
+            elif message.type in (WSMsgType.CLOSE, WSMsgType.CLOSED, WSMsgType.CLOSING):
                 break
 
         LOGGER.info("WebSocket connection lost.")
+        self.response_cache.clear()  # pushes invalidating responses could be missed
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+        error = ConnectionError("BragerConnect connection lost.")
+        self._scheduler.fail_queued(error)
+        for future in (*self._responses.values(), *self._sent.values()):  # already sent
+            if not future.done():
+                future.set_exception(error)
+        for _ in self._worker_tasks:
+            await queue.put(None)
         if self.reconnect:
             await self.connect()
 
+    async def _async_process_messages(self) -> None:
+        """Worker that processes incoming messages from the processing queue."""
+        queue = self._queue
+        while (item := await queue.get()) is not None:
+            data, received = item
+            try:
+                with self.tracer.span("message", start=received, size=len(data)) as span:
+                    span.mark("dequeued")
+                    if len(data) < self.offload_size:
+                        wrkfnc = self._parse_message(data)
+                    else:
+                        # Worker waits for the executor, so the messages order is kept
+                        wrkfnc = await self.async_offload(self._parse_message, data)
+                    span.mark("parsed")
+                    self._process_message(wrkfnc)
+                    span.mark("handled")
+            except Exception:  # pylint: disable=broad-except
+                # Worker must keep consuming the queue, otherwise the reader blocks forever
+                LOGGER.exception("Error while processing received message, skipping...")
+            finally:
+                self._queue_stats.processed += 1
+                queue.task_done()
+        queue.task_done()
+
+    @staticmethod
+    def _parse_message(data: str) -> Optional[Message]:
+        """Parses received frame
+
+        Args:
+            data (str): Received frame
+
+        Returns:
+            Optional[Message]: Parsed message, None if message is not known
+        """
+        try:
+            return Message.from_text(data)
+        except MessageException:
+            LOGGER.error("Received message type is not known, skipping...")
+            return None
+        except ValueError:
+            LOGGER.error("Received malformed message, skipping... (%.100s)", data)
+            return None
+
+    def _process_message(self, wrkfnc: Optional[Message]) -> None:
+        """Resolves waiting request or dispatches received message to listeners.
+
+        Args:
+            wrkfnc (Optional[Message]): Parsed message
+        """
+        if isinstance(wrkfnc, ResponseMessage):
+            # It is a response for request sent
+            LOGGER.debug("Received response: %s(%s)", wrkfnc.number, wrkfnc.response)
+            future = self._responses.pop(wrkfnc.number, None)
+            if future is not None and not future.done():
+                future.set_result(wrkfnc)
+        elif isinstance(wrkfnc, RequestMessage):
+            # It is a request
+            LOGGER.debug("Received request: %s(%s)", wrkfnc.name, wrkfnc.args)
+            self._dispatch(wrkfnc)
+        elif wrkfnc is not None:
+            LOGGER.debug("Received unknown message: %s", wrkfnc)
+
+    async def async_offload(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs CPU heavy function (decoding) in executor, not blocking the event loop
+
+        Args:
+            func (Callable[..., Any]): Function to run
+            args (Any): Function arguments
+
+        Returns:
+            Any: Function result
+        """
+        return await self._loop.run_in_executor(self.executor, func, *args)
+
+    @property
+    def scheduler_stats(self) -> SchedulerStats:
+        """Returns outgoing requests scheduler statistics."""
+        return self._scheduler.stats
+
+    @property
+    def queue_stats(self) -> QueueStats:
+        """Returns received messages processing queue statistics."""
+        self._queue_stats.depth = self._queue.qsize()
+        return self._queue_stats
+
+    def add_listener(self, wrkfnc_name: str, callback: ListenerType) -> Callable[[], None]:
+        """Registers callback called for every request (push) received from the server
+
+        Args:
+            wrkfnc_name (str): Request name, eg. `poolDataChanged`
+            callback (ListenerType): Function called with the received request message
+
+        Returns:
+            Callable[[], None]: Function removing the listener
+        """
+        listeners = self._listeners.setdefault(wrkfnc_name, [])
+        listeners.append(callback)
+        return lambda: listeners.remove(callback)
+
+    def _dispatch(self, wrkfnc: RequestMessage) -> None:
+        """Calls listeners registered for received request
+
+        Args:
+            wrkfnc (RequestMessage): Received request
+        """
+        self._invalidate_responses(wrkfnc.name)
+        tracer = self.tracer
+        for callback in self._listeners.get(wrkfnc.name, ()):
+            try:
+                with tracer.span("listener", name=wrkfnc.name, listener=callback):
+                    callback(wrkfnc)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error in %s listener.", wrkfnc.name)
+
     async def _async_send_request(
         self,
         wrkfnc_name: str,
         wrkfnc_args: Optional[list] = None,
         wrkfnc_type: MessageType = MessageType.FUNCTION_EXEC,
+        priority: Optional[Priority] = None,
     ) -> int:
-        """Sends message. JSON formatted
+        """Queues message for sending. JSON formatted
 
         Args:
             wrkfnc_name (str): Function name to execute on server side
             wrkfnc_args (Optional[list], optional): Function parameters list. Defaults to None.
             wrkfnc_type (MessageType, optional): Message type. Defaults to FUNCTION_EXEC.
+            priority (Optional[Priority], optional): Sending priority, None for the request
+                default from REQUEST_PRIORITY. Defaults to None.
 
         Returns:
             int: Sent messade ID
@@ -233,35 +433,80 @@ class Connection:
             }
         )
 
-        LOGGER.debug("Sending request: %s", message)
-        await self._client.send_str(message)
+        LOGGER.debug("Queuing request: %s", message)
+        if priority is None:
+            priority = REQUEST_PRIORITY.get(wrkfnc_name, Priority.READ)
+        # Registered before sending, the response may arrive before we start waiting for it
+        response = self._responses[message_id] = self._loop.create_future()
+        sent = self._sent[message_id] = self._loop.create_future()
+        self._scheduler.submit(priority, message, response, sent)
 
         return message_id
 
-    async def _async_wait_response(self, message_id: int) -> JsonType:
+    async def _async_send_frame(self, data: str) -> None:
+        """Sends frame to WebSocket, called by the scheduler
+
+        Args:
+            data (str): Frame to send
+        """
+        LOGGER.debug("Sending request: %s", data)
+        await self._client.send_str(data)
+
+    async def _async_wait_response(
+        self, message_id: int, wrkfnc_name: str = "", span: Any = NULL_SPAN
+    ) -> JsonType:
         """Waiting to receive response for message `message_id`
 
+        Timeout and round-trip time are measured from the moment the request was sent, not
+        queued, so requests waiting in the scheduler do not time out before being sent.
+
         Args:
             message_id (int): Message ID number.
+            wrkfnc_name (str, optional): Request name, its timeout is used. Defaults to "".
+            span (Any, optional): Request tracing span, marked when request was sent.
+                Defaults to NULL_SPAN.
 
         Raises:
             BragerError: When timeout occurs.
+            ConnectionError: When connection is lost before the response is received.
 
         Returns:
             JsonType: (str) Received message
         """
 
+        response = self._responses.setdefault(message_id, self._loop.create_future())
+        sent = self._sent.pop(message_id, None)
         try:
+            if sent is not None and not sent.done():
+                # Time spent in the scheduler queue is not a part of the timeout and round-trip
+                try:
+                    await wait((sent, response), return_when=FIRST_COMPLETED)
+                except CancelledError:
+                    response.cancel()
+                    raise
+            timeout = self.timeouts.timeout(wrkfnc_name)
+            # Failed `sent` (connection lost) carries the same error as the response
+            if sent is not None and sent.done() and sent.exception() is None:
+                start = sent.result()
+                span.mark("sent", start)
+            else:
+                start = perf_counter()
             res: ResponseMessage = await wait_for(
-                self._responses.setdefault(message_id, self._loop.create_future()),
-                TIMEOUT,
+                response, max(timeout - (perf_counter() - start), 0)
             )
-        except TimeoutError as exception:
-            LOGGER.exception("Timed out while processing request response.")
+        except AsyncTimeoutError as exception:  # not the builtin before Python 3.11
+            self.timeouts.record_timeout(wrkfnc_name, timeout)
+            LOGGER.exception(
+                "Timed out (%.1f s) while processing %s response.", timeout, wrkfnc_name
+            )
+            if self.timeouts.failing and self.connected:
+                LOGGER.warning("Recent requests all timed out, dropping connection.")
+                await self._client.close()
             raise RuntimeError(
                 "Timed out while processing request response from BragerConnect service."
             ) from exception
         else:
+            self.timeouts.record(wrkfnc_name, perf_counter() - start)
             if res.mtype == MessageType.EXCEPTION:
                 LOGGER.exception("Exception response received.")
                 await self.close()
@@ -272,6 +517,8 @@ class Connection:
                         "Exception occured while processing request response. (%s)",
                         str(res.response),
                     )
+        finally:
+            self._responses.pop(message_id, None)
 
         LOGGER.debug("Response value: %s", res.response)
         return res.response
@@ -281,6 +528,7 @@ class Connection:
         wrkfnc_name: str,
         wrkfnc_args: Optional[list[str]] = None,
         wrkfnc_type: MessageType = MessageType.FUNCTION_EXEC,
+        priority: Optional[Priority] = None,
     ) -> JsonType:
         """Sends a request to perform request on server side and waits for the response.
 
@@ -288,13 +536,44 @@ class Connection:
             wrkfnc_name (str): Function name to execute.
             wrkfnc_args (Optional[list], optional): Function parameters list. Defaults to None.
             wrkfnc_type (MessageType, optional): Message type. Defaults to FUNCTION_EXEC.
+            priority (Optional[Priority], optional): Sending priority. Defaults to None.
 
         Returns:
             JsonType: Server response
         """
-        return await self._async_wait_response(
-            await self._async_send_request(wrkfnc_name, wrkfnc_args, wrkfnc_type),
-        )
+        if (ttl := self.response_ttl.get(wrkfnc_name)) is not None:
+            key = (wrkfnc_name, json.dumps(wrkfnc_args or []))
+            if (response := self.response_cache.get(key, _MISSING)) is not _MISSING:
+                LOGGER.debug("Cached response of %s: %s", wrkfnc_name, response)
+                return response
+
+        if self.timeouts.failing:
+            raise ConnectionError(
+                "BragerConnect service is not responding, recent requests all timed out."
+            )
+        with self.tracer.span("request", name=wrkfnc_name) as span:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.async_acquire(wrkfnc_name)
+                span.mark("limited")
+            message_id = await self._async_send_request(
+                wrkfnc_name, wrkfnc_args, wrkfnc_type, priority
+            )
+            span.mark("queued")
+            response = await self._async_wait_response(message_id, wrkfnc_name, span)
+
+        if ttl is not None:
+            self.response_cache.set(key, response, ttl)
+        self._invalidate_responses(wrkfnc_name)
+        return response
+
+    def _invalidate_responses(self, wrkfnc_name: str) -> None:
+        """Removes cached responses outdated by sent or received request
+
+        Args:
+            wrkfnc_name (str): Request name
+        """
+        for name in RESPONSE_INVALIDATION.get(wrkfnc_name, ()):
+            self.response_cache.invalidate(name)
 
     async def async_get_device_id_list(self) -> list[JsonType]:
         """Gets a list of dictionaries with information about devices from the server.
@@ -324,17 +603,22 @@ class Connection:
         self.active_device_id = str(await self.async_request("s_getActiveDevid", []))
         return self.active_device_id
 
-    async def async_set_active_device_id(self, device_id: str) -> bool:
+    async def async_set_active_device_id(
+        self, device_id: str, priority: Optional[Priority] = None
+    ) -> bool:
         """Sets the ID of the active device on the server
 
         Args:
             device_id (str): Device ID to set active
+            priority (Optional[Priority], optional): Sending priority. Defaults to None.
 
         Returns:
             bool: True if setting was successfull, otherwise False
         """
         LOGGER.debug("Setting active device id to: %s.", device_id)
-        result = await self.async_request("s_setActiveDevid", [device_id]) is True
+        result = (
+            await self.async_request("s_setActiveDevid", [device_id], priority=priority) is True
+        )
         self.active_device_id = device_id
         return result
 
@@ -346,10 +630,28 @@ class Connection:
         """TODO: docstring"""
         return await self.async_request("s_setUserVariable", [variable_name, value])
 
-    async def async_get_all_pool_data(self) -> JsonType:
+    async def async_get_all_pool_data(self, priority: Optional[Priority] = None) -> JsonType:
         """TODO: docstring"""
         LOGGER.debug("Getting pool data for %s.", self._active_device_id)
-        return await self.async_request("s_getAllPoolData", [])
+        return await self.async_request("s_getAllPoolData", [], priority=priority)
+
+    async def async_set_pool_param(
+        self, pool_no: int, field_no: Union[int, str], value: Union[int, float, str]
+    ) -> Optional[int]:
+        """Sets pool parameter of the active device
+
+        Args:
+            pool_no (int): Pool number
+            field_no (Union[int, str]): Field number (`v` field) or field name, eg. "a4"
+            value (Union[int, float, str]): Raw value
+
+        Returns:
+            Optional[int]: Server task number
+        """
+        LOGGER.debug(
+            "Setting P%s.%s to %s for %s.", pool_no, field_no, value, self._active_device_id
+        )
+        return await self.async_request("s_setPoolParam", [pool_no, field_no, value])
 
     async def async_get_task_queue(self) -> JsonType:
         """TODO: docstring"""
@@ -373,12 +675,12 @@ class Connection:
 
     async def close(self) -> None:
         """Close WebSocket connection."""
-        if not self._client or not self.connected:
+        if not self._client or self._session.closed:
             return
         LOGGER.info("Disconnecting from BragerConnect service.")
         self._reconnect = False
 
-        await self._client.close()
+        await self._client.close()  # does nothing when WebSocket was already dropped
         await self._session.close()
 
     async def __aenter__(self) -> Connection:
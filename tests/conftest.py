@@ -0,0 +1,14 @@
+"""Shared fixtures for `bragerconnect` tests."""
+import json
+from pathlib import Path
+
+import pytest
+
+MATERIALS = Path(__file__).parent.parent / "materiały"
+
+
+@pytest.fixture
+def pool_data():
+    """`s_getAllPoolData` response captured from a real device."""
+    with open(MATERIALS / "parametry.json", "r", encoding="utf-8") as file:
+        return json.load(file)
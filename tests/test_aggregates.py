@@ -0,0 +1,42 @@
+"""Tests for `bragerconnect.aggregates` module."""
+import copy
+
+import pytest
+
+from bragerconnect.aggregates import AggregateIndex, FleetAggregate
+from bragerconnect.models.device import Device, DeviceInfo, Pool
+
+
+def make_device(devid, pool_data, distr_group="ht"):
+    """Device with pool created from pool data copy."""
+    device = Device(None, DeviceInfo("user", None, devid, distr_group=distr_group))
+    device.pool = Pool(init_data=copy.deepcopy(pool_data))
+    return device
+
+
+def test_fleet_aggregates(pool_data):
+    """Aggregates follow added, changed and removed devices without rescanning."""
+    index = AggregateIndex()
+    devices = [make_device(f"DEV{no}", pool_data) for no in range(3)]
+    temperature = index.add(FleetAggregate(4, 0, predicate=lambda value: value > 70), devices[:2])
+    models = index.add(FleetAggregate(group_by="model"), devices[:2])
+    groups = index.add(FleetAggregate(4, 0, group_by="distr_group"), devices[:2])
+    assert (temperature.total.count, temperature.total.mean) == (2, 65.5)
+
+    index.device_updated(devices[2])
+    changed = devices[0].pool.update(
+        [{"pool": "P4", "field": "v0", "value": 80}, {"pool": "P11", "field": "v4", "value": "X"}]
+    )
+    index.pool_changed(devices[0], changed)
+
+    assert temperature.total.sum == pytest.approx(80 + 65.5 * 2)
+    assert temperature.total.matching == 1
+    assert {model: bucket.devices for model, bucket in models.groups.items()} == {
+        "DasPell GL 37 V1+": 2,
+        "X": 1,
+    }
+    assert groups.groups["ht"].count == 3
+
+    index.device_removed("DEV0")
+    assert (temperature.total.devices, temperature.total.matching) == (2, 0)
+    assert set(models.groups) == {"DasPell GL 37 V1+"}
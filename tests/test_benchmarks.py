@@ -0,0 +1,44 @@
+"""Hot paths benchmarks suite of `bragerconnect.bench`.
+
+Runs with quick parameters by default, set BRAGERCONNECT_BENCH=full for full parameters and
+BRAGERCONNECT_BENCH_OUTPUT=results.json to save results, comparable with `bragerconnect bench
+--compare results.json`.
+"""
+import json
+import os
+
+import pytest
+
+from bragerconnect.bench import SUITE, Regression, compare_results, flatten, run_suite
+
+QUICK = os.environ.get("BRAGERCONNECT_BENCH") != "full"
+RESULTS = {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def save_results():
+    """Saves results of all benchmarks when BRAGERCONNECT_BENCH_OUTPUT is set."""
+    yield
+    if (output := os.environ.get("BRAGERCONNECT_BENCH_OUTPUT")) and RESULTS:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(RESULTS, file, indent=2)
+
+
+@pytest.mark.parametrize("name", list(SUITE))
+def test_benchmark(name, pool_data):
+    """Every hot path benchmark returns positive timings."""
+    results = run_suite([name], QUICK, pool_data)
+    RESULTS.setdefault("meta", results["meta"])
+    RESULTS[name] = results[name]
+    metrics = flatten({name: results[name]})
+    assert metrics and all(value > 0 for value in metrics.values())
+
+
+def test_compare_results():
+    """Slower timings and lower throughput beyond threshold are regressions."""
+    baseline = {"meta": {}, "parse": {"min": 1.0, "mean": 1.0}, "trip": {"1": {"rps": 100.0}}}
+    current = {"meta": {}, "parse": {"min": 1.1, "mean": 9.0}, "trip": {"1": {"rps": 50.0}}}
+    assert compare_results(baseline, current, threshold=0.2) == [
+        Regression("trip.1.rps", 100.0, 50.0)
+    ]
+    assert compare_results(baseline, baseline) == []
@@ -2,36 +2,76 @@
 
 """Tests for `bragerconnect` package."""
 
-import pytest
+import asyncio
+import json
 
 from click.testing import CliRunner
 
-from bragerconnect import bragerconnect
 from bragerconnect import cli
+from bragerconnect.mock_server import MockServer
+from bragerconnect.sync import LoopThread
 
 
-@pytest.fixture
-def response():
-    """Sample pytest fixture.
+def test_command_line_interface():
+    """Test the CLI."""
+    runner = CliRunner()
+    help_result = runner.invoke(cli.main, ["--help"])
+    assert help_result.exit_code == 0
+    assert "monitor" in help_result.output
+    result = runner.invoke(cli.main, ["monitor", "--account", "no-password"])
+    assert result.exit_code == 2
+    assert "USERNAME:PASSWORD" in result.output
 
-    See more at: http://doc.pytest.org/en/latest/fixture.html
-    """
-    # import requests
-    # return requests.get('https://github.com/audreyr/cookiecutter-pypackage')
 
+def test_monitor(pool_data):
+    """Monitor streams filtered pool changes and task events as NDJSON."""
 
-def test_content(response):
-    """Sample pytest test function with the pytest fixture as an argument."""
-    # from bs4 import BeautifulSoup
-    # assert 'GitHub' in BeautifulSoup(response.content).title.string
+    async def push(server, stop):
+        value = 0
+        while not stop.is_set():
+            if server.clients:
+                value += 1
+                changes = [
+                    {"pool": "P4", "field": "v0", "value": value},
+                    {"pool": "P6", "field": "v0", "value": value},
+                ]
+                await server.push_changes("FTTCTBSLCE", changes)
+                await server.push("taskSuccessConfirmation", [value, "FTTCTBSLCE"])
+            await asyncio.sleep(0.02)
 
+    with LoopThread() as loop_thread:
+        server = MockServer({"FTTCTBSLCE": pool_data})
+        url = loop_thread.run(server.start())
+        stop = loop_thread.call(asyncio.Event)
+        pusher = asyncio.run_coroutine_threadsafe(push(server, stop), loop_thread.loop)
+        result = CliRunner().invoke(
+            cli.main,
+            ["monitor", "-a", "bench:bench", "--host", url, "-p", "4", "--duration", "0.5"],
+        )
+        loop_thread.call(stop.set)
+        pusher.result(5)
+        loop_thread.run(server.stop())
 
-def test_command_line_interface():
-    """Test the CLI."""
-    runner = CliRunner()
-    result = runner.invoke(cli.main)
-    assert result.exit_code == 0
-    assert 'bragerconnect.cli.main' in result.output
-    help_result = runner.invoke(cli.main, ['--help'])
-    assert help_result.exit_code == 0
-    assert '--help  Show this message and exit.' in help_result.output
+    assert result.exit_code == 0, result.output
+    events = [json.loads(line) for line in result.output.splitlines()]
+    pool_events = [event for event in events if event["event"] == "pool"]
+    assert pool_events and {(event["pool"], event["field"]) for event in pool_events} == {(4, 0)}
+    assert pool_events[-1]["value"] == pool_events[-1]["raw"]
+    assert any(event["event"] == "task" and event["devid"] == "FTTCTBSLCE" for event in events)
+
+
+def test_bench_regressions(tmp_path):
+    """Bench command saves results and fails on regressions against baseline."""
+    output = tmp_path / "results.json"
+    args = ["bench", "--quick", "-b", "delta_application", "-o", str(output)]
+    result = CliRunner().invoke(cli.main, args)
+    assert result.exit_code == 0, result.output
+    baseline = json.loads(output.read_text(encoding="utf-8"))
+    assert baseline["delta_application"]["min"] > 0
+
+    baseline["delta_application"]["min"] /= 10
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+    result = CliRunner().invoke(cli.main, [*args, "--compare", str(baseline_path)])
+    assert result.exit_code == 1
+    assert "REGRESSION delta_application.min" in result.output
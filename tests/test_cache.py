@@ -0,0 +1,70 @@
+"""Tests for `bragerconnect.cache` module."""
+import asyncio
+import time
+
+from bragerconnect.cache import ResponseCache, Snapshot, SnapshotCache
+from bragerconnect.gateway import Gateway
+from bragerconnect.models.device import Device, DeviceInfo, catalog_version
+from bragerconnect.websocket import Connection
+
+
+def test_snapshot_round_trip(tmp_path, pool_data):
+    """Stored snapshot is loaded back, pools are decoded on first access."""
+    cache = SnapshotCache.for_account(tmp_path, "user@example.com")
+    info = {"username": "user", "sharedfrom_name": None, "devid": "FTTCTBSLCE"}
+    snapshot = Snapshot("pl-0", devices={"FTTCTBSLCE": info}, pools={"FTTCTBSLCE": pool_data})
+    cache.save(snapshot)
+
+    loaded = cache.load()
+    assert loaded.catalog == "pl-0"
+    assert loaded.devices == {"FTTCTBSLCE": info}
+
+    device = Device(None, DeviceInfo(**info)).load(loaded.pools["FTTCTBSLCE"])
+    assert device.stale
+    assert device.pool.data[4][0]["v"] == 65.5
+    assert device.raw_pool_data == pool_data
+
+
+def test_gateway_cache_catalog_version(tmp_path, pool_data):
+    """Snapshot saved with other catalogs version is discarded by the gateway."""
+    cache = SnapshotCache(tmp_path / "account.bcache")
+    info = {"username": "user", "sharedfrom_name": None, "devid": "FTTCTBSLCE"}
+
+    async def load(catalog):
+        cache.save(Snapshot(catalog, devices={"FTTCTBSLCE": info}, pools={"FTTCTBSLCE": pool_data}))
+        gateway = Gateway(Connection("user", "password"), cache, lang="pl")
+        return gateway.load_cache(), gateway
+
+    loaded, gateway = asyncio.run(load(catalog_version("pl")))
+    assert loaded and gateway.get_device("FTTCTBSLCE").lang == "pl"
+    gateway.save_cache()
+    assert cache.load().catalog == catalog_version("pl")
+
+    loaded, gateway = asyncio.run(load("pl-00000000"))
+    assert not loaded and not gateway.device
+
+
+def test_snapshot_missing_or_invalid(tmp_path):
+    """Missing or corrupted cache file is ignored."""
+    cache = SnapshotCache(tmp_path / "missing.bcache")
+    assert cache.load() is None
+
+    cache.path.write_bytes(b"garbage")
+    assert cache.load() is None
+
+
+def test_response_cache(monkeypatch):
+    """Entries expire after TTL, are invalidated by request name and evicted when full."""
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = ResponseCache(size=2)
+    cache.set(("s_getUserVariable", '["a"]'), "a", ttl=10)
+    cache.set(("s_getUserVariable", '["b"]'), "b", ttl=20)
+    assert cache.get(("s_getUserVariable", '["a"]')) == "a"
+    cache.set(("s_getMyDevIdList", "[]"), [], ttl=10)  # evicts least recently used "b"
+    assert cache.get(("s_getUserVariable", '["b"]')) is None
+    now[0] += 10
+    assert cache.get(("s_getUserVariable", '["a"]'), "expired") == "expired"
+    cache.set(("s_getMyDevIdList", "[]"), [], ttl=10)
+    cache.invalidate("s_getMyDevIdList")
+    assert len(cache) == 0
@@ -0,0 +1,224 @@
+"""Tests for `bragerconnect.models.device` module."""
+import asyncio
+import copy
+
+import pytest
+
+from bragerconnect.gateway import Gateway
+from bragerconnect.mock_server import MockServer
+from bragerconnect.models.device import Pool, diff_pool_data, get_unit
+from bragerconnect.timeouts import AdaptiveTimeout
+from bragerconnect.websocket import Connection
+
+
+def test_unit_converters():
+    """Units are compiled into passthrough, scale and options converters."""
+    unit = get_unit("pl")
+
+    assert unit.get_value(65.5, 1) == 65.5
+    assert unit.get_value(333, 49) == 33.3
+    assert unit.set_value(33.3, 49) == 333
+    assert unit.get_value(1, 9) == "Tak"
+    assert unit.set_value("Tak", 9) == 1
+    assert unit.converter(49) is unit.converter(49)
+
+
+def test_unit_catalog_forms():
+    """Scaled plain string units and bare options maps of the real catalog are decoded."""
+    unit = get_unit("pl")
+
+    assert unit.get_value(235, 87) == 23.5
+    assert unit.set_value(23.5, 87) == 235
+    assert unit.get_value(2150, 89) == 21.5
+    assert unit.converter(89).unit == "°C"
+    assert unit.get_value(1, 79) == "Chłodzenie"
+    assert unit.set_value("Grzanie", 79) == 2
+
+    assert unit.get_value(10, 12) == unit.get_value(0, 12) == "Wyłączony"
+    assert unit.set_value("Automatyczny Zima/Lato", 12) == 3
+    with pytest.raises(ValueError, match="Ambiguous"):  # 0 or 10, depending on controller
+        unit.set_value("Wyłączony", 12)
+    assert unit.set_value(10, 12) == 10
+
+
+def test_pool_update(pool_data):
+    """Pool changes are decoded with field unit."""
+    pool = Pool(init_data=pool_data)
+    assert pool.value[10][2] == 33.3
+
+    changed = pool.update([{"pool": "P10", "field": "v2", "value": 300}])
+
+    assert changed == [(10, 2, "v")]
+    assert pool.data[10][2]["v"] == 300
+    assert pool.value[10][2] == 30.0
+
+
+def test_thermostat_schedule(pool_data):
+    """Thermostat programs are decoded, patched and written as minimal diff."""
+    pool = Pool(init_data=pool_data)
+    schedule = pool.schedule
+    assert len(schedule) == 12
+    assert list(schedule.get(4)) == [0] * 9
+
+    pool.update([{"pool": "P12", "field": "c4", "value": 3}])
+    assert list(schedule.get(4)) == [0, 0, 3, 0, 0, 0, 0, 0, 0]
+
+    assert schedule.writes(4, [1, 0, 3, 0, 0, 0, 0, 0, None]) == [(12, "a4", 1)]
+    with pytest.raises(ValueError):
+        schedule.writes(4, [11, 0, 0, 0, 0, 0, 0, 0, 0])
+
+
+def test_pool_resync(pool_data):
+    """Resync reports only fields changed since the last snapshot."""
+    pool = Pool(init_data=pool_data)
+    new_data = copy.deepcopy(pool_data)
+    new_data["P4"]["v1"] = 60
+    new_data["P6"]["v0"] = 70
+    new_data["P13"] = {"v0": 1}
+
+    assert diff_pool_data(pool.data, new_data) == [
+        {"pool": "P4", "field": "v1", "value": 60},
+        {"pool": "P6", "field": "v0", "value": 70},
+        {"pool": "P13", "field": "v0", "value": 1},
+    ]
+    assert pool.resync(new_data) == [(4, 1, "v"), (6, 0, "v"), (13, 0, "v")]
+    assert pool.resync(new_data) == []
+
+
+def test_pool_history(pool_data, monkeypatch):
+    """Tracked parameters values are recorded in ring buffers and downsampled."""
+    now = [1000.0]
+    monkeypatch.setattr("bragerconnect.models.device.time.time", lambda: now[0])
+    pool = Pool(init_data=pool_data)
+    history = pool.track_history(10, 2, capacity=4)
+    for value in (300, 310, 320, 330, 340):
+        now[0] += 10
+        pool.update([{"pool": "P10", "field": "v2", "value": value}])
+    pool.update([{"pool": "P4", "field": "v0", "value": 70}])  # not tracked
+
+    times, values = history.ordered()
+    assert list(times) == [1020.0, 1030.0, 1040.0, 1050.0]
+    assert list(values) == [31.0, 32.0, 33.0, 34.0]
+    assert history.downsample(20, "mean") == [(1020.0, 31.5), (1040.0, 33.5)]
+    assert history.downsample(20, "max", start=1030) == [(1030.0, 33.0), (1050.0, 34.0)]
+    assert history.downsample(100, "min") == [(1020.0, 31.0)]
+    assert pool.history.memory == 4 * 16
+
+
+def test_pool_statistics(pool_data, monkeypatch):
+    """Streaming statistics are updated with every change of tracked parameter."""
+    now = [1000.0]
+    monkeypatch.setattr("bragerconnect.models.device.time.time", lambda: now[0])
+    pool = Pool(init_data=pool_data)
+    pool.update([{"pool": "P4", "field": "u24", "value": 9}])  # options unit
+    temperature = pool.track_statistics(10, 2, window=25, tau=10)
+    state = pool.track_statistics(4, 24)
+    assert state.states and not temperature.states
+
+    for value, option in ((300, 0), (310, 1), (290, 1), (280, 0)):
+        now[0] += 10
+        pool.update(
+            [
+                {"pool": "P10", "field": "v2", "value": value},
+                {"pool": "P4", "field": "v24", "value": option},
+            ]
+        )
+
+    assert (temperature.minimum, temperature.maximum) == (28.0, 31.0)
+    assert temperature.rate == pytest.approx(-0.1)
+    assert 28.0 < temperature.ewma < 31.0
+    assert temperature.count == 5
+    assert state.time_in_state() == {236: 10.0, "Nie": 10.0, "Tak": 20.0}
+    assert state.time_in_state(now=now[0] + 10)["Nie"] == 20.0
+
+
+def test_pool_optimistic_write(pool_data):
+    """Writes are applied locally, validated against n/x and rolled back when rejected."""
+    pool = Pool(init_data=pool_data)
+    with pytest.raises(ValueError):
+        pool.write(10, 2, "v", 371)  # P10.x2 = 370
+    assert pool.data[10][2]["v"] == 333 and not pool.pending
+
+    write = pool.write(10, 2, "v", 350)
+    assert pool.value[10][2] == 35.0
+    assert pool.pending == {(10, 2, "v"): write}
+    assert pool.rollback(write) == [(10, 2, "v")]
+    assert pool.value[10][2] == 33.3 and not pool.pending
+
+    write = pool.write(10, 2, "v", 350)
+    pool.update([{"pool": "P10", "field": "v2", "value": 333}])  # sent before the write
+    assert pool.pending == {(10, 2, "v"): write}
+    assert pool.rollback(write) == [(10, 2, "v")]
+    assert pool.value[10][2] == 33.3
+
+    write = pool.write(10, 2, "v", 350)
+    pool.update([{"pool": "P10", "field": "v2", "value": 340}])  # changed by someone else
+    assert pool.rollback(write) == [(10, 2, "v")]
+    assert pool.value[10][2] == 34.0
+
+    write = pool.write(10, 2, "v", 350)
+    pool.update([{"pool": "P10", "field": "v2", "value": 350}])  # written value settles
+    assert pool.rollback(write) == [] and not pool.pending
+    assert pool.value[10][2] == 35.0
+
+    write = pool.write(10, 99, "v", 5)  # field not known locally
+    assert pool.value[10][99] == 5
+    assert pool.rollback(write) == [(10, 99, "v")]
+    assert 99 not in pool.data[10] and 99 not in pool.value[10]
+
+
+def test_device_write_rollback(pool_data):
+    """Writes rejected by `taskOverwriteConfimation` or failed requests are rolled back."""
+
+    async def run():
+        async with MockServer({"FTTCTBSLCE": pool_data}, task_delay=0.05) as server:
+            timeouts = AdaptiveTimeout(default=0.2)
+            conn = Connection("bench", "bench", host=server.url, timeouts=timeouts)
+            async with Gateway(conn) as gateway:
+                await gateway.async_update_devices()
+                device = gateway.get_device("FTTCTBSLCE")
+                rollbacks = []
+                gateway.add_rollback_listener(lambda device, write: rollbacks.append(write))
+
+                server.overwrite_tasks = True
+                task_id = await device.async_set_pool_param(10, 2, 350)
+                assert device.pool.value[10][2] == 35.0
+                await asyncio.sleep(0.2)
+                assert device.pool.value[10][2] == 33.3 and not device.pool.pending
+                assert [(write.key, write.task_id) for write in rollbacks] == [
+                    ((10, 2, "v"), task_id)
+                ]
+
+                server.unanswered.add("s_setPoolParam")
+                with pytest.raises(RuntimeError):
+                    await device.async_set_pool_param(10, 2, 340)
+                assert device.pool.value[10][2] == 33.3 and not device.pool.pending
+                assert len(rollbacks) == 2
+
+    asyncio.run(run())
+
+
+def test_device_write_confirmed_before_response(pool_data):
+    """Confirmation handled before the write response is resumed settles the write."""
+
+    async def run():
+        async with MockServer({"FTTCTBSLCE": pool_data}) as server:
+            async with Gateway(Connection("bench", "bench", host=server.url)) as gateway:
+                await gateway.async_update_devices()
+                device = gateway.get_device("FTTCTBSLCE")
+                rollbacks = []
+                gateway.add_rollback_listener(lambda device, write: rollbacks.append(write))
+
+                server.overwrite_tasks = True
+                task_id = await device.async_set_pool_param(10, 2, 350)
+                await asyncio.sleep(0.05)
+                assert device.pool.value[10][2] == 33.3 and not device.pool.pending
+                assert [write.task_id for write in rollbacks] == [task_id]
+
+                server.overwrite_tasks = False
+                await device.async_set_pool_param(10, 2, 340)
+                await asyncio.sleep(0.05)
+                assert device.pool.value[10][2] == 34.0 and not device.pool.pending
+                assert not device._confirmations  # pylint: disable=protected-access
+
+    asyncio.run(run())
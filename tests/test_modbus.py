@@ -0,0 +1,71 @@
+"""Tests for `bragerconnect.modbus` module."""
+import asyncio
+
+import pytest
+
+from bragerconnect.modbus import RegisterBlock, decode_registers, plan_reads
+
+
+def test_register_block():
+    """Registers are byte swapped, signed and scaled."""
+    block = RegisterBlock(0x100, 2, pool=4, scale=0.1, byteswap=True)
+
+    assert block.decode(0x8A02) == 65.0
+    assert block.decode(0x9CFF) == -10.0
+    assert block.encode(65.0) == 0x8A02
+    assert (4, 1, "v") in block
+    assert (4, 2, "v") not in block
+
+
+def test_decode_registers():
+    """Bulk decoding gives the same values as decoding register by register."""
+    block = RegisterBlock(0x100, 4, pool=4, scale=0.1, byteswap=True)
+    registers = [0x8A02, 0x9CFF, 0xFFFF, 0x7FFF]
+
+    assert block.decode_many(registers) == [block.decode(register) for register in registers]
+    assert decode_registers(registers, signed=False) == registers
+
+
+def test_plan_reads():
+    """Adjacent blocks are read with one request, up to the Modbus limit."""
+    reads = plan_reads(
+        [
+            RegisterBlock(0x13C, 10, pool=5),
+            RegisterBlock(0x100, 60, pool=4),
+            RegisterBlock(0x200, 100, pool=6),
+            RegisterBlock(0x264, 100, pool=7),
+        ]
+    )
+
+    assert [(read.address, read.count) for read in reads] == [
+        (0x100, 70),
+        (0x200, 100),
+        (0x264, 100),
+    ]
+
+
+def test_modbus_connection():
+    """Modbus connection polls registers and dispatches changes as pushes."""
+    pytest.importorskip("pymodbus")
+    from bragerconnect.mock_server import start_modbus_server
+    from bragerconnect.modbus import ModbusConnection
+
+    block = RegisterBlock(0x100, 4, pool=4, scale=0.1, byteswap=True)
+
+    async def run():
+        server, port = await start_modbus_server({0x100: [0x8A02, 0, 0, 0]})
+        changes = []
+        try:
+            async with ModbusConnection(
+                "127.0.0.1", port=port, register_map=(block,), poll_interval=0.01
+            ) as conn:
+                conn.add_listener("poolDataChanged", lambda wrkfnc: changes.extend(wrkfnc.args[0]))
+                await conn.connect()
+                assert (await conn.async_get_all_pool_data())["P4"]["v0"] == 65.0
+                await conn.async_set_pool_param(4, 2, 12.5)
+                await asyncio.sleep(0.1)
+        finally:
+            await server.shutdown()
+        return changes
+
+    assert asyncio.run(run()) == [{"pool": "P4", "field": "v2", "value": 12.5}]
@@ -0,0 +1,41 @@
+"""Tests for entity descriptors generation."""
+import copy
+
+from bragerconnect.models.device import Pool
+from bragerconnect.models.platform import BinarySensor, get_entity_descriptors
+
+
+def test_descriptors(pool_data):
+    """Descriptors join pool structure with names and units."""
+    entities = {entity.key: entity for entity in get_entity_descriptors(Pool(init_data=pool_data))}
+
+    assert entities["P4.v0"].name == "Temperatura kotła"
+    assert entities["P4.v0"].unit_name == "°C"
+    assert entities["P5.s0"].letter == "s"
+    assert not any(key.startswith("P12.") for key in entities)
+    assert any(isinstance(entity, BinarySensor) for entity in entities.values())
+
+
+def test_descriptors_shared_per_model(pool_data):
+    """Devices of the same model share one descriptors table."""
+    other = copy.deepcopy(pool_data)
+    other["P11"]["v6"] = "ID ETH: OTHERDEVID"
+
+    assert get_entity_descriptors(Pool(init_data=pool_data)) is get_entity_descriptors(
+        Pool(init_data=other)
+    )
+
+    other["P11"]["v1"] = "Z.HT900T v2.6.0"
+    assert get_entity_descriptors(Pool(init_data=pool_data)) is not get_entity_descriptors(
+        Pool(init_data=other)
+    )
+
+
+def test_descriptors_of_unknown_model_not_shared(pool_data):
+    """Devices without P11 model strings get descriptors of their own parameters."""
+    first, second = copy.deepcopy(pool_data), copy.deepcopy(pool_data)
+    del first["P11"], second["P11"]
+    del second["P4"]["v0"]
+
+    assert "P4.v0" in {entity.key for entity in get_entity_descriptors(Pool(init_data=first))}
+    assert "P4.v0" not in {entity.key for entity in get_entity_descriptors(Pool(init_data=second))}
@@ -0,0 +1,39 @@
+"""Tests for `bragerconnect.ratelimit` module."""
+import asyncio
+
+import pytest
+
+from bragerconnect.ratelimit import RateLimiter, TokenBucket
+
+
+def test_token_bucket():
+    """Burst is free, next tokens are reserved one `1 / rate` after another."""
+    bucket = TokenBucket(rate=10, burst=2)
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    delays = [bucket.reserve() for _ in range(3)]
+    assert delays == pytest.approx([0.1, 0.2, 0.3], abs=0.01)
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_rate_limiter_limits_and_stats():
+    """Request waits for its name bucket and for the shared parent limiter."""
+    budget = RateLimiter(rate=10, burst=3)
+    first = RateLimiter(limits={"s_getAllPoolData": (100, 1)}, parent=budget)
+    second = RateLimiter(parent=budget)
+
+    async def run():
+        return [
+            await first.async_acquire("s_getTaskQueue"),
+            await first.async_acquire("s_getAllPoolData"),
+            await first.async_acquire("s_getAllPoolData"),  # name bucket is empty
+            await second.async_acquire("s_getTaskQueue"),  # shared budget is empty
+        ]
+
+    delays = asyncio.run(run())
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] > 0 and delays[3] > 0
+    assert first.stats.acquired == 3 and first.stats.delayed == 1
+    assert set(first.stats.wait_time_by_name) == {"s_getAllPoolData"}
+    assert budget.stats.acquired == 4 and budget.stats.delayed == 2
@@ -0,0 +1,52 @@
+"""Tests for `bragerconnect.scheduler` module."""
+import asyncio
+
+from bragerconnect.models.websocket import Priority
+from bragerconnect.scheduler import OutboundScheduler
+
+
+def send_all(requests, max_wait):
+    """Submits all requests at once, returns frames in the order they were sent."""
+
+    async def run():
+        sent = []
+        responses = {}
+
+        async def send(data):
+            sent.append(data)
+            responses[data].set_result(None)  # response frees in-flight slot
+
+        scheduler = OutboundScheduler(send, max_in_flight=1, max_wait=max_wait)
+        loop = asyncio.get_running_loop()
+        for priority, data in requests:
+            responses[data] = loop.create_future()
+            scheduler.submit(priority, data, responses[data])
+        task = asyncio.create_task(scheduler.async_run())
+        await asyncio.wait_for(asyncio.gather(*responses.values()), 1)
+        task.cancel()
+        return sent, scheduler.stats
+
+    return asyncio.run(run())
+
+
+def test_priority_order():
+    """Higher priority requests are sent first, FIFO within the same priority."""
+    requests = [
+        (Priority.BACKGROUND, "b1"),
+        (Priority.READ, "r1"),
+        (Priority.BACKGROUND, "b2"),
+        (Priority.INTERACTIVE, "w1"),
+        (Priority.READ, "r2"),
+    ]
+    sent, stats = send_all(requests, max_wait=60)
+    assert sent == ["w1", "r1", "r2", "b1", "b2"]
+    assert stats.sent == [1, 2, 2]
+    assert stats.queued == stats.in_flight == stats.promoted == 0
+
+
+def test_waiting_too_long_is_promoted():
+    """Requests waiting longer than `max_wait` are sent before higher priority ones."""
+    requests = [(Priority.BACKGROUND, "b1"), (Priority.INTERACTIVE, "w1")]
+    sent, stats = send_all(requests, max_wait=0)
+    assert sent == ["b1", "w1"]
+    assert stats.promoted == 1
@@ -0,0 +1,50 @@
+"""Tests for `bragerconnect.models.search` module."""
+import asyncio
+
+from bragerconnect.gateway import Gateway
+from bragerconnect.mock_server import MockServer
+from bragerconnect.models.search import get_search_index, normalize
+from bragerconnect.websocket import Connection
+
+
+def test_normalize():
+    """Names are split into lowercase tokens without Polish diacritics."""
+    assert normalize("Temperatura załączenia CWU (°C)") == [
+        "temperatura",
+        "zalaczenia",
+        "cwu",
+        "°c",
+    ]
+
+
+def test_search_index():
+    """All query tokens must match name tokens by prefix."""
+    index = get_search_index("pl")
+    assert index is get_search_index("pl")
+    assert (4, 2) in index.search("temp cwu")
+    assert index.search("temp cwu", pool_no=4) == {(4, 2)}
+    assert index.search("Temperatura kotła", pool_no=4) == {(4, 0)}
+    assert index.search("no such parameter") == set()
+    assert 1 in index.unit_ids("°C")
+    assert index.unit_ids("monoblock") == {80}  # bare options map
+
+
+def test_fleet_search(pool_data):
+    """Parameters are found in pools of all devices."""
+
+    async def run():
+        devices = {"DEV1": pool_data, "DEV2": pool_data}
+        async with MockServer(devices) as server:
+            async with Gateway(Connection("bench", "bench", host=server.url)) as gateway:
+                await gateway.async_update_devices()
+                return (
+                    gateway.search_parameters("temp cwu", unit="°C"),
+                    gateway.search_parameters("temp kotla", pool_no=4, devid="DEV2"),
+                )
+
+    cwu, boiler = asyncio.run(run())
+    assert [(match.devid, match.pool, match.field) for match in cwu][:1] == [("DEV1", 4, 2)]
+    assert {match.devid for match in cwu} == {"DEV1", "DEV2"}
+    assert [(match.devid, match.name, match.value) for match in boiler] == [
+        ("DEV2", "Temperatura kotła", 65.5)
+    ]
@@ -0,0 +1,50 @@
+"""Tests for `bragerconnect.shared` module."""
+import multiprocessing
+
+import pytest
+
+from bragerconnect.models.device import Device, DeviceInfo
+from bragerconnect.shared import SharedPoolPublisher, SharedPoolReader
+
+
+def read_value(name, queue):
+    """Reads P4.v0 of published device in another process."""
+    with SharedPoolReader(name) as reader:
+        queue.put((reader.device_ids, reader.get_value("DEV1", 4, 0)))
+
+
+def test_shared_pool_publication(pool_data):
+    """Published values are read consistently, also from another process."""
+    info = DeviceInfo("bench", None, "DEV1")
+    device = Device(None, info).load(pool_data)
+    with SharedPoolPublisher(devices=4, slots=1024) as publisher:
+        publisher.device_updated(device)
+        with SharedPoolReader(publisher.name) as reader:
+            values = reader.read("DEV1")
+            numeric = [
+                (pool_no, field_no)
+                for pool_no, fields in device.pool.data.items()
+                for field_no, field_values in fields.items()
+                if isinstance(field_values.get("v"), (int, float))
+            ]
+            assert numeric and all(
+                values[pool_no][field_no] == device.pool.value[pool_no][field_no]
+                for pool_no, field_no in numeric
+            )
+            changed = device.pool.update([{"pool": "P4", "field": "v0", "value": 70}])
+            publisher.pool_changed(device, changed)
+            assert reader.get_value("DEV1", 4, 0) == 70
+
+            context = multiprocessing.get_context("spawn")
+            queue = context.Queue()
+            process = context.Process(target=read_value, args=(publisher.name, queue))
+            process.start()
+            assert queue.get(timeout=30) == (["DEV1"], 70)
+            process.join()
+            with SharedPoolReader(publisher.name) as attached:  # not removed by exited reader
+                assert attached.get_value("DEV1", 4, 0) == 70
+
+            publisher.device_removed("DEV1")
+            assert reader.device_ids == []
+    with pytest.raises(FileNotFoundError):
+        SharedPoolReader(publisher.name)
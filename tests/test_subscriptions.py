@@ -0,0 +1,45 @@
+"""Tests for `bragerconnect.subscriptions` module."""
+import asyncio
+
+from bragerconnect.subscriptions import SubscriptionIndex
+
+
+def changes(*values):
+    """Changed triples and real values of P4 v0 field."""
+    return [(4, 0, "v")], {4: {0: values[0]}}
+
+
+def test_only_subscribed_and_deadband():
+    """Only subscribers of changed parameter are notified, small changes are filtered."""
+    index = SubscriptionIndex()
+    absolute, percent, other = [], [], []
+    index.subscribe("DEV", 4, 0, lambda *args: absolute.append(args[3]), deadband=1)
+    index.subscribe("DEV", 4, 0, lambda *args: percent.append(args[3]), deadband=10, percent=True)
+    index.subscribe("DEV", 4, 1, lambda *args: other.append(args[3]))
+    unsubscribe = index.subscribe("OTHER", 4, 0, lambda *args: other.append(args[3]))
+
+    for value in (60.0, 60.5, 61.0, 65.0, 66.5, 72.0):
+        index.notify("DEV", *changes(value))
+    unsubscribe()
+
+    assert absolute == [60.0, 61.0, 65.0, 66.5, 72.0]
+    assert percent == [60.0, 66.5]
+    assert other == []
+    assert index.delivered == 7 and index.suppressed == 5
+    assert len(index) == 3
+
+
+def test_min_interval_notifies_latest_value():
+    """Changes within minimum interval are merged into one deferred notification."""
+
+    async def run():
+        index = SubscriptionIndex()
+        notified = []
+        index.subscribe("DEV", 4, 0, lambda *args: notified.append(args[3]), min_interval=0.05)
+        for value in (1, 2, 3, 4):
+            index.notify("DEV", *changes(value))
+        assert notified == [1]
+        await asyncio.sleep(0.1)
+        return notified
+
+    assert asyncio.run(run()) == [1, 4]
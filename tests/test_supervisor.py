@@ -0,0 +1,54 @@
+"""Tests for `bragerconnect.supervisor` module."""
+import copy
+import socket
+
+from bragerconnect.mock_server import MockServer
+from bragerconnect.supervisor import Account, ShardedGateway
+from bragerconnect.sync import LoopThread
+
+
+def test_sharded_gateway(pool_data):
+    """Workers stream changes to the merged view, accounts of dead worker are moved."""
+    with LoopThread() as loop_thread:
+        servers = [MockServer({devid: copy.deepcopy(pool_data)}) for devid in ("DEV1", "DEV2")]
+        accounts = [
+            Account("bench", "bench", {"host": loop_thread.run(server.start())})
+            for server in servers
+        ]
+        with ShardedGateway(accounts, workers=2, interval=0.01, context="spawn") as gateway:
+            assert gateway.wait(lambda: len(gateway.values) == 2, timeout=30)
+            assert gateway.get_value("DEV1", 4, 0) == 65.5
+
+            changes = [{"pool": "P4", "field": "v0", "value": 70}]
+            loop_thread.run(servers[1].push_changes("DEV2", changes))
+            assert gateway.wait(lambda: gateway.get_value("DEV2", 4, 0) == 70, timeout=10)
+
+            worker = next(w for w in gateway.workers.values() if 1 in w.accounts)
+            worker.process.kill()
+            worker.process.join()
+            assert gateway.check_workers() == [worker.number]
+            assert gateway.stale == {"DEV2"}
+            assert gateway.wait(lambda: not gateway.stale, timeout=30)
+            assert [w.accounts for w in gateway.workers.values()] == [{0, 1}]
+
+            changes = [{"pool": "P4", "field": "v0", "value": 71}]
+            loop_thread.run(servers[1].push_changes("DEV2", changes))
+            assert gateway.wait(lambda: gateway.get_value("DEV2", 4, 0) == 71, timeout=10)
+        for server in servers:
+            loop_thread.run(server.stop())
+
+
+def test_failed_account_retried(pool_data):
+    """Account which failed to connect is retried by its worker until it is served."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    with LoopThread() as loop_thread:
+        server = MockServer({"DEV1": copy.deepcopy(pool_data)})
+        account = Account("bench", "bench", {"host": f"ws://127.0.0.1:{port}"})
+        with ShardedGateway([account], 1, interval=0.01, context="spawn", retry=0.1) as gateway:
+            assert gateway.wait(lambda: 0 in gateway.errors, timeout=30)
+            loop_thread.run(server.start(port=port))
+            assert gateway.wait(lambda: "DEV1" in gateway.values, timeout=30)
+            assert not gateway.errors
+        loop_thread.run(server.stop())
@@ -0,0 +1,40 @@
+"""Tests for `bragerconnect.sync` module."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bragerconnect.mock_server import MockServer
+from bragerconnect.sync import LoopThread, SyncGateway
+
+
+def test_loop_thread():
+    """Coroutines and functions run in the loop thread, blocking from it is refused."""
+    with LoopThread() as loop_thread:
+        assert loop_thread.run(asyncio.sleep(0, "done")) == "done"
+        assert loop_thread.call(lambda: asyncio.get_running_loop()) is loop_thread.loop
+
+        async def nested():
+            return loop_thread.run(asyncio.sleep(0))
+
+        with pytest.raises(RuntimeError):
+            loop_thread.run(nested())
+    assert not loop_thread.running
+
+
+def test_sync_gateway(pool_data):
+    """Many threads share one loop thread through blocking gateway calls."""
+    with LoopThread() as loop_thread:
+        server = MockServer({"FTTCTBSLCE": pool_data})
+        url = loop_thread.run(server.start())
+        changes = []
+        with SyncGateway("bench", "bench", loop_thread, timeout=5, host=url) as gateway:
+            assert gateway.update_devices() == ["FTTCTBSLCE"]
+            gateway.subscribe("FTTCTBSLCE", 6, 0, lambda *args: changes.append(args[-1]))
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(gateway.request, ["s_getTaskQueue"] * 32))
+            assert results == [[]] * 32
+            assert gateway.set_pool_param("FTTCTBSLCE", 6, 0, 74) == 1
+            assert gateway.get_value("FTTCTBSLCE", 6, 0) == 74
+        loop_thread.run(server.stop())
+    assert changes == [74]
@@ -0,0 +1,89 @@
+"""Tests for `bragerconnect.timeouts` module."""
+
+import asyncio
+
+import pytest
+
+from bragerconnect.mock_server import MockServer
+from bragerconnect.timeouts import AdaptiveTimeout
+from bragerconnect.websocket import Connection
+
+
+def test_adaptive_timeout():
+    """Timeout follows measured round-trips within bounds, timeouts make it grow."""
+    timeouts = AdaptiveTimeout(default=10, minimum=1, maximum=30, factor=3, fail_after=2)
+    assert timeouts.timeout("s_getAllPoolData") == 10
+    for _ in range(10):
+        timeouts.record("s_getAllPoolData", 2.0)
+        timeouts.record("s_getTaskQueue", 0.01)
+    assert timeouts.timeout("s_getAllPoolData") == 6.0
+    assert timeouts.timeout("s_getTaskQueue") == 1
+    timeouts.record_timeout("s_getAllPoolData", 6.0)
+    assert timeouts.timeout("s_getAllPoolData") == 18.0
+    assert not timeouts.failing
+    timeouts.record_timeout("s_getTaskQueue", 1)
+    assert timeouts.failing
+
+
+def test_fast_fail(pool_data):
+    """Connection is dropped after consecutive timeouts, next requests fail immediately."""
+
+    async def run():
+        async with MockServer({"FTTCTBSLCE": pool_data}) as server:
+            timeouts = AdaptiveTimeout(default=0.05, fail_after=2)
+            async with Connection("bench", "bench", host=server.url, timeouts=timeouts) as conn:
+                await conn.connect()
+                server.unanswered.add("s_getTaskQueue")
+                for _ in range(2):
+                    with pytest.raises(RuntimeError):
+                        await conn.async_get_task_queue()
+                assert not conn.connected
+                assert not conn._responses  # pylint: disable=protected-access
+                with pytest.raises(ConnectionError):
+                    await conn.async_get_all_pool_data()
+                await conn.close()
+                assert conn._session.closed  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_connection_lost_fails_sent_requests(pool_data):
+    """Requests already sent fail with ConnectionError on disconnect, not after timeout."""
+
+    async def run():
+        async with MockServer({"FTTCTBSLCE": pool_data}) as server:
+            timeouts = AdaptiveTimeout(default=10)
+            async with Connection("bench", "bench", host=server.url, timeouts=timeouts) as conn:
+                await conn.connect()
+                server.unanswered.add("s_getTaskQueue")
+                requests = [asyncio.create_task(conn.async_get_task_queue()) for _ in range(3)]
+                await asyncio.sleep(0.05)
+                for client in list(server.clients):
+                    await client.close()
+                results = await asyncio.wait_for(
+                    asyncio.gather(*requests, return_exceptions=True), 1
+                )
+                assert all(isinstance(result, ConnectionError) for result in results)
+                assert not conn._responses and not conn._sent  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_timeout_starts_when_sent(pool_data):
+    """Requests waiting in the scheduler do not time out, queue wait is not a round-trip."""
+
+    async def run():
+        async with MockServer({"FTTCTBSLCE": pool_data}, latency=0.1) as server:
+            timeouts = AdaptiveTimeout(default=0.2, minimum=0.01, factor=1, fail_after=2)
+            conn = Connection("bench", "bench", host=server.url, timeouts=timeouts, max_in_flight=1)
+            async with conn:
+                await conn.connect()
+                responses = await asyncio.gather(*(conn.async_get_task_queue() for _ in range(5)))
+                assert conn.connected
+                assert not conn._sent  # pylint: disable=protected-access
+                return responses, timeouts
+
+    responses, timeouts = asyncio.run(run())
+    assert len(responses) == 5
+    assert not timeouts.failing
+    assert timeouts.timeout("s_getTaskQueue") < 0.2  # measured round-trips, ~0.1 s each
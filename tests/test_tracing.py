@@ -0,0 +1,65 @@
+"""Tests for `bragerconnect.tracing` module."""
+import asyncio
+import logging
+
+from bragerconnect.gateway import Gateway
+from bragerconnect.mock_server import MockServer
+from bragerconnect.tracing import NULL_SPAN, NULL_TRACER, SlowOperationLogger, Tracer
+from bragerconnect.websocket import Connection
+
+
+class RecordingTracer(Tracer):
+    """Tracer collecting finished spans."""
+
+    enabled = True
+
+    def __init__(self):
+        self.spans = []
+
+    def finish(self, span):
+        self.spans.append(span)
+
+
+def test_null_tracer():
+    """Disabled tracer returns shared no-op span."""
+    with NULL_TRACER.span("request", name="s_getAllPoolData") as span:
+        span.mark("queued")
+    assert span is NULL_SPAN
+
+
+def test_gateway_spans(pool_data):
+    """Requests, received messages, listeners, pool updates and device creation are traced."""
+    tracer = RecordingTracer()
+
+    async def run():
+        async with MockServer({"FTTCTBSLCE": pool_data}) as server:
+            async with Gateway(Connection("bench", "bench", host=server.url), tracer=tracer) as gw:
+                await gw.async_update_devices()
+                await server.push_changes("FTTCTBSLCE", [{"pool": "P4", "field": "v0", "value": 1}])
+                await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    spans = {span.name: span for span in tracer.spans}
+    assert {"request", "message", "listener", "pool.update", "device.create"} <= set(spans)
+    assert [phase for phase, _ in spans["device.create"].marks] == [
+        "activated",
+        "fetched",
+        "created",
+    ]
+    assert spans["pool.update"].attrs == {"devid": "FTTCTBSLCE", "changes": 1}
+    assert [phase for phase, _ in spans["request"].marks] == ["queued", "sent"]
+    assert [phase for phase, _ in spans["message"].marks] == ["dequeued", "parsed", "handled"]
+    for span in (spans["request"], spans["message"]):
+        times = [span.start, *(time for _, time in span.marks), span.end]
+        assert times == sorted(times)
+    assert all(span.duration >= 0 for span in tracer.spans)
+
+
+def test_slow_operation_logger(caplog):
+    """Operations longer than threshold are logged with their phases."""
+    tracer = SlowOperationLogger(threshold=0)
+    with caplog.at_level(logging.WARNING, logger="bragerconnect"):
+        with tracer.span("message", size=10) as span:
+            span.mark("parsed")
+    assert "Slow message {'size': 10}" in caplog.text
+    assert "parsed +" in caplog.text
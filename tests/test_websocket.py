@@ -0,0 +1,115 @@
+"""Tests for `bragerconnect.websocket` module."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from bragerconnect.mock_server import MockServer
+from bragerconnect.models.device import Device, DeviceInfo, Pool
+from bragerconnect.websocket import Connection
+
+
+def run_with_server(pool_data, test, **server_kwargs):
+    """Runs `test(server, connection)` coroutine against local mock server."""
+
+    async def run():
+        async with MockServer({"FTTCTBSLCE": pool_data}, **server_kwargs) as server:
+            async with Connection("bench", "bench", host=server.url) as conn:
+                await conn.connect()
+                return await test(server, conn)
+
+    return asyncio.run(run())
+
+
+def test_requests_and_pushes(pool_data):
+    """Responses resolve requests, pushes are dispatched to listeners."""
+
+    async def test(server, conn):
+        pushes = []
+        conn.add_listener("poolDataChanged", pushes.append)
+        assert await conn.async_get_active_device_id() == "FTTCTBSLCE"
+        assert (await conn.async_get_all_pool_data())["P4"]["v0"] == 65.5
+        await server.push_changes("FTTCTBSLCE", [{"pool": "P4", "field": "v0", "value": 66}])
+        await asyncio.sleep(0.05)
+        return pushes, conn.queue_stats
+
+    pushes, stats = run_with_server(pool_data, test)
+    assert pushes[0].args == [[{"pool": "P4", "field": "v0", "value": 66}], "FTTCTBSLCE"]
+    assert stats.received == stats.processed
+    assert stats.depth == 0
+
+
+def test_offloaded_parsing_keeps_order(pool_data):
+    """Frames decoded in executor are processed in the order they were received."""
+
+    async def test(server, conn):
+        conn.offload_size = 0
+        pushes = []
+        conn.add_listener("poolDataChanged", lambda wrkfnc: pushes.append(wrkfnc.args[0][0]))
+        for value in range(20):
+            await server.push_changes("FTTCTBSLCE", [{"pool": "P4", "field": "v0", "value": value}])
+        assert (await conn.async_get_all_pool_data())["P4"]["v0"] == 19
+        return pushes
+
+    pushes = run_with_server(pool_data, test)
+    assert [change["value"] for change in pushes] == list(range(20))
+
+
+def test_real_snapshot_offloaded(pool_data):
+    """Real `s_getAllPoolData` frame and pool are decoded in executor with default thresholds."""
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        """Thread pool executor recording submitted functions."""
+
+        def __init__(self):
+            super().__init__(1)
+            self.submitted = []
+
+        def submit(self, fn, /, *args, **kwargs):
+            self.submitted.append(getattr(fn, "func", fn))
+            return super().submit(fn, *args, **kwargs)
+
+    async def test(server, conn):
+        conn.executor = RecordingExecutor()
+        device = await Device(conn, DeviceInfo("bench", None, "FTTCTBSLCE")).create()
+        await server.push_changes("FTTCTBSLCE", [{"pool": "P4", "field": "v0", "value": 66}])
+        await asyncio.sleep(0.05)
+        conn.executor.shutdown()
+        return device, conn.executor.submitted
+
+    device, submitted = run_with_server(pool_data, test)
+    assert device.pool.data[4][0]["v"] == 65.5
+    assert submitted == [Connection._parse_message, Pool]  # pylint: disable=protected-access
+
+
+def test_malformed_frames_skipped(pool_data):
+    """Malformed frames are skipped, following messages are still processed."""
+
+    async def test(server, conn):
+        pushes = []
+        conn.add_listener("poolDataChanged", pushes.append)
+        for client in server.clients:
+            await client.send_str("{not json")
+            await client.send_str("[1, 2]")
+        await server.push_changes("FTTCTBSLCE", [{"pool": "P4", "field": "v0", "value": 66}])
+        assert (await conn.async_get_all_pool_data())["P4"]["v0"] == 66
+        return pushes, conn.queue_stats
+
+    pushes, stats = run_with_server(pool_data, test)
+    assert len(pushes) == 1
+    assert stats.received == stats.processed
+
+
+def test_device_list_cached_until_push(pool_data):
+    """Devices list is requested once, until `moduleListChanged` push invalidates it."""
+
+    async def test(server, conn):
+        first = await conn.async_get_device_id_list()
+        first.clear()  # callers get copies of cached responses
+        assert await conn.async_get_device_id_list() == [
+            {"username": "bench", "sharedfrom_name": None, "devid": "FTTCTBSLCE"}
+        ]
+        await server.push("moduleListChanged", [])
+        await asyncio.sleep(0.05)
+        await conn.async_get_device_id_list()
+        return server.requests["s_getMyDevIdList"]
+
+    assert run_with_server(pool_data, test) == 2